@@ -0,0 +1,289 @@
+# app/analyzer.py
+"""
+Reads the numbers back out of a filled-in tracker.
+
+The month sheets (or, for the table layout, the Tasks sheet, whose rows
+are split into months by date) and the shared strings are stream-parsed with
+ElementTree.iterparse, clearing each row as soon as it has been read, so
+memory stays proportional to the handful of columns kept rather than to
+the sheet XML. Those columns are held as flat arrays and the Weekly,
+Monthly and Yearly Report figures are computed from them in Python, the
+same way the report formulas do. Table rows without a date, which no
+report formula counts, are summed on their own under 'undated'.
+"""
+import calendar
+import json
+import posixpath
+import zipfile
+from array import array
+from datetime import date
+from io import BytesIO
+from xml.etree.ElementTree import iterparse, fromstring
+
+from app.layout import (
+    FIRST_DATA_ROW, GOAL_ROWS, GOALS_SHEET, PLAN, TABLE_SHEET, YEAR_SHEET, col_letter,
+)
+
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Status codes stored in the columnar status array
+_STATUSES = {'done': 1, 'pending': 2, 'skipped': 3}
+
+# Columns read from each month sheet: Date, Task, Status, Hours, Week No
+_COLUMNS = {
+    col_letter(PLAN.month_cols[source]): name
+    for source, name in [
+        ('date', 'date'), ('description', 'task'), ('status', 'status'),
+        ('hours', 'hours'), ('week', 'week'),
+    ]
+}
+_FIRST_DATA_ROW = FIRST_DATA_ROW + 1
+# Goals sheet row (1-based) of each report goal
+_GOAL_ROWS = {
+    row: key for row, (_, key) in enumerate(GOAL_ROWS, start=4) if key != 'daily'
+}
+_EXCEL_EPOCH = date(1899, 12, 30).toordinal()
+
+
+class TrackerFormatError(ValueError):
+    """The upload is not a workbook produced by this generator."""
+
+
+class Columns:
+    """One month sheet's data rows, column by column."""
+
+    def __init__(self):
+        self.dates = array('d')
+        self.has_task = bytearray()
+        self.status = bytearray()
+        self.hours = array('d')
+        self.weeks = array('l')
+
+    def append(self, cells: dict):
+        task = cells.get('task')
+        self.dates.append(_float(cells.get('date')))
+        self.has_task.append(task is not None and str(task) != '')
+        self.status.append(_STATUSES.get(str(cells.get('status') or '').lower(), 0))
+        self.hours.append(_float(cells.get('hours')))
+        self.weeks.append(int(_float(cells.get('week'))))
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _column(ref: str) -> str:
+    return ref.rstrip('0123456789')
+
+
+def sheet_parts(zf: zipfile.ZipFile) -> dict:
+    """Sheet name -> zip part name, from workbook.xml and its rels."""
+    rels = fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {
+        rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{_PKG_NS}Relationship')
+    }
+    book = fromstring(zf.read('xl/workbook.xml'))
+    parts = {}
+    for sheet in book.iter(f'{_NS}sheet'):
+        target = targets[sheet.get(f'{_REL_NS}id')]
+        if target.startswith('/'):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join('xl', target))
+        parts[sheet.get('name')] = target
+    return parts
+
+
+def spans_years(parts: dict) -> bool:
+    """Whether the sheets in `parts` are those of a multi-year tracker."""
+    first = {calendar.month_name[1], TABLE_SHEET}
+    prefixes = tuple(YEAR_SHEET.format(sheet=name, year='') for name in first)
+    return not first & parts.keys() and any(name.startswith(prefixes) for name in parts)
+
+
+def _shared_strings(zf: zipfile.ZipFile) -> list:
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+    strings = []
+    with zf.open('xl/sharedStrings.xml') as fh:
+        for _, elem in iterparse(fh):
+            if elem.tag == f'{_NS}si':
+                strings.append(''.join(t.text or '' for t in elem.iter(f'{_NS}t')))
+                elem.clear()
+    return strings
+
+
+def _iter_rows(zf: zipfile.ZipFile, part: str, strings: list, wanted: dict):
+    """Yields (row number, {field: value}) for the `wanted` columns."""
+    with zf.open(part) as fh:
+        cells = {}
+        sheet_data = None
+        for event, elem in iterparse(fh, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == f'{_NS}sheetData':
+                    sheet_data = elem
+                continue
+            if tag == f'{_NS}c':
+                field = wanted.get(_column(elem.get('r', '')))
+                if field is not None:
+                    cells[field] = _cell_value(elem, strings)
+            elif tag == f'{_NS}row':
+                yield int(elem.get('r')), cells
+                cells = {}
+                # Drop the rows read so far so the tree never grows
+                sheet_data.clear()
+
+
+def _cell_value(elem, strings):
+    kind = elem.get('t')
+    if kind == 'inlineStr':
+        return ''.join(t.text or '' for t in elem.iter(f'{_NS}t'))
+    value = elem.findtext(f'{_NS}v')
+    if value is None:
+        return None
+    if kind == 's':
+        return strings[int(value)]
+    if kind in ('str', 'e'):
+        return value
+    if kind == 'b':
+        return value == '1'
+    return float(value)
+
+
+def _summary(total, done, pend, skip, hours, goal) -> dict:
+    return {
+        'total': total,
+        'done': done,
+        'pending': pend,
+        'skipped': skip,
+        'hours': round(hours, 4),
+        'goal': goal,
+        'complete': round(done / goal, 4) if goal else 0,
+    }
+
+
+def _aggregate(columns: Columns, keys) -> dict:
+    """Report figures per key; `keys` gives each row's bucket (or None)."""
+    buckets = {}
+    for key, task, status, hours in zip(keys, columns.has_task, columns.status, columns.hours):
+        if key is None:
+            continue
+        counts = buckets.get(key)
+        if counts is None:
+            counts = buckets[key] = [0, 0, 0, 0, 0.0]
+        counts[4] += hours
+        if task:
+            counts[0] += 1
+            if status:
+                counts[status] += 1
+    return buckets
+
+
+def analyze_workbook(data: bytes) -> dict:
+    try:
+        zf = zipfile.ZipFile(BytesIO(data))
+    except zipfile.BadZipFile:
+        raise TrackerFormatError("upload is not an xlsx file")
+
+    with zf:
+        try:
+            parts = sheet_parts(zf)
+        except KeyError:
+            raise TrackerFormatError("workbook structure not recognised")
+        if spans_years(parts):
+            raise TrackerFormatError("trackers spanning several years cannot be analyzed")
+        table = TABLE_SHEET in parts and calendar.month_name[1] not in parts
+        missing = [
+            name for name in
+            [GOALS_SHEET] + ([TABLE_SHEET] if table else list(calendar.month_name[1:]))
+            if name not in parts
+        ]
+        if missing:
+            raise TrackerFormatError(f"missing sheets: {', '.join(missing)}")
+
+        strings = _shared_strings(zf)
+
+        goals = {}
+        for row, cells in _iter_rows(zf, parts[GOALS_SHEET], strings, {'B': 'value'}):
+            if row in _GOAL_ROWS:
+                goals[_GOAL_ROWS[row]] = _float(cells.get('value'))
+
+        months = {m: Columns() for m in range(1, 13)}
+        # Table rows without a date, which no report counts
+        undated = Columns()
+        if table:
+            table_year = None
+            for row, cells in _iter_rows(zf, parts[TABLE_SHEET], strings, _COLUMNS):
+                if row < _FIRST_DATA_ROW:
+                    continue
+                serial = int(_float(cells.get('date')))
+                if serial <= 0:
+                    undated.append(cells)
+                    continue
+                day = date.fromordinal(_EXCEL_EPOCH + serial)
+                # The reports only count the tracker's own year
+                table_year = table_year or day.year
+                if day.year == table_year:
+                    months[day.month].append(cells)
+        else:
+            for m, columns in months.items():
+                sheet = parts[calendar.month_name[m]]
+                for row, cells in _iter_rows(zf, sheet, strings, _COLUMNS):
+                    if row >= _FIRST_DATA_ROW:
+                        columns.append(cells)
+
+    first_dates = months[1].dates
+    year = None
+    if first_dates and first_dates[0] > 0:
+        year = date.fromordinal(_EXCEL_EPOCH + int(first_dates[0])).year
+
+    jan1 = date(year, 1, 1).toordinal() - _EXCEL_EPOCH if year else None
+
+    def week_key(week, serial):
+        # Older trackers have no Week No column; derive it from the date
+        if not week and jan1 is not None and serial:
+            week = (int(serial) - jan1) // 7 + 1
+        return week if 1 <= week <= 52 else None
+
+    weekly = {}
+    monthly = []
+    totals = [0, 0, 0, 0, 0.0]
+    for m, columns in months.items():
+        keys = [week_key(w, d) for w, d in zip(columns.weeks, columns.dates)]
+        for week, counts in _aggregate(columns, keys).items():
+            into = weekly.setdefault(week, [0, 0, 0, 0, 0.0])
+            for i, value in enumerate(counts):
+                into[i] += value
+        counts = _aggregate(columns, [0] * len(columns.hours)).get(0, [0, 0, 0, 0, 0.0])
+        for i, value in enumerate(counts):
+            totals[i] += value
+        monthly.append(dict(
+            month=calendar.month_name[m],
+            **_summary(*counts, goals.get('monthly', 0)),
+        ))
+
+    # Reported apart, so that a task entered without a date is not lost
+    undated_counts = _aggregate(undated, [0] * len(undated.hours)).get(0, [0, 0, 0, 0, 0.0])
+
+    return {
+        'year': year,
+        'goals': goals,
+        'weekly': [
+            dict(week=w, **_summary(*weekly.get(w, [0, 0, 0, 0, 0.0]), goals.get('weekly', 0)))
+            for w in range(1, 53)
+        ],
+        'monthly': monthly,
+        'yearly': dict(year=year, **_summary(*totals, goals.get('yearly', 0))),
+        'undated': _summary(*undated_counts, 0),
+    }
+
+
+def analyze_bytes(data: bytes) -> bytes:
+    """analyze_workbook() serialised as JSON, ready to cache and send."""
+    return json.dumps(analyze_workbook(data)).encode('utf-8')
@@ -0,0 +1,169 @@
+# app/batch.py
+import asyncio
+import hashlib
+import json
+import posixpath
+import re
+import time
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, field_validator
+
+from app.layout import (
+    DEFAULT_GOALS, DEFAULT_PROFILE, GENERATOR_VERSION, PROFILES, goals_key,
+)
+from app.zipstream import RawEntry, ZipStream
+
+MAX_BATCH_ITEMS = 1000
+
+
+class TrackerSpec(BaseModel):
+    year: int
+    goals: Optional[Dict[str, int]] = None
+    label: Optional[str] = None
+    profile: str = DEFAULT_PROFILE
+
+    @field_validator('profile')
+    @classmethod
+    def known_profile(cls, profile):
+        if profile not in PROFILES:
+            raise ValueError(f"profile must be one of {', '.join(PROFILES)}")
+        return profile
+
+    @field_validator('goals')
+    @classmethod
+    def known_goals(cls, goals):
+        unknown = set(goals or ()) - set(DEFAULT_GOALS)
+        if unknown:
+            raise ValueError(f"unknown goals: {', '.join(sorted(unknown))}")
+        return goals
+
+    def cache_key(self) -> tuple:
+        return (self.year, goals_key(self.goals), self.profile, GENERATOR_VERSION)
+
+    def filename(self) -> str:
+        name = f"task_tracker_{self.year}"
+        if self.label:
+            name += "_" + re.sub(r'[^A-Za-z0-9_.-]+', '_', self.label)
+        return name + ".xlsx"
+
+
+def archive_names(items) -> list:
+    """
+    The zip member name of each item. Items with the same filename() but
+    different settings (goals, profile, ...) get a digest of their settings
+    added, so none of them is dropped; identical items share one name and
+    one copy of the workbook.
+    """
+    specs = {}
+    for item in items:
+        specs.setdefault(item.filename(), set()).add(item.model_dump_json())
+    names = []
+    for item in items:
+        name = item.filename()
+        if len(specs[name]) > 1:
+            stem, ext = posixpath.splitext(name)
+            digest = hashlib.sha256(item.model_dump_json().encode('utf-8')).hexdigest()
+            name = f"{stem}_{digest[:8]}{ext}"
+        names.append(name)
+    return names
+
+
+class BatchRequest(BaseModel):
+    items: List[TrackerSpec]
+
+    @field_validator('items')
+    @classmethod
+    def bounded(cls, items):
+        if not items:
+            raise ValueError("at least one item is required")
+        if len(items) > MAX_BATCH_ITEMS:
+            raise ValueError(f"at most {MAX_BATCH_ITEMS} items per batch")
+        return items
+
+
+def _timed_render(year: int, goals, profile, reproducible) -> tuple:
+    # Imported here so the web app only loads XlsxWriter when it generates
+    from app.template_engine import render_workbook
+
+    started = time.perf_counter()
+    data = render_workbook(year, goals, profile, reproducible)
+    return data, time.perf_counter() - started
+
+
+async def stream_batch(items, executor, cache, reproducible=False):
+    """
+    Yields a zip holding one workbook per item, followed by manifest.json.
+
+    Items with the same year and goals are generated once and written under
+    each of their names (see archive_names()). Workbooks go into the zip as
+    they finish, in completion order; a failed item is left out of the zip
+    and reported in the manifest together with every item's generation
+    time. Workbooks are rendered in the reproducible mode if `reproducible`
+    is set.
+    """
+    loop = asyncio.get_running_loop()
+    archive = ZipStream(level=0)
+    started = time.perf_counter()
+
+    names = archive_names(items)
+    groups = {}
+    for index, item in enumerate(items):
+        groups.setdefault(item.cache_key(), []).append((index, item))
+
+    manifest = [None] * len(items)
+    written = set()
+
+    def emit(key, data, seconds, cached, error=None):
+        for index, item in groups[key]:
+            filename = names[index]
+            manifest[index] = {
+                'label': item.label,
+                'year': item.year,
+                'file': None if error else filename,
+                'seconds': round(seconds, 4),
+                'cached': cached,
+                'error': error,
+            }
+            if error is None and filename not in written:
+                written.add(filename)
+                yield archive.add_raw(RawEntry.compress(filename, data, level=0))
+
+    pending = {}
+    for key, group in groups.items():
+        entry = cache.get(key)
+        if entry is not None:
+            for chunk in emit(key, entry.data, 0.0, True):
+                yield chunk
+            continue
+        item = group[0][1]
+        future = loop.run_in_executor(
+            executor, _timed_render, item.year, item.goals, item.profile,
+            reproducible,
+        )
+        pending[future] = key
+
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            key = pending.pop(future)
+            try:
+                data, seconds = future.result()
+            except Exception as exc:
+                chunks = emit(key, b'', 0.0, False, error=f"{type(exc).__name__}: {exc}")
+            else:
+                cache.put(key, data)
+                chunks = emit(key, data, seconds, False)
+            for chunk in chunks:
+                yield chunk
+
+    summary = {
+        'items': manifest,
+        'generated': len(groups),
+        'failed': sum(1 for item in manifest if item['error']),
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+    yield archive.add_raw(RawEntry.compress(
+        'manifest.json', json.dumps(summary, indent=2).encode('utf-8')
+    ))
+    yield archive.finish()
@@ -0,0 +1,285 @@
+# app/cache.py
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+
+class CachedWorkbook:
+    """A finished workbook held by the cache, with its strong ETag."""
+
+    __slots__ = ('data', 'etag')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.etag = '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+class WorkbookCache:
+    """
+    In-process LRU cache of generated workbooks (and other response
+    bodies, such as analysis results), bounded by total size.
+
+    Entries are evicted least-recently-used first once the stored bytes
+    exceed `max_bytes`. A single entry larger than the whole budget is
+    never stored.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, data: bytes) -> CachedWorkbook:
+        entry = CachedWorkbook(data)
+        if len(data) > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.data)
+            self._entries[key] = entry
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.data)
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class StoredArtifact(NamedTuple):
+    path: str
+    size: int
+    etag: str
+
+
+class ArtifactStore:
+    """
+    Finished workbooks on disk, keyed by their generation inputs, so that
+    every worker process sharing `root` shares one copy of each.
+
+    Files are written to a temporary name in `root` and renamed into place,
+    so a reader sees either the whole file or none. `root` is only created
+    by the first write, so opening a store touches no disk. ETags are the same
+    content hashes as CachedWorkbook's; each process hashes a file once
+    and remembers it for as long as the file's size and mtime are unchanged.
+
+    The files are bounded by `max_bytes` in total. Hits touch a file's mtime,
+    and after each write the least recently used files are deleted until
+    the rest fit; a file larger than the whole budget is not kept.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024,
+                 suffix: str = '.xlsx'):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._etags = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def path(self, key) -> str:
+        name = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.root, name + self.suffix)
+
+    def _etag(self, path: str, stat: os.stat_result) -> str:
+        version = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            known = self._etags.get(path)
+        if known is not None and known[0] == version:
+            return known[1]
+        with open(path, 'rb') as fh:
+            etag = CachedWorkbook(fh.read()).etag
+        with self._lock:
+            self._etags[path] = (version, etag)
+        return etag
+
+    def get(self, key) -> Optional[StoredArtifact]:
+        path = self.path(key)
+        try:
+            stat = os.stat(path)
+            etag = self._etag(path, stat)
+            # Marks the file as recently used for eviction
+            used = time.time_ns()
+            os.utime(path, ns=(stat.st_atime_ns, used))
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self._etags[path] = ((stat.st_size, used), etag)
+            self.hits += 1
+        return StoredArtifact(path, stat.st_size, etag)
+
+    def contains(self, key) -> bool:
+        return os.path.exists(self.path(key))
+
+    def open(self, key) -> 'ArtifactWriter':
+        """Starts writing the file for `key` a chunk at a time."""
+        os.makedirs(self.root, exist_ok=True)
+        return ArtifactWriter(self, key)
+
+    def put(self, key, data: bytes) -> StoredArtifact:
+        writer = self.open(key)
+        try:
+            writer.write(data)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def _stored(self, path: str, etag: str) -> StoredArtifact:
+        stat = os.stat(path)
+        with self._lock:
+            self.writes += 1
+            if stat.st_size <= self.max_bytes:
+                self._etags[path] = ((stat.st_size, stat.st_mtime_ns), etag)
+        if stat.st_size > self.max_bytes:
+            os.unlink(path)
+        else:
+            self._evict()
+        return StoredArtifact(path, stat.st_size, etag)
+
+    def _evict(self):
+        """Deletes the least recently used files until the rest fit."""
+        files = []
+        for entry in self._files():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in sorted(files):
+            if size <= self.max_bytes:
+                break
+            size -= file_size
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # Another worker evicted it first
+                continue
+            with self._lock:
+                self._etags.pop(path, None)
+                self.evictions += 1
+
+    def _files(self) -> list:
+        try:
+            with os.scandir(self.root) as entries:
+                return [entry for entry in entries if entry.name.endswith(self.suffix)]
+        except FileNotFoundError:
+            return []
+
+    def clear(self):
+        for entry in self._files():
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._etags.clear()
+
+    def stats(self) -> dict:
+        files = self._files()
+        with self._lock:
+            return {
+                'root': self.root,
+                'entries': len(files),
+                'bytes': sum(entry.stat().st_size for entry in files),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions,
+            }
+
+
+class ArtifactWriter:
+    """
+    A file being added to an ArtifactStore. Chunks go to a temporary file
+    and into the ETag's hash as they are written; nothing is visible under
+    the key until commit() renames the finished file into place.
+    """
+
+    def __init__(self, store: ArtifactStore, key):
+        self._store = store
+        self._path = store.path(key)
+        fd, self._partial = tempfile.mkstemp(dir=store.root, suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb')
+        self._hash = hashlib.sha256()
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self._hash.update(chunk)
+
+    def commit(self) -> StoredArtifact:
+        try:
+            self._file.close()
+            os.replace(self._partial, self._path)
+        except BaseException:
+            self.abort()
+            raise
+        return self._store._stored(self._path, '"' + self._hash.hexdigest()[:32] + '"')
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.unlink(self._partial)
+        except FileNotFoundError:
+            pass
+
+
+def content_key(data: bytes) -> str:
+    """Cache key for results derived purely from an uploaded file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,99 @@
+# app/calendar_index.py
+"""
+One precomputed calendar per year, shared by the sheet and report builders.
+
+calendar_index(year) holds every day of the year with its month sheet, the
+row it takes on a blank tracker, its weekday name, its week number and its
+Excel serial, plus the day and row spans of each month and each week. It is
+computed once per year and cached, so builders never redo date arithmetic
+or weekday formatting, and the week-to-row mapping has a single definition.
+"""
+import calendar
+from datetime import date
+from functools import lru_cache
+from typing import Dict, NamedTuple, Tuple
+
+from app.layout import FIRST_DATA_ROW
+
+# Excel's 1900 date system; serials are exact from March 1900 onwards
+_EXCEL_EPOCH = date(1899, 12, 30).toordinal()
+
+# Weeks listed by the Weekly Report; the last day or two of a year fall in
+# a 53rd week that has no report row
+REPORT_WEEKS = 52
+
+
+class Day(NamedTuple):
+    date: date
+    month: int
+    sheet: str
+    # Zero-based worksheet row on a blank tracker (one row per day)
+    row: int
+    weekday: str
+    # Week 1 starts on 1 January, whatever its weekday
+    week: int
+    serial: int
+
+
+class Month(NamedTuple):
+    month: int
+    sheet: str
+    days: Tuple[Day, ...]
+    # Zero-based first and last data rows on a blank tracker
+    first_row: int
+    last_row: int
+
+
+class CalendarIndex(NamedTuple):
+    year: int
+    days: Tuple[Day, ...]
+    # January first
+    months: Tuple[Month, ...]
+    by_date: Dict[date, Day]
+    # Months each week's days fall in, in order
+    week_months: Dict[int, Tuple[int, ...]]
+    # (sheet, first row, last row) of each week on a blank tracker
+    week_rows: Dict[int, Tuple[Tuple[str, int, int], ...]]
+
+
+@lru_cache(maxsize=256)
+def calendar_index(year: int) -> CalendarIndex:
+    days, months = [], []
+    week_rows = {}
+    first = date(year, 1, 1).toordinal()
+    week_names = [calendar.day_name[i] for i in range(7)]
+    for month in range(1, 13):
+        sheet = calendar.month_name[month]
+        month_days = []
+        for n in range(calendar.monthrange(year, month)[1]):
+            current = date.fromordinal(first + len(days))
+            week = len(days) // 7 + 1
+            row = FIRST_DATA_ROW + n
+            day = Day(
+                current, month, sheet, row, week_names[current.weekday()],
+                week, current.toordinal() - _EXCEL_EPOCH,
+            )
+            month_days.append(day)
+            days.append(day)
+            spans = week_rows.setdefault(week, [])
+            if spans and spans[-1][0] == sheet:
+                spans[-1] = (sheet, spans[-1][1], row)
+            else:
+                spans.append((sheet, row, row))
+        months.append(Month(
+            month, sheet, tuple(month_days),
+            FIRST_DATA_ROW, FIRST_DATA_ROW + len(month_days) - 1,
+        ))
+    week_months = {}
+    for day in days:
+        found = week_months.setdefault(day.week, [])
+        if not found or found[-1] != day.month:
+            found.append(day.month)
+    return CalendarIndex(
+        year=year,
+        days=tuple(days),
+        months=tuple(months),
+        by_date={day.date: day for day in days},
+        week_months={w: tuple(m) for w, m in week_months.items()},
+        week_rows={w: tuple(spans) for w, spans in week_rows.items()},
+    )
@@ -0,0 +1,288 @@
+# app/cli.py
+"""
+Command-line generation of task trackers.
+
+    python -m app.cli 2025                     # task_tracker_2025.xlsx
+    python -m app.cli 2025-2030,2040 --goal weekly=25 --out-dir trackers
+    python -m app.cli 2000-2099 --user alice --user bob --jobs 8 --skip-unchanged
+    python -m app.cli 2024-2026 --span          # task_tracker_2024-2026.xlsx
+
+Every (year, user) pair is one workbook, written by generate_task_tracker()
+in a process pool. With --task-db each user's stored tasks pre-fill their
+trackers; without it users only label the file names, as in /batch. With
+--span the years, which must be consecutive, go into one workbook per user.
+
+Files are written under a temporary name and renamed when complete. A
+manifest in the output directory records a digest of each file's inputs
+(year, goals, profile, layout, generator version and, with --task-db, the
+user's tasks for the year); with --skip-unchanged, files whose digest has not
+changed since they were written are not generated again. With
+--reproducible the files are byte-identical from run to run and machine to
+machine, so they can be checked in or compared by hash.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple, Optional
+
+from pydantic import ValidationError
+
+from app.batch import TrackerSpec
+from app.layout import (
+    DEFAULT_GOALS, DEFAULT_LAYOUT_MODE, DEFAULT_PROFILE, LAYOUT_MODES, PROFILES,
+)
+
+MANIFEST = ".task_tracker_manifest.json"
+
+
+class Job(NamedTuple):
+    spec: TrackerSpec
+    path: str
+    user: Optional[str]
+    task_db: Optional[str]
+    layout_mode: str = DEFAULT_LAYOUT_MODE
+    rows_per_day: int = 1
+    reproducible: bool = False
+    # Last year of a tracker spanning several years
+    end_year: Optional[int] = None
+
+
+def parse_years(text: str) -> list:
+    """'2025', '2025-2030' and comma-separated lists of both, in order."""
+    years = []
+    for part in text.split(','):
+        first, _, last = part.strip().partition('-')
+        try:
+            first = int(first)
+            last = int(last) if last else first
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"not a year or year range: {part!r}")
+        if last < first:
+            raise argparse.ArgumentTypeError(f"empty year range: {part!r}")
+        years.extend(y for y in range(first, last + 1) if y not in years)
+    return years
+
+
+def parse_goal(text: str) -> tuple:
+    """'weekly=25' as ('weekly', 25)."""
+    key, _, value = text.partition('=')
+    if key not in DEFAULT_GOALS or not value.strip().isdigit():
+        raise argparse.ArgumentTypeError(
+            f"expected <goal>=<count> with a goal of {', '.join(DEFAULT_GOALS)}"
+        )
+    return key, int(value)
+
+
+def tasks_digest(task_db: str, user: str, year: int) -> str:
+    from app.task_store import open_store
+
+    digest = hashlib.sha256()
+    for task in open_store(task_db).iter_year(user, year):
+        digest.update(json.dumps(task, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def inputs_digest(job: Job) -> str:
+    """Changes whenever the workbook `job` writes could change."""
+    key = list(job.spec.cache_key()) + [
+        job.layout_mode, job.rows_per_day, job.reproducible, job.end_year,
+    ]
+    if job.task_db and job.user:
+        for year in job_years(job):
+            key.append(tasks_digest(job.task_db, job.user, year))
+    return hashlib.sha256(json.dumps(key, default=str).encode('utf-8')).hexdigest()
+
+
+def job_years(job: Job) -> range:
+    return range(job.spec.year, (job.end_year or job.spec.year) + 1)
+
+
+def build(job: Job) -> float:
+    """Writes one workbook; returns the seconds it took."""
+    from app.excel_generator import generate_task_tracker
+
+    started = time.perf_counter()
+    tasks = None
+    if job.task_db and job.user:
+        from app.task_store import open_store
+        store = open_store(job.task_db)
+        tasks = itertools.chain.from_iterable(
+            store.iter_year(job.user, year) for year in job_years(job)
+        )
+    partial = f"{job.path}.{os.getpid()}.tmp"
+    try:
+        generate_task_tracker(
+            job.spec.year, partial, job.spec.goals, tasks, profile=job.spec.profile,
+            layout_mode=job.layout_mode, rows_per_day=job.rows_per_day,
+            reproducible=job.reproducible, end_year=job.end_year,
+        )
+        os.replace(partial, job.path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return time.perf_counter() - started
+
+
+def _load_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir: str, manifest: dict):
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "w") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+class Progress:
+    """One status line per finished file, redrawn in place on a terminal."""
+
+    def __init__(self, total: int, stream=sys.stderr, quiet=False):
+        self.total, self.done, self.stream, self.quiet = total, 0, stream, quiet
+        self.inline = stream.isatty()
+
+    def update(self, name: str, note: str):
+        self.done += 1
+        if self.quiet:
+            return
+        line = f"[{self.done:>{len(str(self.total))}}/{self.total}] {name} {note}"
+        if self.inline:
+            self.stream.write(f"\r\033[K{line}")
+            if self.done == self.total:
+                self.stream.write("\n")
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli", description="Generate Excel task trackers."
+    )
+    parser.add_argument("years", type=parse_years,
+                        help="years to generate, e.g. 2025, 2025-2030 or 2024,2026-2027")
+    parser.add_argument("--goal", type=parse_goal, action="append", default=[],
+                        metavar="NAME=COUNT",
+                        help=f"override a goal ({', '.join(DEFAULT_GOALS)}); repeatable")
+    parser.add_argument("--user", action="append", default=[],
+                        help="generate a tracker per user as well as per year; repeatable")
+    parser.add_argument("--task-db", help="pre-fill each user's trackers from this task store")
+    parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument("--layout", choices=LAYOUT_MODES, default=DEFAULT_LAYOUT_MODE,
+                        help="a sheet per month, or the whole year in one Excel Table")
+    parser.add_argument("--rows-per-day", type=int, default=1, metavar="N",
+                        help="rows given to each day, blank where it has fewer tasks")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="pin timestamps so the same inputs give byte-identical files")
+    parser.add_argument("--span", action="store_true",
+                        help="one workbook covering all the years, with a summary across them")
+    parser.add_argument("--out-dir", default=".", help="directory to write into")
+    parser.add_argument("-o", "--output",
+                        help="file name to use when exactly one tracker is generated")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="skip files whose inputs are unchanged since the last run")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress output")
+    return parser
+
+
+def plan_jobs(args, parser) -> list:
+    goals = dict(args.goal) or None
+    if args.rows_per_day < 1:
+        parser.error("--rows-per-day must be at least 1")
+    end_year = None
+    years = args.years
+    if args.span:
+        years = [args.years[0]]
+        end_year = args.years[-1]
+        if args.years != list(range(years[0], end_year + 1)):
+            parser.error("--span needs consecutive years, e.g. 2024-2026")
+    jobs = []
+    for year in years:
+        for user in args.user or [None]:
+            try:
+                spec = TrackerSpec(year=year, goals=goals, label=user, profile=args.profile)
+            except ValidationError as exc:
+                parser.error(str(exc))
+            filename = spec.filename()
+            if end_year is not None and end_year != year:
+                filename = filename.replace(f"_{year}", f"_{year}-{end_year}", 1)
+            jobs.append(Job(spec, os.path.join(args.out_dir, filename),
+                            user, args.task_db, args.layout, args.rows_per_day,
+                            args.reproducible, end_year))
+    if args.output:
+        if len(jobs) != 1:
+            parser.error("--output needs exactly one year and at most one user")
+        jobs[0] = jobs[0]._replace(path=os.path.join(args.out_dir, args.output))
+    return jobs
+
+
+def main(argv=None) -> int:
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if args.task_db and not args.user:
+        parser.error("--task-db needs at least one --user")
+    os.makedirs(args.out_dir, exist_ok=True)
+    jobs = plan_jobs(args, parser)
+    started = time.perf_counter()
+
+    # Every run records its digests, so the next one can skip unchanged files
+    manifest = _load_manifest(args.out_dir)
+    digests = {}
+    progress = Progress(len(jobs), quiet=args.quiet)
+    todo = []
+    for job in jobs:
+        name = os.path.basename(job.path)
+        digests[name] = inputs_digest(job)
+        if (args.skip_unchanged and manifest.get(name) == digests[name]
+                and os.path.exists(job.path)):
+            progress.update(name, "unchanged")
+            continue
+        todo.append(job)
+
+    failed = 0
+
+    def finished(job, future_result):
+        nonlocal failed
+        name = os.path.basename(job.path)
+        try:
+            seconds = future_result()
+        except Exception as exc:
+            failed += 1
+            manifest.pop(name, None)
+            progress.update(name, f"failed: {type(exc).__name__}: {exc}")
+        else:
+            manifest[name] = digests[name]
+            progress.update(name, f"{seconds:.2f}s")
+
+    if args.jobs <= 1 or len(todo) <= 1:
+        for job in todo:
+            finished(job, lambda: build(job))
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = {executor.submit(build, job): job for job in todo}
+            for future in as_completed(futures):
+                finished(futures[future], future.result)
+
+    _save_manifest(args.out_dir, manifest)
+    if not args.quiet:
+        print(
+            f"{len(todo) - failed} generated, {len(jobs) - len(todo)} unchanged, "
+            f"{failed} failed in {time.perf_counter() - started:.1f}s",
+            file=sys.stderr,
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
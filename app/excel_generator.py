@@ -1,306 +1,564 @@
 # app/excel_generator.py
+import os
 import xlsxwriter
-import calendar
-from datetime import date, timedelta
+import time
+from datetime import datetime, timezone
 from io import BytesIO
 
-def generate_task_tracker(year: int, output):
+from app import layout
+from app.calendar_index import REPORT_WEEKS, calendar_index
+from app.formula_eval import FormulaGrid
+from app.layout import (  # noqa: F401 (re-exported)
+    DEFAULT_GOALS, GENERATOR_VERSION, PLAN, TASK_FIELDS, bind_goals, col_letter,
+    get_profile, goals_key, task_date,
+)
+from app.profiles import apply_profile, needs_repack
+from app.zipstream import normalize_zip
+
+# Last zero-based row index Excel allows on a sheet
+MAX_ROW = 1048575
+
+# Creation time of reproducible builds when SOURCE_DATE_EPOCH is not set:
+# the date every zip entry carries
+REPRODUCIBLE_EPOCH = datetime(1980, 1, 1, tzinfo=timezone.utc)
+
+# Goals, the month sheets and the reports, as counted by `progress`
+SHEET_COUNT = 1 + 12 + len(PLAN.reports)
+# The same in the 'table' layout mode, with one task sheet
+TABLE_SHEET_COUNT = 1 + 1 + len(PLAN.reports)
+# Reports written once per year, and the summaries written once per tracker
+_YEAR_REPORTS = sum(1 for report in PLAN.reports if not report.subtotal_of)
+_SUMMARY_REPORTS = len(PLAN.reports) - _YEAR_REPORTS
+
+
+def created_time(reproducible=False) -> datetime:
+    """
+    The creation time written into a workbook's document properties: now,
+    or for reproducible builds SOURCE_DATE_EPOCH (seconds since 1970, the
+    usual convention for reproducible builds) or else REPRODUCIBLE_EPOCH.
+    """
+    if not reproducible:
+        return datetime.now(timezone.utc)
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), timezone.utc)
+    return REPRODUCIBLE_EPOCH
+
+
+class PhaseTimer:
+    """Adds the time since the previous mark to `phases[name]`, if given."""
+
+    def __init__(self, phases=None):
+        self.phases = phases
+        self.last = time.perf_counter()
+
+    def mark(self, name: str):
+        if self.phases is None:
+            return
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self.last
+        self.last = now
+
+    def restart(self):
+        """Starts the next phase now, leaving out the time since the last mark."""
+        self.last = time.perf_counter()
+
+
+# Phase name recorded after each report sheet
+_REPORT_PHASES = {'week': 'weekly', 'month': 'monthly', 'year': 'yearly'}
+
+
+def generate_task_tracker(year: int, output, goals=None, tasks=None,
+                          constant_memory=False, phases=None, profile=None,
+                          progress=None, layout_mode=None, rows_per_day=1,
+                          reproducible=False, end_year=None):
     """
     Writes the task tracker for `year` into:
       - a filename (str), or
       - an in-memory BytesIO buffer.
+
+    `goals` overrides any of the DEFAULT_GOALS keys.
+
+    `tasks` optionally pre-fills the month sheets from task records: dicts
+    with a `date` (date or ISO string) and any of the TASK_FIELDS keys, in
+    date order. Each task gets its own row; days without tasks keep one
+    blank row.
+
+    The layout comes from app.layout.PLAN, compiled once at import; only
+    the year, goals and tasks are bound here.
+
+    With `constant_memory`, rows are flushed to temporary files as soon as
+    they are complete, so memory use does not grow with the number of
+    tasks. Every sheet is already written strictly top to bottom, as that
+    mode requires. Formula results are not computed in this mode, as that
+    would mean keeping every task in memory; the workbook is flagged for a
+    full recalculation on open instead.
+
+    `profile` names one of app.layout.PROFILES: 'fast' drops the styling
+    and the computed formula results and compresses lightly, 'compact'
+    compresses hardest, writes repeated formulas as shared formulas, sets
+    the month-sheet borders on whole columns instead of writing blank
+    cells.
+
+    If `phases` is a dict, the seconds spent in each phase (formats,
+    goals, months, weekly, monthly, yearly, close, then profile or, for
+    reproducible builds, rewrite) are added to it.
+
+    `progress`, if given, is called as progress(sheet name, sheets done,
+    sheets in total) after each sheet is written. One year has SHEET_COUNT
+    sheets, or TABLE_SHEET_COUNT in the table layout.
+
+    `layout_mode` is one of app.layout.LAYOUT_MODES. 'months' (the default)
+    gives each month its own sheet. 'table' puts the whole year on a single
+    Tasks sheet, as one Excel Table with a calculated Week No column, and
+    the reports read whole table columns, so rows the user inserts or adds
+    are counted without editing any formula. Tables cannot be written in
+    `constant_memory` mode. In either mode every day gets at least
+    `rows_per_day` rows, blank where it has fewer tasks.
+
+    With `end_year`, the tracker spans `year` to `end_year`. Each year gets
+    its own month sheets (or task table) and Weekly and Monthly Reports,
+    named with the year, e.g. 'March 2026' and 'Monthly Report 2026', and
+    `tasks` may cover the whole span. The Yearly Report has a row per year,
+    summing that year's Monthly Report, and a total row.
+
+    With `reproducible`, the output bytes depend on nothing but the
+    arguments: the document's created and modified times are pinned (see
+    created_time()) and the zip is rewritten with fixed entry headers in
+    XlsxWriter's part order, whether it was written in memory, to a file or
+    in `constant_memory` mode.
     """
+    layout_mode = layout_mode or layout.DEFAULT_LAYOUT_MODE
+    if layout_mode not in layout.LAYOUT_MODES:
+        raise ValueError(
+            f"unknown layout mode {layout_mode!r}; expected one of "
+            f"{', '.join(layout.LAYOUT_MODES)}"
+        )
+    table = layout_mode == 'table'
+    if table and constant_memory:
+        raise ValueError("the table layout cannot be written in constant_memory mode")
+    if rows_per_day < 1:
+        raise ValueError("rows_per_day must be at least 1")
+    end_year = year if end_year is None else end_year
+    if end_year < year:
+        raise ValueError(f"end_year {end_year} is before year {year}")
+    years = range(year, end_year + 1)
+    multi = len(years) > 1
+    # The span in titles and messages
+    period = layout.YEAR_SPAN.format(first=year, last=end_year) if multi else year
+
+    def named(sheet, sheet_year):
+        """A per-year sheet's name, with the year if there are several."""
+        return layout.YEAR_SHEET.format(sheet=sheet, year=sheet_year) if multi else sheet
+
+    def named_table(table_year):
+        if multi:
+            return layout.YEAR_TABLE.format(table=layout.TABLE_NAME, year=table_year)
+        return layout.TABLE_NAME
+
+    sheet_count = (
+        1 + len(years) * ((1 if table else 12) + _YEAR_REPORTS) + _SUMMARY_REPORTS
+    )
+    timer = PhaseTimer(phases)
+    sheets_done = 0
+
+    def sheet_written(name):
+        nonlocal sheets_done
+        sheets_done += 1
+        if progress is not None:
+            progress(name, sheets_done, sheet_count)
+
+    profile = get_profile(profile)
+    # Blank month-sheet cells are left out and take their column's format
+    lean = profile.styled and profile.column_formats
+    evaluate = profile.evaluate and not constant_memory
     # Determine if writing in-memory or to disk path
-    in_memory = not isinstance(output, str)
-    options = {'in_memory': True} if in_memory else {}
+    in_memory = not isinstance(output, str) and not constant_memory
+    if constant_memory:
+        options = {'constant_memory': True}
+    else:
+        options = {'in_memory': True} if in_memory else {}
 
     # Create workbook
     workbook = xlsxwriter.Workbook(output, options)
+    if reproducible:
+        workbook.set_properties({'created': created_time(reproducible)})
+    if evaluate:
+        # Every formula below is stored with its computed result, so there
+        # is no need to force a full recalculation when the file is opened.
+        workbook.calc_on_load = False
+        workbook.set_calc_mode('auto', calc_id=191029)
+
+    # Values visible to formulas, to compute those results in Python
+    grid = FormulaGrid() if evaluate else None
+
+    def write_formula(sheet, row, col, formula, fmt):
+        if grid is None:
+            sheet.write_formula(row, col, formula, fmt)
+            return
+        value = grid.evaluate(formula, sheet.name)
+        grid.set(sheet.name, row, col, value)
+        sheet.write_formula(row, col, formula, fmt, value)
+
+    def record(sheet_name, row, col, value):
+        if grid is not None:
+            grid.set(sheet_name, row, col, value)
 
-    # ===== User-defined Goals =====
-    WEEKLY_GOAL = 20
-    MONTHLY_GOAL = 80
-    YEARLY_GOAL = 1000
-    DAILY_GOAL = int(WEEKLY_GOAL / 7)
-
-    # ===== Formats =====
-    title_format = workbook.add_format({
-        'bold': True,
-        'font_size': 16,
-        'align': 'left',
-        'valign': 'vcenter',
-        'font_color': '#0B5394'
-    })
-    header_format = workbook.add_format({
-        'bold': True, 'font_color': 'white', 'bg_color': '#0B5394',
-        'align': 'center', 'valign': 'vcenter', 'border': 1
-    })
-    date_format = workbook.add_format({
-        'num_format': 'dd-mm-yyyy', 'border': 1, 'align': 'center'
-    })
-    centered_format = workbook.add_format({'border': 1, 'align': 'center'})
-    done_fmt = workbook.add_format({'bg_color': '#C6EFCE', 'font_color': '#006100'})
-    pend_fmt = workbook.add_format({'bg_color': '#FFEB9C', 'font_color': '#9C6500'})
-    skip_fmt = workbook.add_format({'bg_color': '#FFC7CE', 'font_color': '#9C0006'})
-    high_fmt = workbook.add_format({'bg_color': '#FFCDD2'})
-    medium_fmt = workbook.add_format({'bg_color': '#FFF9C4'})
-    low_fmt = workbook.add_format({'bg_color': '#C8E6C9'})
-    time_format = workbook.add_format({
-        'num_format': '0.00', 'border': 1, 'align': 'center'
-    })
-    percent_format = workbook.add_format({
-        'num_format': '0.0%', 'border': 1, 'align': 'center'
-    })
-    cell_format = workbook.add_format({'border': 1, 'align': 'center'})
+    goal_values = bind_goals(goals)
+    if profile.styled:
+        fmt = {name: workbook.add_format(props) for name, props in PLAN.formats}
+    else:
+        fmt = dict.fromkeys(name for name, _ in PLAN.formats)
+    timer.mark('formats')
 
     # ===== Goals Sheet =====
-    goals = workbook.add_worksheet("Goals")
-    goals.merge_range('A1:B1', f'Goals Overview {year}', title_format)
-    goals.write_row(2, 0, ["Goal (Tasks)", "Value"], header_format)
-    goals.write(3, 0, "Daily"); goals.write_number(3, 1, DAILY_GOAL)
-    goals.write(4, 0, "Weekly"); goals.write_number(4, 1, WEEKLY_GOAL)
-    goals.write(5, 0, "Monthly"); goals.write_number(5, 1, MONTHLY_GOAL)
-    goals.write(6, 0, "Yearly"); goals.write_number(6, 1, YEARLY_GOAL)
-    goals.write(7, 0, "Unit"); goals.write(7, 1, "Tasks")
-    goals.set_column(0, 0, 20)
-    goals.set_column(1, 1, 12)
-
-    # ===== Monthly Sheets =====
-    task_headers = [
-        "Date", "Day", "Daily Goal", "Task Description", "Priority", "Status",
-        "Hours Spent", "What Went Well", "What I Missed", "Notes"
+    sheet = workbook.add_worksheet(layout.GOALS_SHEET)
+    sheet.merge_range('A1:B1', layout.GOALS_TITLE.format(year=period), fmt['title'])
+    sheet.write_row(2, 0, layout.GOALS_HEADERS, fmt['header'])
+    for row, (label, key) in enumerate(layout.GOAL_ROWS, start=3):
+        sheet.write(row, 0, label)
+        sheet.write_number(row, 1, goal_values[key])
+        record(sheet.name, row, 1, goal_values[key])
+    sheet.write(7, 0, "Unit"); sheet.write(7, 1, "Tasks")
+    for col, width in enumerate(layout.GOALS_WIDTHS):
+        sheet.set_column(col, col, width)
+    timer.mark('goals')
+    sheet_written(sheet.name)
+
+    # ===== Monthly Sheets (or the task table) =====
+    cols = PLAN.month_cols
+    date_col, day_col, week_col = cols['date'], cols['weekday'], cols['week']
+    task_cells = [
+        (col, field, kind, fmt[fmt_name])
+        for col, field, kind, fmt_name in PLAN.task_cells
+    ]
+    # A table writes its formula columns itself, once all rows are known
+    row_formulas = [
+        (col, formula, fmt[fmt_name])
+        for col, formula, fmt_name in (PLAN.table_formulas if table else PLAN.row_formulas)
+    ]
+    date_letter = col_letter(date_col)
+    date_fmt, day_fmt, week_fmt = (
+        fmt[layout.MONTH_COLUMNS[c].fmt] for c in (date_col, day_col, week_col)
+    )
+
+    column_fmts = [
+        fmt[column.fmt] if lean else None for column in layout.MONTH_COLUMNS
     ]
-    col_widths = [15, 15, 12, 30, 12, 15, 12, 25, 25, 30]
-    priority_list = ['High', 'Medium', 'Low']
-    status_list = ['Pending', 'Done', 'Skipped']
 
-    for month in range(1, 13):
-        name = calendar.month_name[month]
+    task_iter = iter(tasks or ())
+    next_task = next(task_iter, None)
+    # Per year: its calendar, the task table's name, and the last worksheet
+    # row (1-based) holding data of each month sheet
+    year_sheets = {}
+
+    for current_year in years:
+        index = calendar_index(current_year)
+        table_name = named_table(current_year)
+        month_last_row = {}
+        year_sheets[current_year] = (index, table_name, month_last_row)
+        # (row, week) of each table row, for the Week No results
+        table_weeks = []
+
+        if table:
+            groups = [(
+                named(layout.TABLE_SHEET, current_year),
+                layout.TABLE_TITLE.format(year=current_year), index.days,
+            )]
+        else:
+            groups = [
+                (named(month.sheet, current_year),
+                 layout.MONTH_TITLE.format(month=month.sheet, year=current_year), month.days)
+                for month in index.months
+            ]
+
+        for name, title, days in groups:
+            sheet = workbook.add_worksheet(name)
+            sheet.merge_range(
+                0, 0, 0, len(PLAN.month_headers)-1, title, fmt['title']
+            )
+            if not table:
+                sheet.write_row(1, 0, PLAN.month_headers, fmt['header'])
+            for col, width in enumerate(PLAN.month_widths):
+                sheet.set_column(col, col, width, column_fmts[col])
+
+            def write_task_row(row, day, task):
+                if row > MAX_ROW:
+                    raise ValueError(f"too many tasks for one sheet in {name}")
+                sheet.write_datetime(row, date_col, day.date, date_fmt)
+                if table:
+                    # Reports select table rows by date
+                    record(name, row, date_col, day.serial)
+                sheet.write(row, day_col, day.weekday, day_fmt)
+                if not table:
+                    for col, formula, cell_fmt in row_formulas:
+                        write_formula(sheet, row, col, formula, cell_fmt)
+                for col, field, kind, cell_fmt in task_cells:
+                    value = None if task is None else task.get(field)
+                    if value is None or value == '':
+                        if not lean:
+                            sheet.write_blank(row, col, None, cell_fmt)
+                        continue
+                    if kind == 'number':
+                        sheet.write_number(row, col, value, cell_fmt)
+                    else:
+                        sheet.write_string(row, col, str(value), cell_fmt)
+                    record(name, row, col, value)
+                if table:
+                    # A calculated column, written with the table
+                    table_weeks.append((row, day.week))
+                else:
+                    # Its result is the calendar's week, so no evaluation
+                    sheet.write_formula(
+                        row, week_col,
+                        layout.WEEK_FORMULA.format(date=f'{date_letter}{row + 1}'),
+                        week_fmt, day.week,
+                    )
+                record(name, row, week_col, day.week)
+
+            row = layout.FIRST_DATA_ROW
+            for day in days:
+                current = day.date
+                # Tasks are written as they arrive, never buffered
+                first_row = row
+                while next_task is not None and task_date(next_task) == current:
+                    write_task_row(row, day, next_task)
+                    row += 1
+                    next_task = next(task_iter, None)
+                if next_task is not None and task_date(next_task) < current:
+                    raise ValueError(
+                        f"tasks must be in date order and within {period}: "
+                        f"{task_date(next_task)} came after {current}"
+                    )
+                while row - first_row < rows_per_day:
+                    write_task_row(row, day, None)
+                    row += 1
+            last_row = row
+            if table:
+                formulas = {col: formula for col, formula, _ in PLAN.table_formulas}
+                week_formula = PLAN.table_week_formula.replace(
+                    layout.TABLE_NAME + '[', table_name + '['
+                )
+                formulas[week_col] = week_formula
+                columns = [
+                    {
+                        'header': column.header,
+                        'header_format': fmt['header'],
+                        'format': fmt[column.fmt],
+                        'formula': formulas.get(col),
+                    }
+                    for col, column in enumerate(layout.MONTH_COLUMNS)
+                ]
+                sheet.add_table(
+                    layout.FIRST_DATA_ROW - 1, 0, last_row - 1, len(columns) - 1,
+                    {
+                        'name': table_name,
+                        'style': layout.TABLE_STYLE if profile.styled else None,
+                        'columns': columns,
+                    },
+                )
+                if grid is not None:
+                    # The table writes its formulas without results; write
+                    # them again with their values. They are anchored, so
+                    # one value holds for every row.
+                    for col, formula, cell_fmt in row_formulas:
+                        value = grid.evaluate(formula, name)
+                        for r in range(layout.FIRST_DATA_ROW, last_row):
+                            sheet.write_formula(r, col, formula, cell_fmt, value)
+                    # Week No is each row's calendar week
+                    for r, week in table_weeks:
+                        sheet.write_formula(r, week_col, week_formula, week_fmt, week)
+                    grid.add_table(
+                        table_name, name, layout.FIRST_DATA_ROW, last_row - 1,
+                        PLAN.month_headers,
+                    )
+            else:
+                month_last_row[days[0].month] = last_row
+            if profile.styled:
+                for span, options in PLAN.validations:
+                    sheet.data_validation(span.format(last=last_row), dict(options))
+                for span, options, fmt_name in PLAN.month_rules:
+                    sheet.conditional_format(
+                        span.format(last=last_row), dict(options, format=fmt[fmt_name])
+                    )
+            sheet_written(name)
+
+    if next_task is not None:
+        raise ValueError(f"task dated {task_date(next_task)} is not in {period}")
+    timer.mark('months')
+
+    # ===== Reports =====
+    def write_report(name, report, title, rows, formulas):
+        """
+        Writes a report sheet with a row per (key, scope) in `rows`;
+        formulas(scope, key_ref) gives the (column, formula, format name)
+        of the row's measures and goal.
+        """
         sheet = workbook.add_worksheet(name)
-        days = calendar.monthrange(year, month)[1]
         sheet.merge_range(
-            0, 0, 0, len(task_headers)-1,
-            f'{name} {year} Daily Tasks', title_format
-        )
-        sheet.write_row(1, 0, task_headers, header_format)
-        for col, width in enumerate(col_widths):
-            sheet.set_column(col, col, width)
-        for day in range(1, days+1):
-            current = date(year, month, day)
-            sheet.write_datetime(day+1, 0, current, date_format)
-            sheet.write(day+1, 1, current.strftime('%A'), centered_format)
-            sheet.write_formula(day+1, 2, '=Goals!B4', centered_format)
-            for col in range(3, len(task_headers)):
-                fmt = time_format if col == 6 else centered_format
-                sheet.write(day+1, col, None, fmt)
-        sheet.data_validation(
-            f'E3:E{days+2}',
-            {'validate': 'list', 'source': priority_list}
-        )
-        sheet.data_validation(
-            f'F3:F{days+2}',
-            {'validate': 'list', 'source': status_list}
-        )
-        sheet.conditional_format(
-            f'E3:E{days+2}',
-            {'type': 'text', 'criteria': 'containing', 'value': 'High', 'format': high_fmt}
-        )
-        sheet.conditional_format(
-            f'E3:E{days+2}',
-            {'type': 'text', 'criteria': 'containing', 'value': 'Medium', 'format': medium_fmt}
-        )
-        sheet.conditional_format(
-            f'E3:E{days+2}',
-            {'type': 'text', 'criteria': 'containing', 'value': 'Low', 'format': low_fmt}
-        )
-        sheet.conditional_format(
-            f'F3:F{days+2}',
-            {'type': 'text', 'criteria': 'containing', 'value': 'Done', 'format': done_fmt}
-        )
-        sheet.conditional_format(
-            f'F3:F{days+2}',
-            {'type': 'text', 'criteria': 'containing', 'value': 'Pending', 'format': pend_fmt}
-        )
-        sheet.conditional_format(
-            f'F3:F{days+2}',
-            {'type': 'text', 'criteria': 'containing', 'value': 'Skipped', 'format': skip_fmt}
+            0, 0, 0, len(report.headers)-1, title, fmt['title']
         )
+        sheet.write_row(1, 0, report.headers, fmt['header'])
+        sheet.set_column(0, len(report.headers)-1, layout.REPORT_WIDTH)
 
-    # ===== Weekly Report =====
-    weekly = workbook.add_worksheet("Weekly Report")
-    weekly_headers = [
-        "Week No", "Total Tasks", "Done", "Pending", "Skipped",
-        "Total Hours", "Goal", "% Complete"
-    ]
-    weekly.merge_range(
-        0, 0, 0, len(weekly_headers)-1,
-        f'Weekly Task Report {year}', title_format
-    )
-    weekly.write_row(1, 0, weekly_headers, header_format)
-    weekly.set_column(0, len(weekly_headers)-1, 15)
-
-    for w in range(1, 53):
-        row = w + 1
-        weekly.write_number(row, 0, w, cell_format)
-        start = date(year, 1, 1) + timedelta(days=(w-1)*7)
-        end = start + timedelta(days=6)
-        start_str = start.strftime("%Y-%m-%d")
-        end_str = end.strftime("%Y-%m-%d")
-
-        parts = {'total': [], 'done': [], 'pend': [], 'skip': [], 'hrs': []}
-        for m in range(1, 13):
-            mn = calendar.month_name[m]
-            last = calendar.monthrange(year, m)[1]
-            d_rng = f"'{mn}'!$A$2:$A${last+1}"
-            desc = f"'{mn}'!$D$2:$D${last+1}"
-            stat = f"'{mn}'!$F$2:$F${last+1}"
-            hrs  = f"'{mn}'!$G$2:$G${last+1}"
-
-            parts['total'].append(
-                f'COUNTIFS({d_rng}, ">="&DATEVALUE("{start_str}"), '
-                f'{d_rng}, "<="&DATEVALUE("{end_str}"), {desc}, "<>")'
-            )
-            parts['done'].append(
-                f'COUNTIFS({d_rng}, ">="&DATEVALUE("{start_str}"), '
-                f'{d_rng}, "<="&DATEVALUE("{end_str}"), {desc}, "<>", '
-                f'{stat}, "Done")'
-            )
-            parts['pend'].append(
-                f'COUNTIFS({d_rng}, ">="&DATEVALUE("{start_str}"), '
-                f'{d_rng}, "<="&DATEVALUE("{end_str}"), {desc}, "<>", '
-                f'{stat}, "Pending")'
-            )
-            parts['skip'].append(
-                f'COUNTIFS({d_rng}, ">="&DATEVALUE("{start_str}"), '
-                f'{d_rng}, "<="&DATEVALUE("{end_str}"), {desc}, "<>", '
-                f'{stat}, "Skipped")'
-            )
-            parts['hrs'].append(
-                f'SUMIFS({hrs}, {d_rng}, ">="&DATEVALUE("{start_str}"), '
-                f'{d_rng}, "<="&DATEVALUE("{end_str}"))'
+        key_fmt = fmt[report.key_fmt] if report.key_fmt else None
+        for row, (key, scope) in enumerate(rows, start=2):
+            sheet.write(row, 0, key, key_fmt)
+            record(sheet.name, row, 0, key)
+            for col, formula, fmt_name in formulas(scope, f'$A{row+1}'):
+                write_formula(sheet, row, col, formula, fmt[fmt_name])
+            write_formula(
+                sheet, row, report.complete_col,
+                report.complete_formula.format(row=row+1), fmt['percent']
             )
 
-        weekly.write_formula(row, 1, "=" + "+".join(parts['total']), cell_format)
-        weekly.write_formula(row, 2, "=" + "+".join(parts['done']), cell_format)
-        weekly.write_formula(row, 3, "=" + "+".join(parts['pend']), cell_format)
-        weekly.write_formula(row, 4, "=" + "+".join(parts['skip']), cell_format)
-        weekly.write_formula(row, 5, "=" + "+".join(parts['hrs']), time_format)
-        weekly.write_formula(row, 6, '=Goals!B5', cell_format)
-        weekly.write_formula(
-            row, 7,
-            f'=IF(G{row+1}=0, 0, C{row+1}/G{row+1})',
-            percent_format
-        )
+        if profile.styled:
+            for span, options, fmt_name in report.complete_rules:
+                sheet.conditional_format(
+                    span.format(last=len(rows) + 2), dict(options, format=fmt[fmt_name])
+                )
+        timer.mark(_REPORT_PHASES[report.rows])
+        sheet_written(sheet.name)
 
-    weekly.conditional_format(
-        'H3:H54',
-        {'type': 'cell', 'criteria': '>=', 'value': 1, 'format': done_fmt}
-    )
-    weekly.conditional_format(
-        'H3:H54',
-        {'type': 'cell', 'criteria': '<', 'value': 1, 'format': pend_fmt}
-    )
+    for current_year in years:
+        index, table_name, month_last_row = year_sheets[current_year]
+        if table:
+            ranges = {
+                key: ref.replace(layout.TABLE_NAME + '[', table_name + '[', 1)
+                for key, ref in PLAN.table_ranges.items()
+            }
 
-    # ===== Monthly Report =====
-    monthly = workbook.add_worksheet("Monthly Report")
-    monthly_headers = [
-        "Month Name", "Total Tasks", "Done", "Pending", "Skipped",
-        "Total Hours", "Goal", "% Complete"
-    ]
-    monthly.merge_range(
-        0, 0, 0, len(monthly_headers)-1,
-        f'Monthly Task Report {year}', title_format
-    )
-    monthly.write_row(1, 0, monthly_headers, header_format)
-    monthly.set_column(0, len(monthly_headers)-1, 15)
-
-    for m in range(1, 13):
-        row = m + 1
-        nm = calendar.month_name[m]
-        last = calendar.monthrange(year, m)[1]
-        desc_rng = f"'{nm}'!$D$3:$D${last+2}"
-        stat_rng = f"'{nm}'!$F$3:$F${last+2}"
-        hrs_rng  = f"'{nm}'!$G$3:$G${last+2}"
-
-        monthly.write(row, 0, nm, cell_format)
-        monthly.write_formula(row, 1, f'=COUNTIF({desc_rng}, "<>")', cell_format)
-        monthly.write_formula(
-            row, 2,
-            f'=COUNTIFS({desc_rng}, "<>", {stat_rng}, "Done")',
-            cell_format
-        )
-        monthly.write_formula(
-            row, 3,
-            f'=COUNTIFS({desc_rng}, "<>", {stat_rng}, "Pending")',
-            cell_format
-        )
-        monthly.write_formula(
-            row, 4,
-            f'=COUNTIFS({desc_rng}, "<>", {stat_rng}, "Skipped")',
-            cell_format
-        )
-        monthly.write_formula(row, 5, f'=SUM({hrs_rng})', time_format)
-        monthly.write_formula(row, 6, '=Goals!B6', cell_format)
-        monthly.write_formula(
-            row, 7,
-            f'=IF(G{row+1}=0, 0, C{row+1}/G{row+1})',
-            percent_format
-        )
+            # Weekly rows select the year's table rows by Week No, the
+            # others by a window over their days' dates
+            def window(days):
+                first, last = days[0].date, days[-1].date
+                return layout.TABLE_WINDOW.format(
+                    date=ranges['date'],
+                    first=f'{first.year},{first.month},{first.day}',
+                    last=f'{last.year},{last.month},{last.day}',
+                )
 
-    monthly.conditional_format(
-        'H3:H14',
-        {'type': 'cell', 'criteria': '>=', 'value': 1, 'format': done_fmt}
-    )
-    monthly.conditional_format(
-        'H3:H14',
-        {'type': 'cell', 'criteria': '<', 'value': 1, 'format': pend_fmt}
-    )
+            report_rows = {
+                'week': [(w, None) for w in range(1, REPORT_WEEKS + 1)],
+                'month': [(month.sheet, window(month.days)) for month in index.months],
+            }
 
-    # ===== Yearly Report =====
-    yearly = workbook.add_worksheet("Yearly Report")
-    yearly_headers = [
-        "Year", "Total Tasks", "Done", "Pending", "Skipped",
-        "Total Hours", "Goal", "% Complete"
-    ]
-    yearly.merge_range(
-        0, 0, 0, len(yearly_headers)-1,
-        f'Yearly Task Report {year}', title_format
-    )
-    yearly.write_row(1, 0, yearly_headers, header_format)
-    yearly.set_column(0, len(yearly_headers)-1, 15)
-
-    # Build formulas by concatenating each month’s ranges
-    total_parts, done_parts, pend_parts, skip_parts, hr_parts = [], [], [], [], []
-    for m in range(1, 13):
-        mn = calendar.month_name[m]
-        last = calendar.monthrange(year, m)[1]
-        desc_rng = f"'{mn}'!$D$3:$D${last+2}"
-        stat_rng = f"'{mn}'!$F$3:$F${last+2}"
-        hrs_rng  = f"'{mn}'!$G$3:$G${last+2}"
-
-        total_parts.append(f'COUNTIF({desc_rng}, "<>")')
-        done_parts.append(f'COUNTIFS({desc_rng}, "<>", {stat_rng}, "Done")')
-        pend_parts.append(f'COUNTIFS({desc_rng}, "<>", {stat_rng}, "Pending")')
-        skip_parts.append(f'COUNTIFS({desc_rng}, "<>", {stat_rng}, "Skipped")')
-        hr_parts.append(f'SUM({hrs_rng})')
-
-    yearly.write_number(2, 0, year)
-    yearly.write_formula(2, 1, "=" + "+".join(total_parts), cell_format)
-    yearly.write_formula(2, 2, "=" + "+".join(done_parts), cell_format)
-    yearly.write_formula(2, 3, "=" + "+".join(pend_parts), cell_format)
-    yearly.write_formula(2, 4, "=" + "+".join(skip_parts), cell_format)
-    yearly.write_formula(2, 5, "=" + "+".join(hr_parts), time_format)
-    yearly.write_formula(2, 6, '=Goals!B7', cell_format)
-    yearly.write_formula(2, 7, '=IF(G3=0, 0, C3/G3)', percent_format)
-    yearly.conditional_format('H3:H3', {
-        'type': 'cell', 'criteria': '>=', 'value': 1, 'format': done_fmt
-    })
-    yearly.conditional_format('H3:H3', {
-        'type': 'cell', 'criteria': '<', 'value': 1, 'format': pend_fmt
-    })
+            def row_formula(term, key_ref, scope):
+                return "=" + term.format(key=key_ref, window=scope, **ranges)
+        else:
+            # Report terms refer to these month-sheet ranges
+            month_ranges = {
+                m: {
+                    key: template.format(
+                        sheet=named(index.months[m - 1].sheet, current_year),
+                        first=layout.FIRST_DATA_ROW + 1, last=last,
+                    )
+                    for key, template in PLAN.ranges.items()
+                }
+                for m, last in month_last_row.items()
+            }
+
+            # Each week only touches the one or two months its days fall in,
+            # and is matched on the month sheets' Week No column rather than
+            # on dates.
+            report_rows = {
+                'week': [(w, index.week_months[w]) for w in range(1, REPORT_WEEKS + 1)],
+                'month': [(month.sheet, [month.month]) for month in index.months],
+            }
+
+            def row_formula(term, key_ref, months):
+                return "=" + "+".join(
+                    term.format(key=key_ref, **month_ranges[m]) for m in months
+                )
+
+        for report in PLAN.reports:
+            if report.subtotal_of:
+                continue
+
+            measures = report.table_measures if table else report.measures
+
+            def formulas(scope, key_ref):
+                return [
+                    (col, row_formula(term, key_ref, scope), fmt_name)
+                    for col, term, fmt_name in measures
+                ] + [(report.goal_col, report.goal_formula, 'cell')]
+
+            write_report(
+                named(report.sheet, current_year), report,
+                report.title.format(year=current_year),
+                report_rows[report.rows], formulas,
+            )
+
+    # Summary reports: a row per year that sums the year's subtotal report,
+    # and with several years a total row over those rows
+    for report in PLAN.reports:
+        if not report.subtotal_of:
+            continue
+        last = len(years) + 2
+
+        def formulas(scope, key_ref):
+            if scope is None:
+                goal = layout.TOTAL_GOAL.format(
+                    goal=report.goal_formula, years=len(years)
+                )
+                return [
+                    (col, "=" + layout.TOTAL_TERM.format(col=col_letter(col), last=last),
+                     fmt_name)
+                    for col, _, fmt_name in report.subtotals
+                ] + [(report.goal_col, goal, 'cell')]
+            return [
+                (col, "=" + formula.format(sheet=scope), fmt_name)
+                for col, formula, fmt_name in report.subtotals
+            ] + [(report.goal_col, report.goal_formula, 'cell')]
+
+        rows = [(y, named(report.subtotal_of, y)) for y in years]
+        if multi:
+            rows.append((layout.TOTAL_KEY, None))
+        write_report(report.sheet, report, report.title.format(year=period), rows, formulas)
 
     workbook.close()
+    timer.mark('close')
 
-    # If writing into BytesIO, rewind so it can be read from the start
-    if in_memory:
+    if needs_repack(profile):
+        # Re-zipped by app.zipstream, so the headers are fixed already
+        _rewrite(output, lambda data: apply_profile(data, profile))
+        timer.mark('profile')
+    elif reproducible:
+        # XlsxWriter's entry times and modes differ when it goes through
+        # temporary files
+        _rewrite(output, normalize_zip)
+        timer.mark('rewrite')
+
+    # If writing into BytesIO, rewind so it can be read from the start;
+    # constant_memory writes there too, just not through in_memory mode
+    if not isinstance(output, str):
         output.seek(0)
+
+
+def _rewrite(output, transform):
+    """Replaces the finished zip in `output` with transform(zip bytes)."""
+    if isinstance(output, str):
+        with open(output, 'rb') as fh:
+            data = fh.read()
+        with open(output, 'wb') as fh:
+            fh.write(transform(data))
+    else:
+        data = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        output.write(transform(data))
+
+
+def build_workbook_bytes(year: int, goals=None, tasks=None,
+                         constant_memory=False, phases=None, profile=None,
+                         progress=None, layout_mode=None, rows_per_day=1,
+                         reproducible=False, end_year=None) -> bytes:
+    """Generates the tracker for `year` and returns the xlsx file contents."""
+    buffer = BytesIO()
+    generate_task_tracker(
+        year, buffer, goals, tasks, constant_memory, phases, profile, progress,
+        layout_mode=layout_mode, rows_per_day=rows_per_day, reproducible=reproducible,
+        end_year=end_year,
+    )
+    return buffer.getvalue()
+
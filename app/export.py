@@ -0,0 +1,176 @@
+# app/export.py
+"""
+Plain-data export of a tracker: the same Goals, month-sheet and report
+layout as the workbook (app.layout.PLAN), as a zip of CSV files or as
+newline-delimited JSON.
+
+Everything is produced by generators. Month rows are emitted as they are
+built and the report figures are accumulated on the way, so memory holds
+one row and the 52 + 12 running totals, never a workbook.
+"""
+import csv
+import io
+import json
+
+from app import layout
+from app.calendar_index import REPORT_WEEKS, calendar_index
+from app.formula_eval import FormulaGrid
+from app.layout import PLAN, bind_goals, task_date
+from app.zipstream import ZipStream
+
+FORMATS = ('csv', 'ndjson')
+
+# How each report measure is computed from a bucket of running totals
+_MEASURES = {
+    'Total Tasks': lambda t: t['total'],
+    'Done': lambda t: t['Done'],
+    'Pending': lambda t: t['Pending'],
+    'Skipped': lambda t: t['Skipped'],
+    'Total Hours': lambda t: round(t['hours'], 4),
+}
+
+
+def _totals() -> dict:
+    return {'total': 0, 'Done': 0, 'Pending': 0, 'Skipped': 0, 'hours': 0.0}
+
+
+def iter_sheets(year: int, goals=None, tasks=None):
+    """
+    Yields (sheet name, headers, rows) for every sheet, in workbook order;
+    `rows` is itself a generator of value lists. `tasks` pre-fills the month
+    sheets like generate_task_tracker() does, and must be in date order.
+    """
+    goal_values = bind_goals(goals)
+    goal_rows = [[label, goal_values[key]] for label, key in layout.GOAL_ROWS]
+    yield layout.GOALS_SHEET, list(layout.GOALS_HEADERS), iter(goal_rows + [["Unit", "Tasks"]])
+
+    # Row and goal formulas only refer to the Goals sheet, so each has
+    # one value
+    grid = FormulaGrid()
+    for row, (_, key) in enumerate(layout.GOAL_ROWS, start=3):
+        grid.set(layout.GOALS_SHEET, row, 1, goal_values[key])
+    row_values = {
+        col: grid.evaluate(formula, layout.GOALS_SHEET)
+        for col, formula, _ in PLAN.row_formulas
+    }
+
+    cols = PLAN.month_cols
+    width = len(PLAN.month_headers)
+    index = calendar_index(year)
+    weeks = {w: _totals() for w in range(1, REPORT_WEEKS + 1)}
+    months = {m: _totals() for m in range(1, 13)}
+    task_iter = iter(tasks or ())
+    state = {'next': next(task_iter, None)}
+
+    def add(totals, task):
+        hours = task.get('hours') if task else None
+        totals['hours'] += float(hours or 0)
+        if task and task.get('description'):
+            totals['total'] += 1
+            if task.get('status') in ('Done', 'Pending', 'Skipped'):
+                totals[task['status']] += 1
+
+    def month_rows(month):
+        for day in month.days:
+            current = day.date
+            day_tasks = 0
+            while state['next'] is not None and task_date(state['next']) == current:
+                yield row(day, state['next'])
+                day_tasks += 1
+                state['next'] = next(task_iter, None)
+            if state['next'] is not None and task_date(state['next']) < current:
+                raise ValueError(
+                    f"tasks must be in date order and within {year}: "
+                    f"{task_date(state['next'])} came after {current}"
+                )
+            if not day_tasks:
+                yield row(day, None)
+
+    def row(day, task):
+        values = [None] * width
+        values[cols['date']] = day.date.isoformat()
+        values[cols['weekday']] = day.weekday
+        values[cols['week']] = day.week
+        for col, value in row_values.items():
+            values[col] = value
+        for col, field, _, _ in PLAN.task_cells:
+            if task is not None:
+                values[col] = task.get(field)
+        if day.week in weeks:
+            add(weeks[day.week], task)
+        add(months[day.month], task)
+        return values
+
+    for month in index.months:
+        yield month.sheet, list(PLAN.month_headers), month_rows(month)
+    if state['next'] is not None:
+        raise ValueError(f"task dated {task_date(state['next'])} is not in {year}")
+
+    year_totals = _totals()
+    for totals in months.values():
+        for key, value in totals.items():
+            year_totals[key] += value
+    buckets = {
+        'week': [(w, weeks[w]) for w in range(1, REPORT_WEEKS + 1)],
+        'month': [(month.sheet, months[month.month]) for month in index.months],
+        'year': [(year, year_totals)],
+    }
+    for report in PLAN.reports:
+        goal = grid.evaluate(report.goal_formula, report.sheet)
+        measures = [_MEASURES[header] for header in report.headers[1:-2]]
+        rows = [
+            [key] + [measure(totals) for measure in measures]
+            + [goal, round(totals['Done'] / goal, 4) if goal else 0]
+            for key, totals in buckets[report.rows]
+        ]
+        yield report.sheet, list(report.headers), iter(rows)
+
+
+def _csv_lines(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(headers)
+    for values in rows:
+        writer.writerow(['' if v is None else v for v in values])
+        if buffer.tell() > 16384:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def stream_csv_zip(year: int, goals=None, tasks=None, level: int = 6):
+    """Yields a zip holding one `<sheet>.csv` per sheet, as it is built."""
+    archive = ZipStream(level)
+    for sheet, headers, rows in iter_sheets(year, goals, tasks):
+        yield from archive.add(f"{sheet}.csv", _csv_lines(headers, rows))
+    yield archive.finish()
+
+
+def stream_ndjson(year: int, goals=None, tasks=None):
+    """
+    Yields one JSON object per row, each tagged with its sheet; empty cells
+    are left out.
+    """
+    lines = []
+    for sheet, headers, rows in iter_sheets(year, goals, tasks):
+        for values in rows:
+            record = {'sheet': sheet}
+            record.update(
+                (header, value) for header, value in zip(headers, values)
+                if value is not None
+            )
+            lines.append(json.dumps(record, separators=(',', ':')))
+            if len(lines) == 64:
+                yield ('\n'.join(lines) + '\n').encode('utf-8')
+                lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def stream_export(fmt: str, year: int, goals=None, tasks=None):
+    if fmt == 'csv':
+        return stream_csv_zip(year, goals, tasks)
+    if fmt == 'ndjson':
+        return stream_ndjson(year, goals, tasks)
+    raise ValueError(f"unknown export format {fmt!r}")
@@ -0,0 +1,418 @@
+# app/formula_eval.py
+"""
+Evaluator for the small formula subset the tracker emits.
+
+Supports numbers, strings, cell and range references (optionally
+sheet-qualified and $-anchored), whole-column structured references to
+Excel Tables (Tasks[Status]), the operators + - * / & and comparisons, and
+the functions SUM, IF, DATE, COUNTIF, COUNTIFS and SUMIFS. Ranges are read
+as flat lists of values and the *IF(S) criteria are applied column-wise as
+masks packed into ints, which is enough for the report formulas and keeps
+each formula a handful of list passes. A table column's masks are kept
+with the column, so a criterion that many report cells share is only
+tested against the table's rows once.
+"""
+import operator
+import re
+from datetime import date
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+      (?P<number>\d+(?:\.\d+)?)
+    | (?P<string>"(?:[^"]|"")*")
+    | (?P<table>[A-Za-z_][\w.]*\[[^\[\]]+\])
+    | (?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?
+             \$?[A-Z]{1,3}\$?\d+(?::\$?[A-Z]{1,3}\$?\d+)?)
+    | (?P<func>[A-Z][A-Z0-9.]*)\(
+    | (?P<op><>|<=|>=|[-+*/&=<>(),])
+    )''', re.X)
+
+_CELL = re.compile(r'\$?([A-Z]{1,3})\$?(\d+)')
+
+# Excel's 1900 date system; serials are exact from March 1900 onwards
+_EXCEL_EPOCH = date(1899, 12, 30).toordinal()
+
+_COMPARE = {
+    '=': operator.eq, '<>': operator.ne, '<': operator.lt,
+    '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+}
+_ARITH = {'+': operator.add, '-': operator.sub}
+
+
+class FormulaError(ValueError):
+    pass
+
+
+def cell_index(ref: str) -> tuple:
+    """'$B$4' -> (3, 1), zero-based (row, col)."""
+    match = _CELL.fullmatch(ref)
+    if not match:
+        raise FormulaError(f"bad cell reference: {ref}")
+    col = 0
+    for ch in match[1]:
+        col = col * 26 + ord(ch) - 64
+    return int(match[2]) - 1, col - 1
+
+
+class Range:
+    __slots__ = ('values', 'masks')
+
+    def __init__(self, values, masks=None):
+        self.values = values
+        # Criterion -> mask, for ranges whose values no longer change
+        self.masks = masks
+
+
+def _number(value):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        raise FormulaError(f"not a number: {value!r}")
+
+
+def _scalar(value):
+    if isinstance(value, Range):
+        if len(value.values) != 1:
+            raise FormulaError("range used as a single value")
+        return value.values[0]
+    return value
+
+
+def _matcher(criterion):
+    """A predicate implementing Excel's *IF(S) criteria for one value."""
+    criterion = _scalar(criterion)
+    if isinstance(criterion, (int, float)) and not isinstance(criterion, bool):
+        return lambda v: isinstance(v, (int, float)) and v == criterion
+
+    text = '' if criterion is None else str(criterion)
+    op = '='
+    for candidate in ('<>', '<=', '>=', '<', '>', '='):
+        if text.startswith(candidate):
+            op, text = candidate, text[len(candidate):]
+            break
+    try:
+        target = float(text)
+    except ValueError:
+        target = None
+
+    if target is not None:
+        compare = _COMPARE[op]
+        return lambda v: isinstance(v, (int, float)) and compare(v, target)
+    if op == '<>':
+        if text == '':
+            return lambda v: v is not None and v != ''
+        return lambda v: v is None or str(v).lower() != text.lower()
+    if op == '=':
+        if text == '':
+            return lambda v: v is None or v == ''
+        return lambda v: isinstance(v, str) and v.lower() == text.lower()
+    compare = _COMPARE[op]
+    return lambda v: isinstance(v, str) and compare(v.lower(), text.lower())
+
+
+def _hits(rng, criterion) -> int:
+    """Bit i is set when value i of `rng` meets `criterion`."""
+    criterion = _scalar(criterion)
+    key = (type(criterion), criterion)
+    if rng.masks is not None and key in rng.masks:
+        return rng.masks[key]
+    match = _matcher(criterion)
+    flags = ''.join(['1' if match(v) else '0' for v in reversed(rng.values)])
+    hits = int(flags or '0', 2)
+    if rng.masks is not None:
+        rng.masks[key] = hits
+    return hits
+
+
+def _mask(pairs) -> int:
+    if len(pairs) % 2:
+        raise FormulaError("criteria must come in range/criterion pairs")
+    mask = None
+    for rng, criterion in zip(pairs[::2], pairs[1::2]):
+        if not isinstance(rng, Range):
+            raise FormulaError("criteria range expected")
+        hits = _hits(rng, criterion)
+        mask = hits if mask is None else mask & hits
+    return mask
+
+
+def _set_bits(mask: int):
+    """Indexes of the set bits of `mask`, lowest first."""
+    flags = format(mask, 'b')[::-1]
+    i = flags.find('1')
+    while i >= 0:
+        yield i
+        i = flags.find('1', i + 1)
+
+
+def _countifs(*args):
+    return _mask(list(args)).bit_count()
+
+
+def _sumifs(sum_range, *args):
+    values = sum_range.values
+    return sum(
+        v for v in (values[i] for i in _set_bits(_mask(list(args))) if i < len(values))
+        if isinstance(v, (int, float))
+    )
+
+
+def _sum(*args):
+    total = 0
+    for arg in args:
+        if isinstance(arg, Range):
+            total += sum(v for v in arg.values if isinstance(v, (int, float)))
+        else:
+            total += _number(arg)
+    return total
+
+
+def _date(year, month, day):
+    """Excel's serial number of the date, in the 1900 date system."""
+    try:
+        day = date(int(_number(year)), int(_number(month)), int(_number(day)))
+    except ValueError as exc:
+        raise FormulaError(f"bad date: {exc}")
+    return day.toordinal() - _EXCEL_EPOCH
+
+
+FUNCTIONS = {
+    'COUNTIF': _countifs,
+    'COUNTIFS': _countifs,
+    'SUMIFS': _sumifs,
+    'SUM': _sum,
+    'DATE': _date,
+    'IF': None,  # evaluated lazily by the parser
+}
+
+
+class FormulaGrid:
+    """
+    Cell values of a workbook being generated, by sheet name.
+
+    The generator records every value that report formulas can see and each
+    formula's result as it is written, so formulas that refer to earlier
+    formula cells (like % Complete) evaluate against their results.
+    """
+
+    def __init__(self):
+        self.sheets = {}
+        # Table name -> (sheet, first data row, last data row, {header: col})
+        self.tables = {}
+        self._columns = {}
+
+    def set(self, sheet: str, row: int, col: int, value):
+        self.sheets.setdefault(sheet, {})[row, col] = value
+
+    def get(self, sheet: str, row: int, col: int):
+        return self.sheets.get(sheet, {}).get((row, col))
+
+    def add_table(self, name: str, sheet: str, first_row: int, last_row: int,
+                  headers):
+        """
+        Declares an Excel Table over zero-based data rows first_row to
+        last_row. Its columns are read when first referenced, so the rows
+        must all be set by then.
+        """
+        self.tables[name.lower()] = (
+            sheet, first_row, last_row,
+            {header.lower(): col for col, header in enumerate(headers)},
+        )
+
+    def evaluate(self, formula: str, sheet: str):
+        """Evaluates `formula` (with or without the leading '=') on `sheet`."""
+        text = formula.lstrip('=').rstrip()
+        tokens = list(_TOKEN.finditer(text))
+        if sum(len(m.group()) for m in tokens) != len(text):
+            raise FormulaError(f"cannot tokenize {formula!r}")
+        parser = _Parser(self, sheet, tokens)
+        value = parser.expression()
+        if parser.pos != len(tokens):
+            raise FormulaError(f"unexpected input in {formula!r}")
+        value = _scalar(value)
+        return 0 if value is None else value
+
+    def _column(self, ref: str) -> Range:
+        name, header = ref[:-1].split('[', 1)
+        key = (name.lower(), header.lower())
+        column = self._columns.get(key)
+        if column is None:
+            try:
+                sheet, first, last, cols = self.tables[key[0]]
+                col = cols[key[1]]
+            except KeyError:
+                raise FormulaError(f"unknown table column: {ref}")
+            cells = self.sheets.get(sheet, {})
+            column = self._columns[key] = Range(
+                [cells.get((r, col)) for r in range(first, last + 1)], masks={}
+            )
+        return column
+
+    def _resolve(self, ref: str, sheet: str):
+        if '!' in ref:
+            sheet, ref = ref.rsplit('!', 1)
+            if sheet.startswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+        if ':' not in ref:
+            return self.get(sheet, *cell_index(ref))
+        first, last = ref.split(':')
+        r1, c1 = cell_index(first)
+        r2, c2 = cell_index(last)
+        cells = self.sheets.get(sheet, {})
+        return Range([
+            cells.get((r, c))
+            for r in range(r1, r2 + 1)
+            for c in range(c1, c2 + 1)
+        ])
+
+
+class _Parser:
+    """
+    Recursive descent over the tokens, evaluating as it goes. IF only
+    evaluates the branch it takes: the other one is parsed with `skipping`
+    set, so a guarded division by zero never happens.
+    """
+
+    def __init__(self, grid, sheet, tokens):
+        self.grid = grid
+        self.sheet = sheet
+        self.tokens = tokens
+        self.pos = 0
+        self.skipping = False
+
+    def _peek(self, *ops):
+        if self.pos < len(self.tokens):
+            token = self.tokens[self.pos]
+            if token.lastgroup == 'op' and token['op'] in ops:
+                return token['op']
+        return None
+
+    def _expect(self, op):
+        if not self._peek(op):
+            raise FormulaError(f"expected {op!r}")
+        self.pos += 1
+
+    def _binary(self, operand, ops, apply):
+        left = operand()
+        op = self._peek(*ops)
+        while op:
+            self.pos += 1
+            right = operand()
+            if not self.skipping:
+                left = apply(op, _scalar(left), _scalar(right))
+            op = self._peek(*ops)
+        return left
+
+    def expression(self):
+        return self._binary(self.concat, _COMPARE, _compare)
+
+    def concat(self):
+        return self._binary(
+            self.additive, ('&',), lambda op, a, b: f"{a or ''}{b or ''}"
+        )
+
+    def additive(self):
+        return self._binary(
+            self.term, ('+', '-'),
+            lambda op, a, b: _ARITH[op](_number(a), _number(b)),
+        )
+
+    def term(self):
+        return self._binary(self.unary, ('*', '/'), _divide_or_multiply)
+
+    def unary(self):
+        if self._peek('-'):
+            self.pos += 1
+            value = self.unary()
+            return None if self.skipping else -_number(_scalar(value))
+        if self._peek('+'):
+            self.pos += 1
+            return self.unary()
+        return self.primary()
+
+    def primary(self):
+        if self.pos >= len(self.tokens):
+            raise FormulaError("unexpected end of formula")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        kind = token.lastgroup
+        if kind == 'number':
+            text = token['number']
+            return float(text) if '.' in text else int(text)
+        if kind == 'string':
+            return token['string'][1:-1].replace('""', '"')
+        if kind == 'ref':
+            if self.skipping:
+                return None
+            return self.grid._resolve(token['ref'], self.sheet)
+        if kind == 'table':
+            return None if self.skipping else self.grid._column(token['table'])
+        if kind == 'func':
+            return self._call(token['func'])
+        if token['op'] == '(':
+            value = self.expression()
+            self._expect(')')
+            return value
+        raise FormulaError(f"unexpected {token.group().strip()!r}")
+
+    def _branch(self, taken: bool):
+        skipping = self.skipping
+        self.skipping = skipping or not taken
+        try:
+            return self.expression()
+        finally:
+            self.skipping = skipping
+
+    def _call(self, name):
+        if name not in FUNCTIONS:
+            raise FormulaError(f"unsupported function {name}")
+        func = FUNCTIONS[name]
+        args = []
+        if name == 'IF':
+            condition = bool(_scalar(self.expression()))
+            self._expect(',')
+            args.append(self._branch(condition))
+            if self._peek(','):
+                self.pos += 1
+                args.append(self._branch(not condition))
+            self._expect(')')
+            if self.skipping:
+                return None
+            return args[0] if condition else (args[1] if len(args) > 1 else False)
+
+        if not self._peek(')'):
+            args.append(self.expression())
+            while self._peek(','):
+                self.pos += 1
+                args.append(self.expression())
+        self._expect(')')
+        return None if self.skipping else func(*args)
+
+
+def _compare(op, a, b):
+    # A blank cell compares as 0 against numbers and as "" against text
+    if a is None:
+        a = '' if isinstance(b, str) else 0
+    if b is None:
+        b = '' if isinstance(a, str) else 0
+    if isinstance(a, str) and isinstance(b, str):
+        a, b = a.lower(), b.lower()
+    elif isinstance(a, str) or isinstance(b, str):
+        # Excel orders every number before every string
+        a, b = isinstance(a, str), isinstance(b, str)
+    return _COMPARE[op](a, b)
+
+
+def _divide_or_multiply(op, a, b):
+    a, b = _number(a), _number(b)
+    if op == '/':
+        if b == 0:
+            raise FormulaError("#DIV/0!")
+        return a / b
+    return a * b
@@ -0,0 +1,324 @@
+# app/jobs.py
+"""
+Background generation jobs, for requests too large to hold a connection
+open: pre-filled trackers, many years or many users.
+
+Jobs live in a SQLite table, so they outlive the process that accepted
+them. Worker threads claim queued jobs one at a time, write the result to
+a file under the artifact directory and record progress after every sheet.
+A running job whose heartbeat stops (its process died) is put back in the
+queue. Finished and failed jobs, and their files, are deleted once their
+TTL has passed.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from pydantic import BaseModel, field_validator
+
+from app.batch import MAX_BATCH_ITEMS, TrackerSpec, archive_names
+from app.zipstream import RawEntry, ZipStream
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    spec         TEXT NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'queued',
+    sheets_done  INTEGER NOT NULL DEFAULT 0,
+    sheets_total INTEGER NOT NULL,
+    artifact     TEXT,
+    error        TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    created      REAL NOT NULL,
+    updated      REAL NOT NULL,
+    expires      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires);
+"""
+
+_COLUMNS = [
+    'id', 'status', 'sheets_done', 'sheets_total', 'artifact', 'error',
+    'attempts', 'created', 'updated', 'expires',
+]
+
+# A job is given up after failing to finish this many times
+MAX_ATTEMPTS = 3
+
+
+class JobItem(TrackerSpec):
+    # Pre-fills the tracker with this user's stored tasks
+    user: Optional[str] = None
+
+    def filename(self) -> str:
+        if self.label is None and self.user:
+            return self.model_copy(update={'label': self.user}).filename()
+        return super().filename()
+
+
+class JobRequest(BaseModel):
+    items: List[JobItem]
+
+    @field_validator('items')
+    @classmethod
+    def bounded(cls, items):
+        if not items:
+            raise ValueError("at least one item is required")
+        if len(items) > MAX_BATCH_ITEMS:
+            raise ValueError(f"at most {MAX_BATCH_ITEMS} items per job")
+        return items
+
+
+class JobStore:
+    """The jobs table; each thread gets its own connection."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # The data directory is only created once a store is opened
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def create(self, spec: dict, sheets_total: int, ttl: float) -> dict:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, spec, sheets_total, created, updated, expires) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, json.dumps(spec), sheets_total, now, now, now + ttl),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            f'SELECT {", ".join(_COLUMNS)} FROM jobs WHERE id = ? AND expires > ?',
+            (job_id, time.time()),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def claim(self) -> Optional[dict]:
+        """Marks the oldest queued job as running and returns it with its spec."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', sheets_done = 0, "
+                "attempts = attempts + 1, updated = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' "
+                "ORDER BY created LIMIT 1) AND status = 'queued' "
+                f"RETURNING spec, {', '.join(_COLUMNS)}",
+                (now,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['spec'] = json.loads(job['spec'])
+        return job
+
+    def progress(self, job_id: str, sheets_done: int):
+        """Records progress; also the heartbeat of a running job."""
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE jobs SET sheets_done = ?, updated = ? WHERE id = ?',
+                (sheets_done, time.time(), job_id),
+            )
+
+    def finish(self, job_id: str, artifact: str, ttl: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', sheets_done = sheets_total, "
+                "artifact = ?, updated = ?, expires = ? WHERE id = ?",
+                (artifact, now, now + ttl, job_id),
+            )
+
+    def fail(self, job_id: str, error: str, ttl: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated = ?, "
+                "expires = ? WHERE id = ?",
+                (error, now, now + ttl, job_id),
+            )
+
+    def requeue_stale(self, older_than: float) -> int:
+        """Puts running jobs without a recent heartbeat back in the queue."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'worker stopped "
+                "too many times', updated = ? WHERE status = 'running' "
+                "AND updated < ? AND attempts >= ?",
+                (now, now - older_than, MAX_ATTEMPTS),
+            )
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'queued', updated = ? "
+                "WHERE status = 'running' AND updated < ?",
+                (now, now - older_than),
+            )
+        return cur.rowcount
+
+    def purge_expired(self) -> list:
+        """Deletes expired jobs; returns their artifact paths."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'DELETE FROM jobs WHERE expires <= ? RETURNING artifact',
+                (time.time(),),
+            ).fetchall()
+        return [row['artifact'] for row in rows if row['artifact']]
+
+    def counts(self) -> dict:
+        rows = self._connect().execute(
+            'SELECT status, COUNT(*) AS n FROM jobs WHERE expires > ? GROUP BY status',
+            (time.time(),),
+        )
+        return {row['status']: row['n'] for row in rows}
+
+
+def _build_item(item: JobItem, task_db: str, progress, reproducible=False) -> bytes:
+    # Imported here so the web app only loads XlsxWriter when it generates
+    from app.excel_generator import build_workbook_bytes
+    from app.task_store import open_store
+
+    tasks = None
+    if item.user:
+        tasks = open_store(task_db).iter_year(item.user, item.year)
+    return build_workbook_bytes(
+        item.year, item.goals, tasks, profile=item.profile, progress=progress,
+        reproducible=reproducible,
+    )
+
+
+class JobRunner:
+    """
+    Worker threads that run the queued jobs of a JobStore.
+
+    Each job's artifact is one workbook, or a zip of workbooks when the job
+    has several items. Files are written under a temporary name and renamed
+    when complete, so a download never sees a partial file. With
+    `reproducible`, workbooks are built in the reproducible mode of
+    app.excel_generator.generate_task_tracker().
+    """
+
+    def __init__(self, store: JobStore, artifact_dir: str, task_db: str,
+                 workers: int = 1, ttl: float = 86400, stale_after: float = 60,
+                 poll_interval: float = 1.0, reproducible: bool = False):
+        self.store = store
+        self.artifact_dir = artifact_dir
+        self.task_db = task_db
+        self.workers = workers
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.reproducible = reproducible
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the worker threads, once."""
+        with self._lock:
+            if self._threads:
+                return
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            for n in range(self.workers):
+                thread = threading.Thread(
+                    target=self._loop, name=f"job-worker-{n}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, request: JobRequest) -> dict:
+        from app.excel_generator import SHEET_COUNT
+
+        job = self.store.create(
+            request.model_dump(), SHEET_COUNT * len(request.items), self.ttl
+        )
+        self.start()
+        self._wake.set()
+        return job
+
+    def _housekeeping(self):
+        self.store.requeue_stale(self.stale_after)
+        for path in self.store.purge_expired():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _loop(self):
+        next_housekeeping = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_housekeeping:
+                self._housekeeping()
+                next_housekeeping = time.monotonic() + self.stale_after / 2
+            job = self.store.claim()
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: dict):
+        from app.excel_generator import SHEET_COUNT
+
+        job_id = job['id']
+        items = JobRequest.model_validate(job['spec']).items
+        done_before = 0
+
+        def progress(_name, sheets_done, _total):
+            self.store.progress(job_id, done_before + sheets_done)
+
+        suffix = '.xlsx' if len(items) == 1 else '.zip'
+        path = os.path.join(self.artifact_dir, job_id + suffix)
+        try:
+            with open(path + '.tmp', 'wb') as fh:
+                if len(items) == 1:
+                    fh.write(_build_item(
+                        items[0], self.task_db, progress, self.reproducible
+                    ))
+                else:
+                    # Workbooks go into the zip as they finish, so only one
+                    # is held in memory at a time
+                    archive = ZipStream(level=0)
+                    written = set()
+                    for item, name in zip(items, archive_names(items)):
+                        if name not in written:
+                            written.add(name)
+                            data = _build_item(
+                                item, self.task_db, progress, self.reproducible
+                            )
+                            fh.write(archive.add_raw(
+                                RawEntry.compress(name, data, level=0)
+                            ))
+                        done_before += SHEET_COUNT
+                    fh.write(archive.finish())
+            os.replace(path + '.tmp', path)
+        except Exception as exc:
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+            self.store.fail(job_id, f"{type(exc).__name__}: {exc}", self.ttl)
+            return
+        self.store.finish(job_id, path, self.ttl)
@@ -0,0 +1,465 @@
+# app/layout.py
+"""
+Declarative description of the tracker workbook.
+
+The sheets, columns, formats, validations, conditional rules and report
+formulas are described once below as plain data, and compiled at import
+into PLAN: format property lists, per-column cell writers and formula
+templates with the range text already substituted where it does not
+depend on the year. Output engines (the xlsxwriter generator, the
+analyzer) read the same plan and only bind the year and goals per call.
+
+This module imports nothing heavy, so the web app can use the layout,
+goals and version without loading XlsxWriter.
+"""
+import re
+from datetime import date
+from typing import NamedTuple, Optional, Tuple
+
+# Bump whenever the generated workbook changes, so cached copies are dropped
+GENERATOR_VERSION = "7"
+
+# ===== Default Goals =====
+DEFAULT_GOALS = {'weekly': 20, 'monthly': 80, 'yearly': 1000}
+
+
+class Profile(NamedTuple):
+    """How a workbook trades file size against generation time."""
+    name: str
+    # Deflate level of the zip parts (0 stores them uncompressed)
+    level: int
+    # Cell formats, data validations and conditional formats
+    styled: bool
+    # Store computed formula results (otherwise Excel recalculates on open)
+    evaluate: bool
+    # Repeated month-sheet formulas written once as shared formulas
+    shared_formulas: bool
+    # Month-sheet borders set once per column instead of on blank cells
+    column_formats: bool = False
+
+
+PROFILES = {
+    'fast': Profile('fast', level=1, styled=False, evaluate=False, shared_formulas=False),
+    'default': Profile('default', level=6, styled=True, evaluate=True, shared_formulas=False),
+    'compact': Profile(
+        'compact', level=9, styled=True, evaluate=True, shared_formulas=True,
+        column_formats=True,
+    ),
+}
+DEFAULT_PROFILE = 'default'
+
+
+def get_profile(name=None) -> Profile:
+    try:
+        return PROFILES[name or DEFAULT_PROFILE]
+    except KeyError:
+        raise ValueError(
+            f"unknown profile {name!r}; expected one of {', '.join(PROFILES)}"
+        )
+
+
+def goals_key(goals=None) -> tuple:
+    """Hashable form of the effective goal settings, for cache keys."""
+    return tuple(sorted(dict(DEFAULT_GOALS, **(goals or {})).items()))
+
+
+def bind_goals(goals=None) -> dict:
+    """Effective goal values, including the daily goal derived from weekly."""
+    values = dict(DEFAULT_GOALS, **(goals or {}))
+    values['daily'] = int(values['weekly'] / 7)
+    return values
+
+
+# ===== Formats =====
+# In creation order; the order fixes the style indexes in the output.
+FORMATS = (
+    ('title', {
+        'bold': True, 'font_size': 16, 'align': 'left', 'valign': 'vcenter',
+        'font_color': '#0B5394',
+    }),
+    ('header', {
+        'bold': True, 'font_color': 'white', 'bg_color': '#0B5394',
+        'align': 'center', 'valign': 'vcenter', 'border': 1,
+    }),
+    ('date', {'num_format': 'dd-mm-yyyy', 'border': 1, 'align': 'center'}),
+    ('centered', {'border': 1, 'align': 'center'}),
+    ('done', {'bg_color': '#C6EFCE', 'font_color': '#006100'}),
+    ('pending', {'bg_color': '#FFEB9C', 'font_color': '#9C6500'}),
+    ('skipped', {'bg_color': '#FFC7CE', 'font_color': '#9C0006'}),
+    ('high', {'bg_color': '#FFCDD2'}),
+    ('medium', {'bg_color': '#FFF9C4'}),
+    ('low', {'bg_color': '#C8E6C9'}),
+    ('time', {'num_format': '0.00', 'border': 1, 'align': 'center'}),
+    ('percent', {'num_format': '0.0%', 'border': 1, 'align': 'center'}),
+    ('cell', {'border': 1, 'align': 'center'}),
+)
+
+PRIORITIES = ('High', 'Medium', 'Low')
+STATUSES = ('Pending', 'Done', 'Skipped')
+
+
+class Column(NamedTuple):
+    header: str
+    width: int
+    fmt: str
+    # What fills the column: 'date', 'weekday', 'week', 'formula' or
+    # 'task' (the record field named by `field`)
+    source: str
+    field: Optional[str] = None
+    kind: str = 'text'
+    formula: Optional[str] = None
+
+
+class Rule(NamedTuple):
+    """A 'text containing' conditional format on a month-sheet column."""
+    field: str
+    value: str
+    fmt: str
+
+
+class Measure(NamedTuple):
+    """
+    One report column. `term` is the formula for a single month, with
+    {desc}, {stat}, {hrs} and (weekly only) {wk} and {key} placeholders;
+    a row's formula is the '+'-joined terms of the months it covers.
+    Summary reports sum another report's column instead and have no term.
+    """
+    header: str
+    term: Optional[str] = None
+    fmt: str = 'cell'
+
+
+class Report(NamedTuple):
+    sheet: str
+    title: str
+    key_header: str
+    # 'week', 'month' or 'year': what each row covers
+    rows: str
+    goal_cell: str
+    measures: Tuple[Measure, ...]
+    key_fmt: Optional[str] = 'cell'
+    # A summary report: each row sums the matching columns of this 'month'
+    # report, one sheet per year, instead of counting the month sheets.
+    # It gets one sheet for the whole tracker; the other reports get one
+    # per year.
+    subtotal_of: Optional[str] = None
+
+
+# ===== Goals Sheet =====
+GOALS_SHEET = 'Goals'
+GOALS_TITLE = 'Goals Overview {year}'
+GOALS_HEADERS = ('Goal (Tasks)', 'Value')
+# Label and goal key of rows 4-7 (the daily goal is derived from weekly)
+GOAL_ROWS = (
+    ('Daily', 'daily'), ('Weekly', 'weekly'),
+    ('Monthly', 'monthly'), ('Yearly', 'yearly'),
+)
+GOALS_WIDTHS = (20, 12)
+
+# ===== Month Sheets =====
+MONTH_TITLE = '{month} {year} Daily Tasks'
+MONTH_COLUMNS = (
+    Column('Date', 15, 'date', 'date'),
+    Column('Day', 15, 'centered', 'weekday'),
+    Column('Daily Goal', 12, 'centered', 'formula', formula='=Goals!B4'),
+    Column('Task Description', 30, 'centered', 'task', 'description'),
+    Column('Priority', 12, 'centered', 'task', 'priority'),
+    Column('Status', 15, 'centered', 'task', 'status'),
+    Column('Hours Spent', 12, 'time', 'task', 'hours', kind='number'),
+    Column('What Went Well', 25, 'centered', 'task', 'went_well'),
+    Column('What I Missed', 25, 'centered', 'task', 'missed'),
+    Column('Notes', 30, 'centered', 'task', 'notes'),
+    Column('Week No', 10, 'centered', 'week'),
+)
+FIRST_DATA_ROW = 2
+# Week No of a row, computed from the row's Date cell {date} so that rows
+# the user inserts get a week too; week 1 starts on 1 January
+WEEK_FORMULA = '=IF({date}="", "", INT(({date}-DATE(YEAR({date}),1,1))/7)+1)'
+VALIDATIONS = (('priority', PRIORITIES), ('status', STATUSES))
+MONTH_RULES = (
+    Rule('priority', 'High', 'high'),
+    Rule('priority', 'Medium', 'medium'),
+    Rule('priority', 'Low', 'low'),
+    Rule('status', 'Done', 'done'),
+    Rule('status', 'Pending', 'pending'),
+    Rule('status', 'Skipped', 'skipped'),
+)
+
+
+# ===== Reports =====
+def _status_measures(where=''):
+    return tuple(
+        Measure(status, f'COUNTIFS({where}{{desc}}, "<>", {{stat}}, "{status}")')
+        for status in ('Done', 'Pending', 'Skipped')
+    )
+
+
+REPORTS = (
+    Report(
+        'Weekly Report', 'Weekly Task Report {year}', 'Week No', 'week',
+        'Goals!B5',
+        (Measure('Total Tasks', 'COUNTIFS({wk}, {key}, {desc}, "<>")'),)
+        + _status_measures('{wk}, {key}, ')
+        + (Measure('Total Hours', 'SUMIFS({hrs}, {wk}, {key})', 'time'),),
+    ),
+    Report(
+        'Monthly Report', 'Monthly Task Report {year}', 'Month Name', 'month',
+        'Goals!B6',
+        (Measure('Total Tasks', 'COUNTIF({desc}, "<>")'),)
+        + _status_measures()
+        + (Measure('Total Hours', 'SUM({hrs})', 'time'),),
+    ),
+    Report(
+        'Yearly Report', 'Yearly Task Report {year}', 'Year', 'year',
+        'Goals!B7',
+        (Measure('Total Tasks'),)
+        + tuple(Measure(status) for status in ('Done', 'Pending', 'Skipped'))
+        + (Measure('Total Hours', fmt='time'),),
+        key_fmt=None,
+        subtotal_of='Monthly Report',
+    ),
+)
+REPORT_WIDTH = 15
+# Every report ends with Goal and % Complete, and colours % Complete
+REPORT_TAIL = ('Goal', '% Complete')
+COMPLETE_RULES = (('>=', 'done'), ('<', 'pending'))
+
+# ===== Multi-year trackers =====
+# A tracker spanning several years names each year's month sheets (or task
+# table) and per-year reports with the year, and its summary reports get a
+# row per year and a total row. Summary cells only read the per-year
+# subtotals, so recalculation grows linearly with the number of years.
+YEAR_SHEET = '{sheet} {year}'
+YEAR_TABLE = '{table}{year}'
+# The year in titles
+YEAR_SPAN = '{first}-{last}'
+TOTAL_KEY = 'Total'
+# Total row cells, over the per-year rows above them
+TOTAL_TERM = 'SUM({col}3:{col}{last})'
+TOTAL_GOAL = '{goal}*{years}'
+
+# ===== Table Layout =====
+# The 'table' layout mode keeps the whole year on one sheet, in one Excel
+# Table with the month-sheet columns. Week No is a calculated column over
+# each row's date, and the reports count whole table columns through
+# structured references: weekly rows by Week No, the others over the
+# row's date window. Rows added anywhere in the table, or after its last
+# day, are counted without editing a formula.
+LAYOUT_MODES = ('months', 'table')
+DEFAULT_LAYOUT_MODE = 'months'
+TABLE_SHEET = 'Tasks'
+TABLE_NAME = 'Tasks'
+TABLE_TITLE = 'Daily Tasks {year}'
+TABLE_STYLE = 'Table Style Light 9'
+# Criteria keeping a report row's days, {first} and {last} as 'y,m,d'
+TABLE_WINDOW = '{date}, ">="&DATE({first}), {date}, "<="&DATE({last})'
+# Table-layout term of each measure whose month-layout term does not
+# select rows by {key}
+TABLE_TERMS = dict(
+    [('Total Tasks', 'COUNTIFS({window}, {desc}, "<>")')]
+    + [
+        (status, f'COUNTIFS({{window}}, {{desc}}, "<>", {{stat}}, "{status}")')
+        for status in STATUSES
+    ]
+    + [('Total Hours', 'SUMIFS({hrs}, {window})')]
+)
+
+
+def col_letter(col: int) -> str:
+    """0 -> 'A', 26 -> 'AA'."""
+    letters = ''
+    col += 1
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+# ===== Compiled plan =====
+class CompiledReport(NamedTuple):
+    sheet: str
+    title: str
+    rows: str
+    headers: Tuple[str, ...]
+    # (column, term template, format name) per measure; none in summaries
+    measures: Tuple[Tuple[int, str, str], ...]
+    goal_col: int
+    goal_formula: str
+    complete_col: int
+    # % Complete formula, formatted with the 1-based row
+    complete_formula: str
+    key_fmt: Optional[str]
+    # Conditional formats on the % Complete column, formatted with `last`
+    complete_rules: Tuple[Tuple[str, dict, str], ...]
+    # (column, term template, format name) per measure in the table layout
+    table_measures: Tuple[Tuple[int, str, str], ...]
+    # Summary reports only: the per-year report they sum, and (column,
+    # formula formatted with that report's `sheet`, format name) per measure
+    subtotal_of: Optional[str] = None
+    subtotals: Tuple[Tuple[int, str, str], ...] = ()
+
+
+class Plan(NamedTuple):
+    formats: tuple
+    month_headers: Tuple[str, ...]
+    month_widths: Tuple[int, ...]
+    # Zero-based column of each month-sheet source/field
+    month_cols: dict
+    # (column, record field, kind, format name) for the task columns
+    task_cells: Tuple[Tuple[int, str, str, str], ...]
+    # (column, formula, format name) for per-row formula columns
+    row_formulas: Tuple[Tuple[int, str, str], ...]
+    # Range templates ('E3:E{last}') with their validation or rule options;
+    # rules on the same column share one range, so each cell is only
+    # tested by its own column's rules
+    validations: Tuple[Tuple[str, dict], ...]
+    month_rules: Tuple[Tuple[str, dict, str], ...]
+    # Range templates used by the report terms, over rows {first} to
+    # {last} of a month sheet or the task table
+    ranges: dict
+    reports: Tuple[CompiledReport, ...]
+    # Per-row formula columns of the table, references anchored
+    table_formulas: Tuple[Tuple[int, str, str], ...]
+    # The table's calculated Week No column
+    table_week_formula: str
+    # Structured references used by the table-layout terms
+    table_ranges: dict
+
+
+def _anchored(formula: str) -> str:
+    """'=Goals!B4' -> '=Goals!$B$4', the same cell from any row."""
+    return re.sub(r'(?<![\w$])\$?([A-Z]{1,3})\$?(\d+)\b', r'$\1$\2', formula)
+
+
+def _subtotals(report: Report, by_sheet: dict) -> tuple:
+    source = by_sheet[report.subtotal_of]
+    if source.rows != 'month' or source.subtotal_of:
+        raise ValueError(f"{report.sheet} can only sum a per-year month report")
+    headers = [m.header for m in source.measures]
+    subtotals = []
+    for i, measure in enumerate(report.measures, start=1):
+        if measure.header not in headers:
+            raise ValueError(f"{report.subtotal_of} has no {measure.header} column")
+        letter = col_letter(1 + headers.index(measure.header))
+        # The source report's twelve month rows, 3 to 14
+        subtotals.append(
+            (i, f"SUM('{{sheet}}'!${letter}$3:${letter}$14)", measure.fmt)
+        )
+    return tuple(subtotals)
+
+
+def _compile() -> Plan:
+    cols = {}
+    for i, column in enumerate(MONTH_COLUMNS):
+        cols[column.field or column.source] = i
+    first = FIRST_DATA_ROW + 1
+
+    def span(field):
+        letter = col_letter(cols[field])
+        return f'{letter}{first}:{letter}{{last}}'
+
+    def absolute(field):
+        letter = col_letter(cols[field])
+        return f"'{{sheet}}'!${letter}${{first}}:${letter}${{last}}"
+
+    by_sheet = {report.sheet: report for report in REPORTS}
+    reports = []
+    for report in REPORTS:
+        for measure in report.measures:
+            if report.subtotal_of and measure.term is not None:
+                raise ValueError(f"{report.sheet} sums {report.subtotal_of}; "
+                                 f"{measure.header} cannot have a term")
+            if not report.subtotal_of and measure.term is None:
+                raise ValueError(f"{report.sheet} {measure.header} has no term")
+        headers = (report.key_header,) + tuple(m.header for m in report.measures)
+        headers += REPORT_TAIL
+        goal_col = len(headers) - 2
+        done_col = 1 + [m.header for m in report.measures].index('Done')
+        complete = col_letter(goal_col + 1)
+        g, c = col_letter(goal_col), col_letter(done_col)
+        reports.append(CompiledReport(
+            sheet=report.sheet,
+            title=report.title,
+            rows=report.rows,
+            headers=headers,
+            measures=() if report.subtotal_of else tuple(
+                (i, m.term, m.fmt) for i, m in enumerate(report.measures, start=1)
+            ),
+            goal_col=goal_col,
+            goal_formula='=' + report.goal_cell,
+            complete_col=goal_col + 1,
+            complete_formula=f'=IF({g}{{row}}=0, 0, {c}{{row}}/{g}{{row}})',
+            key_fmt=report.key_fmt,
+            complete_rules=tuple(
+                (f'{complete}3:{complete}{{last}}',
+                 {'type': 'cell', 'criteria': criteria, 'value': 1}, fmt)
+                for criteria, fmt in COMPLETE_RULES
+            ),
+            table_measures=() if report.subtotal_of else tuple(
+                (i, m.term if '{key}' in m.term else TABLE_TERMS[m.header], m.fmt)
+                for i, m in enumerate(report.measures, start=1)
+            ),
+            subtotal_of=report.subtotal_of,
+            subtotals=_subtotals(report, by_sheet) if report.subtotal_of else (),
+        ))
+
+    def structured(field):
+        return f'{TABLE_NAME}[{MONTH_COLUMNS[cols[field]].header}]'
+
+    return Plan(
+        formats=FORMATS,
+        month_headers=tuple(c.header for c in MONTH_COLUMNS),
+        month_widths=tuple(c.width for c in MONTH_COLUMNS),
+        month_cols=cols,
+        task_cells=tuple(
+            (i, c.field, c.kind, c.fmt)
+            for i, c in enumerate(MONTH_COLUMNS) if c.source == 'task'
+        ),
+        row_formulas=tuple(
+            (i, c.formula, c.fmt)
+            for i, c in enumerate(MONTH_COLUMNS) if c.source == 'formula'
+        ),
+        validations=tuple(
+            (span(field), {'validate': 'list', 'source': list(values)})
+            for field, values in VALIDATIONS
+        ),
+        month_rules=tuple(
+            (span(rule.field),
+             {'type': 'text', 'criteria': 'containing', 'value': rule.value},
+             rule.fmt)
+            for rule in MONTH_RULES
+        ),
+        ranges={
+            'wk': absolute('week'),
+            'desc': absolute('description'),
+            'stat': absolute('status'),
+            'hrs': absolute('hours'),
+        },
+        reports=tuple(reports),
+        table_formulas=tuple(
+            (i, _anchored(c.formula), c.fmt)
+            for i, c in enumerate(MONTH_COLUMNS) if c.source == 'formula'
+        ),
+        table_week_formula=WEEK_FORMULA.format(
+            date=f"{TABLE_NAME}[[#This Row],[{MONTH_COLUMNS[cols['date']].header}]]"
+        ),
+        table_ranges={
+            'date': structured('date'),
+            'wk': structured('week'),
+            'desc': structured('description'),
+            'stat': structured('status'),
+            'hrs': structured('hours'),
+        },
+    )
+
+
+PLAN = _compile()
+
+# Task record keys, in month-sheet column order
+TASK_FIELDS = [field for _, field, _, _ in PLAN.task_cells]
+
+
+def task_date(task) -> date:
+    """A task record's date, given as a date or an ISO string."""
+    value = task['date']
+    return value if isinstance(value, date) else date.fromisoformat(value)
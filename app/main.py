@@ -1,31 +1,658 @@
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import StreamingResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
-from app.excel_generator import generate_task_tracker
-from io import BytesIO
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request, Form, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+from fastapi.responses import (
+    FileResponse, Response, HTMLResponse, PlainTextResponse, StreamingResponse
+)
+from app.analyzer import TrackerFormatError, analyze_bytes
+from app.batch import BatchRequest, stream_batch
+from app.cache import (
+    ArtifactStore, StoredArtifact, WorkbookCache, etag_matches, content_key,
+)
+from app.jobs import JobRequest, JobRunner, JobStore
+from app.updater import TrackerChanges, update_tracker
+from app.task_store import (
+    STATUSES, TaskFields, TaskIn, build_user_tracker, export_user_tracker,
+    open_store,
+)
+from app.layout import (
+    DEFAULT_GOALS, DEFAULT_LAYOUT_MODE, DEFAULT_PROFILE, GENERATOR_VERSION, LAYOUT_MODES,
+    PROFILES, goals_key,
+)
+from app.metrics import (
+    CACHE_REQUESTS, QUEUE_WAIT_SECONDS, REGISTRY, REQUEST_SECONDS,
+    RESPONSE_BYTES, TRANSFER_SECONDS, gauge_lines, record_phases, server_timing,
+)
+from app.workers import GenerationPool, PoolSaturated
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Plain-data exports of the same layout: (file suffix, media type)
+EXPORT_FORMATS = {
+    "csv": ("_csv.zip", "application/zip"),
+    "ndjson": (".ndjson", "application/x-ndjson"),
+}
 
 app = FastAPI()
-templates = Jinja2Templates(directory="app/templates")
+
+# The landing page has no template variables, so it is sent as a static file
+INDEX_HTML = os.path.join(os.path.dirname(__file__), "templates", "index.html")
+_index_page = None
+
+# Workbooks are built in the reproducible mode, so the same inputs give the
+# same bytes and the same ETag in every worker and after every restart
+REPRODUCIBLE_OUTPUT = os.environ.get("REPRODUCIBLE_OUTPUT", "1") != "0"
+
+# Finished workbooks, keyed by everything the output depends on
+workbook_cache = WorkbookCache(
+    int(os.environ.get("WORKBOOK_CACHE_BYTES", 64 * 1024 * 1024))
+)
+
+# The same workbooks on disk, shared by every worker process using the
+# directory; empty to disable. The default lives under the temp directory,
+# the one place a read-only deployment can still write to, and is only
+# created once the first workbook is stored. Least recently used files are
+# deleted once the store exceeds ARTIFACT_MAX_BYTES.
+ARTIFACT_DIR = os.environ.get(
+    "ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "task_tracker_artifacts")
+)
+artifact_store = ArtifactStore(
+    ARTIFACT_DIR, int(os.environ.get("ARTIFACT_MAX_BYTES", 512 * 1024 * 1024))
+) if ARTIFACT_DIR else None
+# Years after the current one generated into the store at startup; off
+# unless set, so cold starts do no generation of their own
+PREWARM_YEARS = int(os.environ.get("ARTIFACT_PREWARM_YEARS", -1))
+
+# Analysis results as JSON, keyed by a hash of the uploaded file
+analysis_cache = WorkbookCache(
+    int(os.environ.get("ANALYSIS_CACHE_BYTES", 8 * 1024 * 1024))
+)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+
+# The task store and job queue keep their files under DATA_DIR. Like the
+# artifact store it defaults to the temp directory and is only created on
+# first use; set it to somewhere durable to keep tasks across restarts.
+DATA_DIR = os.environ.get(
+    "DATA_DIR", os.path.join(tempfile.gettempdir(), "task_tracker_data")
+)
+
+
+def data_path(env: str, default: str) -> str:
+    # Relative settings are taken as relative to DATA_DIR, not the cwd
+    return os.path.join(DATA_DIR, os.environ.get(env, default))
+
+
+# Stored tasks that trackers can be pre-filled from
+TASK_DB_PATH = data_path("TASK_DB_PATH", "tasks.db")
+# Upper bound of /generate's rows_per_day
+MAX_ROWS_PER_DAY = 100
+# Most years one /generate workbook may span
+MAX_TRACKER_YEARS = 10
+
+# Generation runs here so it never blocks the event loop
+generation_pool = GenerationPool(
+    workers=int(os.environ.get("GENERATION_WORKERS", os.cpu_count() or 1)),
+    queue_depth=int(os.environ.get("GENERATION_QUEUE_DEPTH", 16)),
+    kind=os.environ.get("GENERATION_POOL", "thread"),
+)
+
+
+# Batches fan out across their own processes, created on first use
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+_batch_executor = None
+
+
+def batch_executor():
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+    return _batch_executor
+
+
+# Background jobs: a SQLite queue and its artifact files, opened on first use
+JOB_DB_PATH = data_path("JOB_DB_PATH", "jobs.db")
+JOB_DIR = data_path("JOB_DIR", "job_artifacts")
+_job_runner = None
+
+
+def job_runner() -> JobRunner:
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = JobRunner(
+            JobStore(JOB_DB_PATH), JOB_DIR, TASK_DB_PATH,
+            workers=int(os.environ.get("JOB_WORKERS", 1)),
+            ttl=float(os.environ.get("JOB_TTL_SECONDS", 86400)),
+            stale_after=float(os.environ.get("JOB_STALE_SECONDS", 60)),
+            reproducible=REPRODUCIBLE_OUTPUT,
+        )
+    return _job_runner
+
+
+def _gauges():
+    pool = generation_pool.stats()
+    caches = {"workbooks": workbook_cache.stats(), "analysis": analysis_cache.stats()}
+    if artifact_store is not None:
+        caches["artifacts"] = artifact_store.stats()
+    return (
+        gauge_lines("tracker_pool_in_flight", "Jobs running or queued",
+                    {None: pool["in_flight"]})
+        + gauge_lines("tracker_pool_queued", "Jobs waiting for a worker",
+                      {None: pool["queued"]})
+        + gauge_lines("tracker_cache_bytes", "Bytes held by each cache",
+                      {f'cache="{name}"': c["bytes"] for name, c in caches.items()})
+        + gauge_lines("tracker_cache_entries", "Entries held by each cache",
+                      {f'cache="{name}"': c["entries"] for name, c in caches.items()})
+        + (gauge_lines("tracker_jobs", "Background jobs by status",
+                       {f'status="{status}"': n
+                        for status, n in _job_runner.store.counts().items()})
+           if _job_runner is not None else [])
+    )
+
+
+REGISTRY.collectors.append(_gauges)
+
+
+def _prewarm(years):
+    from app.template_engine import render_workbook
+
+    for year in years:
+        key = (year, goals_key(None), DEFAULT_PROFILE, GENERATOR_VERSION)
+        if not artifact_store.contains(key):
+            artifact_store.put(key, render_workbook(year, reproducible=REPRODUCIBLE_OUTPUT))
+
+
+@app.on_event("startup")
+def prewarm_artifacts():
+    # Blank trackers for this year and the next few, generated off the
+    # request path; other workers skip the years already on disk
+    if artifact_store is not None and PREWARM_YEARS >= 0:
+        this_year = datetime.date.today().year
+        threading.Thread(
+            target=_prewarm, args=(range(this_year, this_year + PREWARM_YEARS + 1),),
+            name="artifact-prewarm", daemon=True,
+        ).start()
+
+
+@app.on_event("startup")
+def resume_jobs():
+    # Jobs queued or interrupted before a restart are picked up again
+    if os.path.exists(JOB_DB_PATH):
+        job_runner().start()
+
+
+@app.on_event("shutdown")
+def shutdown_pool():
+    generation_pool.shutdown()
+    if _batch_executor is not None:
+        _batch_executor.shutdown(wait=False, cancel_futures=True)
+    if _job_runner is not None:
+        _job_runner.stop()
 
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+async def home():
+    global _index_page
+    if _index_page is None:
+        with open(INDEX_HTML, "rb") as fh:
+            _index_page = fh.read()
+    return HTMLResponse(_index_page)
 
 
-@app.post("/generate")
-async def generate(request: Request, year: int = Form(...)):
-    # 1) Prepare an in-memory buffer
-    buffer = BytesIO()
+def _workbook_etag(key, entry=None):
+    # Reproducible workbooks are a pure function of their cache key, so the
+    # key's hash is a strong ETag that is known before the first byte is
+    # built; otherwise only a finished copy's content hash can be one.
+    if REPRODUCIBLE_OUTPUT:
+        return '"' + hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32] + '"'
+    return None if entry is None else entry.etag
+
+
+async def _stream_and_cache(key, first, chunks, phases, started):
+    # Chunks go out as soon as they are compressed. Each is also written to
+    # the artifact store as it passes, so the file is never held whole;
+    # without a store, the in-process cache needs the joined bytes.
+    writer = None
+    if artifact_store is not None:
+        writer = await run_in_threadpool(artifact_store.open, key)
+    sent = []
+    size = 0
+
+    async def keep(chunk):
+        nonlocal size
+        size += len(chunk)
+        if writer is not None:
+            await run_in_threadpool(writer.write, chunk)
+        else:
+            sent.append(chunk)
+
+    complete = False
+    try:
+        yield first
+        first_sent = time.perf_counter()
+        await keep(first)
+        async for chunk in chunks:
+            yield chunk
+            await keep(chunk)
+        complete = True
+    finally:
+        await chunks.aclose()
+        if writer is not None and not complete:
+            await run_in_threadpool(writer.abort)
+    if writer is not None:
+        await run_in_threadpool(writer.commit)
+    else:
+        workbook_cache.put(key, b"".join(sent))
+    TRANSFER_SECONDS.observe(time.perf_counter() - first_sent)
+    RESPONSE_BYTES.inc(size, "generate")
+    record_phases(phases)
+    REQUEST_SECONDS.observe(time.perf_counter() - started, "generate", "miss")
+
+
+_GOALS = TypeAdapter(Dict[str, int])
+
+
+def _parse_goals(text: Optional[str]) -> Optional[dict]:
+    """/generate's `goals` form field: JSON such as {"weekly": 25}."""
+    if not text:
+        return None
+    try:
+        goals = _GOALS.validate_json(text)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=json.loads(exc.json()))
+    unknown = set(goals) - set(DEFAULT_GOALS)
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail=f"unknown goals: {', '.join(sorted(unknown))}"
+        )
+    return goals or None
+
 
-    # 2) Generate the workbook into the buffer
-    generate_task_tracker(year, buffer)
+def _saturated(exc: PoolSaturated, route: str, started: float) -> HTTPException:
+    REQUEST_SECONDS.observe(time.perf_counter() - started, route, "rejected")
+    return HTTPException(
+        status_code=503,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
-    # 3) Stream it back to the client with a download filename
+
+@app.post("/generate")
+async def generate(
+    request: Request,
+    year: int = Form(...),
+    user: Optional[str] = Form(None),
+    profile: str = Form("default"),
+    format: str = Form("xlsx"),
+    layout: str = Form(DEFAULT_LAYOUT_MODE),
+    rows_per_day: int = Form(1),
+    end_year: Optional[int] = Form(None),
+    goals: Optional[str] = Form(None),
+):
+    started = time.perf_counter()
+    goals = _parse_goals(goals)
+    if profile not in PROFILES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"unknown profile; expected one of {', '.join(PROFILES)}",
+        )
+    if layout not in LAYOUT_MODES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"unknown layout; expected one of {', '.join(LAYOUT_MODES)}",
+        )
+    if not 1 <= rows_per_day <= MAX_ROWS_PER_DAY:
+        raise HTTPException(
+            status_code=422,
+            detail=f"rows_per_day must be between 1 and {MAX_ROWS_PER_DAY}",
+        )
+    if end_year is not None and not year <= end_year < year + MAX_TRACKER_YEARS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"end_year must be between year and year + {MAX_TRACKER_YEARS - 1}",
+        )
+    spans_years = end_year not in (None, year)
+    if spans_years and format != "xlsx":
+        raise HTTPException(
+            status_code=422, detail="exports cover a single year; leave out end_year"
+        )
+    shaped = (profile, layout, rows_per_day) != (DEFAULT_PROFILE, DEFAULT_LAYOUT_MODE, 1)
+    if shaped and format != "xlsx":
+        raise HTTPException(
+            status_code=422,
+            detail="profile, layout and rows_per_day only apply to xlsx; leave them out",
+        )
+    if format != "xlsx":
+        return await _export(year, user, goals, format, started)
     filename = f"task_tracker_{year}.xlsx"
+    if spans_years:
+        filename = f"task_tracker_{year}-{end_year}.xlsx"
     headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    phases, timings = {}, {}
+
+    # 0) Pre-filled from the task store, which depends on live data, or in
+    # a shape the template engine does not produce: built and never cached
+    if user or layout != DEFAULT_LAYOUT_MODE or rows_per_day != 1 or spans_years:
+        shape = dict(
+            layout_mode=layout, rows_per_day=rows_per_day, reproducible=REPRODUCIBLE_OUTPUT,
+            end_year=end_year,
+        )
+        if user:
+            build = partial(build_user_tracker, **shape)
+            args = (TASK_DB_PATH, user, year, goals, phases, profile)
+        else:
+            from app.excel_generator import build_workbook_bytes
+
+            build = partial(build_workbook_bytes, **shape)
+            args = (year, goals, None, False, phases, profile)
+        try:
+            data = await generation_pool.run(build, *args, timings=timings)
+        except PoolSaturated as exc:
+            raise _saturated(exc, "generate", started)
+        QUEUE_WAIT_SECONDS.observe(timings["queue"])
+        record_phases(phases)
+        RESPONSE_BYTES.inc(len(data), "generate")
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, "generate", "prefilled" if user else "uncached")
+        headers["Server-Timing"] = server_timing(
+            dict(timings, **phases, total=elapsed), cache="bypass"
+        )
+        return Response(data, media_type=XLSX_MEDIA_TYPE, headers=headers)
+
+    # 1) Not generated yet: stream it while it is being built
+    key = (year, goals_key(goals), profile, GENERATOR_VERSION)
+    entry = None
+    if artifact_store is not None:
+        entry = artifact_store.get(key)
+        CACHE_REQUESTS.inc(1, "artifacts", "miss" if entry is None else "hit")
+    if entry is None:
+        entry = workbook_cache.get(key)
+        CACHE_REQUESTS.inc(1, "workbooks", "miss" if entry is None else "hit")
+    if entry is None:
+        # Loaded on first use, so cold starts that only serve the landing
+        # page never import XlsxWriter
+        from app.template_engine import stream_workbook
+
+        try:
+            generation_pool.admit()
+        except PoolSaturated as exc:
+            raise _saturated(exc, "generate", started)
+        chunks = generation_pool.stream(
+            stream_workbook, year, goals, phases, profile, REPRODUCIBLE_OUTPUT,
+            timings=timings,
+        )
+        # Wait for the first chunk, so the headers can carry the queue wait
+        # and skeleton time; later phases are only recorded in /metrics.
+        first = await chunks.__anext__()
+        QUEUE_WAIT_SECONDS.observe(timings["queue"])
+        headers["Server-Timing"] = server_timing(
+            dict(timings, **phases, total=time.perf_counter() - started), cache="miss"
+        )
+        etag = _workbook_etag(key)
+        if etag is not None:
+            headers["ETag"] = etag
+        return StreamingResponse(
+            _stream_and_cache(key, first, chunks, phases, started),
+            media_type=XLSX_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    # 2) Let clients that already hold this exact file skip the download
+    etag = _workbook_etag(key, entry)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, "generate", "not_modified")
+        return Response(status_code=304, headers={
+            "ETag": etag,
+            "Server-Timing": server_timing({"total": elapsed}, cache="hit"),
+        })
+
+    # 3) Send the cached copy back with its ETag; a file on disk is sent
+    # by the server from the file, without reading it into Python first
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.observe(elapsed, "generate", "hit")
+    headers["ETag"] = etag
+    headers["Server-Timing"] = server_timing({"total": elapsed}, cache="hit")
+    if isinstance(entry, StoredArtifact):
+        RESPONSE_BYTES.inc(entry.size, "generate")
+        return FileResponse(entry.path, media_type=XLSX_MEDIA_TYPE, headers=headers)
+    RESPONSE_BYTES.inc(len(entry.data), "generate")
+    return Response(entry.data, media_type=XLSX_MEDIA_TYPE, headers=headers)
+
+
+async def _export(year, user, goals, fmt, started):
+    """/generate for the CSV and NDJSON formats: no workbook is built."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"unknown format; expected xlsx or one of {', '.join(EXPORT_FORMATS)}",
+        )
+    suffix, media_type = EXPORT_FORMATS[fmt]
+    headers = {
+        "Content-Disposition": f'attachment; filename="task_tracker_{year}{suffix}"'
+    }
+    if user:
+        timings = {}
+        try:
+            data = await generation_pool.run(
+                export_user_tracker, TASK_DB_PATH, user, year, fmt, goals,
+                timings=timings,
+            )
+        except PoolSaturated as exc:
+            raise _saturated(exc, "generate", started)
+        QUEUE_WAIT_SECONDS.observe(timings["queue"])
+        RESPONSE_BYTES.inc(len(data), "generate")
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, "generate", "export")
+        headers["Server-Timing"] = server_timing(
+            dict(timings, total=elapsed), cache="bypass"
+        )
+        return Response(data, media_type=media_type, headers=headers)
+
+    # A blank export takes milliseconds, so it is streamed straight from
+    # the generators rather than queued or cached
+    from app.export import stream_export
+
     return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers
-    )
\ No newline at end of file
+        _stream_export(stream_export(fmt, year, goals), started),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def _stream_export(chunks, started):
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        yield chunk
+    RESPONSE_BYTES.inc(size, "generate")
+    REQUEST_SECONDS.observe(time.perf_counter() - started, "generate", "export")
+
+
+@app.post("/batch")
+async def batch(spec: BatchRequest):
+    headers = {"Content-Disposition": 'attachment; filename="task_trackers.zip"'}
+    return StreamingResponse(
+        stream_batch(spec.items, batch_executor(), workbook_cache, REPRODUCIBLE_OUTPUT),
+        media_type="application/zip",
+        headers=headers,
+    )
+
+
+def _job_view(job: dict) -> dict:
+    view = {
+        "id": job["id"],
+        "status": job["status"],
+        "progress": round(100 * job["sheets_done"] / job["sheets_total"], 1),
+        "sheets_done": job["sheets_done"],
+        "sheets_total": job["sheets_total"],
+        "error": job["error"],
+        "created": job["created"],
+        "expires": job["expires"],
+    }
+    if job["status"] == "done":
+        view["download"] = f"/jobs/{job['id']}/download"
+    return view
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(spec: JobRequest, response: Response):
+    job = job_runner().submit(spec)
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return _job_view(job)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_runner().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found or expired")
+    return _job_view(job)
+
+
+@app.get("/jobs/{job_id}/download")
+async def download_job(job_id: str):
+    job = job_runner().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found or expired")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"job is {job['status']}")
+    zipped = job["artifact"].endswith(".zip")
+    return FileResponse(
+        job["artifact"],
+        media_type="application/zip" if zipped else XLSX_MEDIA_TYPE,
+        filename=f"task_trackers_{job_id}.zip" if zipped else f"task_tracker_{job_id}.xlsx",
+    )
+
+
+@app.post("/analyze")
+async def analyze(file: UploadFile = File(...)):
+    started = time.perf_counter()
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="upload is too large")
+
+    key = content_key(data)
+    entry = analysis_cache.get(key)
+    outcome = "miss" if entry is None else "hit"
+    CACHE_REQUESTS.inc(1, "analysis", outcome)
+    timings = {}
+    if entry is None:
+        try:
+            result = await generation_pool.run(analyze_bytes, data, timings=timings)
+        except PoolSaturated as exc:
+            raise _saturated(exc, "analyze", started)
+        except TrackerFormatError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        QUEUE_WAIT_SECONDS.observe(timings["queue"])
+        entry = analysis_cache.put(key, result)
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.observe(elapsed, "analyze", outcome)
+    RESPONSE_BYTES.inc(len(entry.data), "analyze")
+    headers = {"Server-Timing": server_timing(dict(timings, total=elapsed), cache=outcome)}
+    return Response(entry.data, media_type="application/json", headers=headers)
+
+
+@app.post("/update")
+async def update(file: UploadFile = File(...), changes: str = Form(...)):
+    started = time.perf_counter()
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="upload is too large")
+    try:
+        spec = TrackerChanges.model_validate_json(changes)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=json.loads(exc.json()))
+
+    timings = {}
+    try:
+        result = await generation_pool.run(update_tracker, data, spec, timings=timings)
+    except PoolSaturated as exc:
+        raise _saturated(exc, "update", started)
+    except TrackerFormatError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    QUEUE_WAIT_SECONDS.observe(timings["queue"])
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.observe(elapsed, "update", "updated")
+    RESPONSE_BYTES.inc(len(result), "update")
+    filename = os.path.basename(file.filename or "") or "task_tracker.xlsx"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Server-Timing": server_timing(dict(timings, total=elapsed)),
+    }
+    return Response(result, media_type=XLSX_MEDIA_TYPE, headers=headers)
+
+
+@app.post("/tasks", status_code=201)
+def add_task(task: TaskIn):
+    store = open_store(TASK_DB_PATH)
+    return store.get(store.add(task.model_dump()))
+
+
+@app.patch("/tasks/{task_id}")
+def update_task(task_id: int, changes: TaskFields):
+    task = open_store(TASK_DB_PATH).update(
+        task_id, changes.model_dump(exclude_unset=True)
+    )
+    if task is None:
+        raise HTTPException(status_code=404, detail="task not found")
+    return task
+
+
+@app.get("/tasks")
+def list_tasks(
+    user: str,
+    year: Optional[int] = None,
+    status: Optional[str] = None,
+    limit: int = 1000,
+):
+    if status is not None and status not in STATUSES:
+        raise HTTPException(status_code=422, detail="unknown status")
+    start = end = None
+    if year is not None:
+        start, end = f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+    return open_store(TASK_DB_PATH).query(
+        user, start, end, status, limit=max(1, min(limit, 10000))
+    )
+
+
+@app.get("/pool")
+async def pool_stats():
+    return generation_pool.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/cache")
+async def cache_stats():
+    stats = {
+        "workbooks": workbook_cache.stats(),
+        "analysis": analysis_cache.stats(),
+    }
+    if artifact_store is not None:
+        stats["artifacts"] = artifact_store.stats()
+    return stats
+
+
+@app.delete("/cache")
+async def cache_clear():
+    workbook_cache.clear()
+    analysis_cache.clear()
+    if artifact_store is not None:
+        artifact_store.clear()
+    return await cache_stats()
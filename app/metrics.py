@@ -0,0 +1,154 @@
+# app/metrics.py
+"""
+In-process counters and latency histograms, rendered in the Prometheus
+text format on demand.
+
+Recording is a dict lookup, a bisect and a couple of additions under a
+lock, and nothing is formatted until /metrics is scraped, so leaving the
+instrumentation on costs next to nothing when nobody is looking.
+"""
+import threading
+from bisect import bisect_left
+
+# Seconds; spans a cached hit (sub-millisecond) to a cold full build
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        names = self.labelnames + ('le',)
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, hits in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += hits
+                    lines.append(
+                        f'{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}'
+                    )
+                suffix = _labels(self.labelnames, labels)
+                lines.append(f'{self.name}_sum{suffix} {total}')
+                lines.append(f'{self.name}_count{suffix} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        # Callables returning extra lines (gauges read at scrape time)
+        self.collectors = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            lines.extend(collect())
+        return '\n'.join(lines) + '\n'
+
+
+def gauge_lines(name: str, help: str, values: dict) -> list:
+    """A gauge family from a {label value or None: number} mapping."""
+    lines = [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+    for key, value in values.items():
+        labels = '' if key is None else '{' + key + '}'
+        lines.append(f'{name}{labels} {value}')
+    return lines
+
+
+def server_timing(timings: dict, **descriptions) -> str:
+    """A Server-Timing header value from {name: seconds} and {name: text}."""
+    entries = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings.items()]
+    entries += [f'{name};desc="{text}"' for name, text in descriptions.items()]
+    return ', '.join(entries)
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'tracker_request_seconds', 'Time to produce a response, by route and outcome',
+    ('route', 'outcome'),
+)
+PHASE_SECONDS = REGISTRY.histogram(
+    'tracker_phase_seconds', 'Time spent in each generation phase', ('phase',),
+)
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    'tracker_queue_wait_seconds', 'Time jobs waited for a generation worker',
+)
+TRANSFER_SECONDS = REGISTRY.histogram(
+    'tracker_transfer_seconds', 'Time from the first to the last streamed chunk',
+)
+RESPONSE_BYTES = REGISTRY.counter(
+    'tracker_response_bytes_total', 'Workbook and report bytes sent', ('route',),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'tracker_cache_requests_total', 'Cache lookups by outcome', ('cache', 'outcome'),
+)
+
+
+def record_phases(timings: dict):
+    for phase, seconds in timings.items():
+        PHASE_SECONDS.observe(seconds, phase)
@@ -0,0 +1,93 @@
+# app/profiles.py
+"""
+Post-processing of generated workbooks for the output profiles in
+app.layout.PROFILES.
+
+XlsxWriter always deflates at its default level and writes every formula
+in full, so a profile with another compression level or with shared
+formulas has its parts rewritten and re-zipped here.
+"""
+import re
+import zipfile
+from io import BytesIO
+
+from app.zipstream import RawEntry, ZipStream
+
+# zlib's default, which XlsxWriter's zipfile writer always uses
+XLSXWRITER_LEVEL = 6
+
+_FORMULA_CELL = re.compile(
+    rb'<c r="([A-Z]{1,3})(\d+)"((?: [st]="[^"]*")*)><f>([^<]*)</f>'
+)
+
+
+def _absolute(formula: bytes) -> bytes:
+    """Anchors every cell reference, so the formula means the same anywhere."""
+    return re.sub(
+        rb"(^|[^A-Za-z0-9_$.\"])(\$?)([A-Z]{1,3})(\$?)(\d+)(?![\d(A-Za-z])",
+        lambda m: m[1] + b'$' + m[3] + b'$' + m[5],
+        formula,
+    )
+
+
+def shared_formulas(xml: bytes) -> bytes:
+    """
+    Rewrites each column's repeated formula as one shared formula: the
+    first cell keeps the text, the others only point at it. The repeated
+    formulas are identical text, so anchoring their references keeps what
+    every cell computes.
+    """
+    groups = {}
+    for m in _FORMULA_CELL.finditer(xml):
+        groups.setdefault((m[1], m[4]), []).append(int(m[2]))
+
+    shared = {}
+    for (col, formula), rows in groups.items():
+        if len(rows) > 1:
+            ref = b'%s%d:%s%d' % (col, rows[0], col, rows[-1])
+            shared[col, formula] = (len(shared), rows[0], ref)
+    if not shared:
+        return xml
+
+    def rewrite(m):
+        group = shared.get((m[1], m[4]))
+        if group is None:
+            return m[0]
+        si, master, ref = group
+        cell = b'<c r="%s%s"%s>' % (m[1], m[2], m[3])
+        if int(m[2]) == master:
+            return cell + b'<f t="shared" ref="%s" si="%d">%s</f>' % (
+                ref, si, _absolute(m[4])
+            )
+        return cell + b'<f t="shared" si="%d"/>' % si
+
+    return _FORMULA_CELL.sub(rewrite, xml)
+
+
+def transform_part(profile, name: str, xml: bytes) -> bytes:
+    """The part `name` as `profile` stores it."""
+    if profile.shared_formulas and name.startswith('xl/worksheets/sheet'):
+        return shared_formulas(xml)
+    return xml
+
+
+def needs_repack(profile) -> bool:
+    """Whether XlsxWriter's own zip has to be rewritten for `profile`."""
+    return profile.level != XLSXWRITER_LEVEL or profile.shared_formulas
+
+
+def apply_profile(data: bytes, profile) -> bytes:
+    """Re-zips an XlsxWriter workbook with `profile`'s level and rewrites."""
+    if not needs_repack(profile):
+        return data
+    archive = ZipStream(level=profile.level)
+    chunks = []
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        for info in zf.infolist():
+            xml = transform_part(profile, info.filename, zf.read(info))
+            # Whole parts are at hand, so sizes go in the local headers
+            # and no data descriptors are needed
+            entry = RawEntry.compress(info.filename, xml, profile.level)
+            chunks.append(archive.add_raw(entry))
+    chunks.append(archive.finish())
+    return b''.join(chunks)
@@ -0,0 +1,43 @@
+# app/task_import.py
+"""
+Lazy readers for exported task records (CSV or JSON Lines).
+
+Both yield one dict per record, holding `date` plus the TASK_FIELDS keys,
+without reading the whole file, so they can be passed straight to
+generate_task_tracker(..., constant_memory=True). Records must already be
+in date order.
+"""
+import csv
+import json
+
+from app.layout import TASK_FIELDS
+
+_KEYS = ['date'] + TASK_FIELDS
+
+
+def _record(raw: dict) -> dict:
+    record = {key: raw.get(key) for key in _KEYS}
+    hours = record.get('hours')
+    if isinstance(hours, str):
+        record['hours'] = float(hours) if hours.strip() else None
+    return record
+
+
+def iter_csv(fh):
+    """Records from a CSV file with a header row naming the fields."""
+    for raw in csv.DictReader(fh):
+        yield _record(raw)
+
+
+def iter_jsonl(fh):
+    """Records from a file of one JSON object per line."""
+    for line in fh:
+        if line.strip():
+            yield _record(json.loads(line))
+
+
+def iter_task_file(path: str):
+    """Records from `path`, read as JSON Lines or CSV by its extension."""
+    reader = iter_jsonl if path.endswith(('.jsonl', '.ndjson')) else iter_csv
+    with open(path, newline='', encoding='utf-8') as fh:
+        yield from reader(fh)
@@ -0,0 +1,211 @@
+# app/task_store.py
+"""
+SQLite-backed store of tasks, used to pre-fill trackers.
+
+Tasks are indexed on (user, date) and (user, status), so reading one
+user's year is an index range scan whose cost depends on that user's tasks
+for the year, not on how many rows the store holds overall.
+"""
+import datetime
+import itertools
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+from app.layout import PRIORITIES, STATUSES, TASK_FIELDS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY,
+    user        TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    description TEXT NOT NULL,
+    priority    TEXT,
+    status      TEXT NOT NULL DEFAULT 'Pending',
+    hours       REAL,
+    went_well   TEXT,
+    missed      TEXT,
+    notes       TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_user_date ON tasks (user, date, id);
+CREATE INDEX IF NOT EXISTS tasks_user_status ON tasks (user, status);
+"""
+
+_COLUMNS = ['id', 'user', 'date'] + TASK_FIELDS
+
+
+class TaskFields(BaseModel):
+    date: Optional[datetime.date] = None
+    description: Optional[str] = Field(None, min_length=1)
+    priority: Optional[str] = None
+    status: Optional[str] = None
+    hours: Optional[float] = Field(None, ge=0)
+    went_well: Optional[str] = None
+    missed: Optional[str] = None
+    notes: Optional[str] = None
+
+    @field_validator('date', 'description', 'status', mode='before')
+    @classmethod
+    def not_null(cls, value, info):
+        # Stored as NOT NULL: a change can leave them out, but not clear them
+        if value is None:
+            raise ValueError(f"{info.field_name} cannot be null")
+        return value
+
+    @field_validator('priority')
+    @classmethod
+    def known_priority(cls, value):
+        if value is not None and value not in PRIORITIES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        return value
+
+    @field_validator('status')
+    @classmethod
+    def known_status(cls, value):
+        if value is not None and value not in STATUSES:
+            raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+        return value
+
+
+class TaskIn(TaskFields):
+    user: str = Field(min_length=1)
+    date: datetime.date
+    description: str = Field(min_length=1)
+    status: str = 'Pending'
+
+
+class TaskStore:
+    """One SQLite database file; each thread gets its own connection."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # The data directory is only created once a store is opened
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, task: dict) -> int:
+        fields = {k: task[k] for k in ['user', 'date'] + TASK_FIELDS if task.get(k) is not None}
+        fields['date'] = str(fields['date'])
+        names = ', '.join(fields)
+        marks = ', '.join('?' * len(fields))
+        with self._connect() as conn:
+            cur = conn.execute(
+                f'INSERT INTO tasks ({names}) VALUES ({marks})', list(fields.values())
+            )
+        return cur.lastrowid
+
+    def add_many(self, tasks) -> int:
+        """Bulk insert of (user, date, description, priority, status, hours) tuples."""
+        with self._connect() as conn:
+            cur = conn.executemany(
+                'INSERT INTO tasks (user, date, description, priority, status, hours) '
+                'VALUES (?, ?, ?, ?, ?, ?)', tasks
+            )
+        return cur.rowcount
+
+    def update(self, task_id: int, changes: dict) -> Optional[dict]:
+        changes = {k: v for k, v in changes.items() if k in ['date'] + TASK_FIELDS}
+        if 'date' in changes:
+            changes['date'] = str(changes['date'])
+        if changes:
+            assignments = ', '.join(f'{name} = ?' for name in changes)
+            with self._connect() as conn:
+                conn.execute(
+                    f'UPDATE tasks SET {assignments} WHERE id = ?',
+                    list(changes.values()) + [task_id],
+                )
+        return self.get(task_id)
+
+    def get(self, task_id: int) -> Optional[dict]:
+        row = self._connect().execute(
+            f'SELECT {", ".join(_COLUMNS)} FROM tasks WHERE id = ?', (task_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def query(self, user: str, start=None, end=None, status=None, limit=1000) -> list:
+        """Tasks of `user` in date order, optionally within [start, end)."""
+        sql = f'SELECT {", ".join(_COLUMNS)} FROM tasks WHERE user = ?'
+        params = [user]
+        if start is not None:
+            sql += ' AND date >= ?'
+            params.append(str(start))
+        if end is not None:
+            sql += ' AND date < ?'
+            params.append(str(end))
+        if status is not None:
+            sql += ' AND status = ?'
+            params.append(status)
+        sql += ' ORDER BY date, id LIMIT ?'
+        params.append(limit)
+        return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def iter_year(self, user: str, year: int, batch: int = 500):
+        """Yields every task of `user` in `year` in date order, from a cursor."""
+        cur = self._connect().execute(
+            f'SELECT {", ".join(_COLUMNS)} FROM tasks '
+            'WHERE user = ? AND date >= ? AND date < ? ORDER BY date, id',
+            (user, f'{year:04d}-01-01', f'{year + 1:04d}-01-01'),
+        )
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path: str) -> TaskStore:
+    """The process-wide TaskStore for `path`, created on first use."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = TaskStore(path)
+        return store
+
+
+def build_user_tracker(db_path: str, user: str, year: int, goals=None,
+                       phases=None, profile=None, layout_mode=None,
+                       rows_per_day=1, reproducible=False, end_year=None) -> bytes:
+    """
+    The tracker for `year` (to `end_year`, if given), pre-filled with
+    `user`'s stored tasks.
+    """
+    from app.excel_generator import build_workbook_bytes
+
+    store = open_store(db_path)
+    tasks = itertools.chain.from_iterable(
+        store.iter_year(user, y) for y in range(year, (end_year or year) + 1)
+    )
+    return build_workbook_bytes(
+        year, goals, tasks, phases=phases, profile=profile,
+        layout_mode=layout_mode, rows_per_day=rows_per_day, reproducible=reproducible,
+        end_year=end_year,
+    )
+
+
+def export_user_tracker(db_path: str, user: str, year: int, fmt: str,
+                        goals=None) -> bytes:
+    """The plain-data export (see app.export) of `user`'s tracker for `year`."""
+    from app.export import stream_export
+
+    store = open_store(db_path)
+    return b''.join(stream_export(fmt, year, goals, store.iter_year(user, year)))
@@ -0,0 +1,163 @@
+# app/template_engine.py
+"""
+Template-and-patch engine for blank trackers.
+
+Two years with the same length and the same weekday on 1 January produce
+the same workbook apart from a handful of year-specific values: the year in
+the sheet titles, the date serials in column A of the month sheets and the
+year on the Yearly Report.
+So the first request for each calendar shape builds a skeleton with the
+full xlsxwriter generator, and every later year of that shape is produced by
+patching those values straight in the skeleton's XML parts.
+
+Parts that never need a patch are compressed once per skeleton and copied
+into every output as raw deflate data; the rest are patched and compressed
+one part at a time, so the zip can be streamed while it is being built.
+Entries are written the way app.zipstream.normalize_zip() writes them, so a
+reproducible render is the same file, byte for byte, as a reproducible full
+build.
+Each output profile (app.layout.PROFILES) has its own skeletons, compressed
+at that profile's level.
+"""
+import calendar
+import re
+import threading
+import zipfile
+from datetime import date
+from io import BytesIO
+
+from app.excel_generator import PhaseTimer, build_workbook_bytes, created_time, goals_key
+from app.layout import get_profile
+from app.zipstream import RawEntry, ZipStream
+
+# Excel's 1900 date system is only linear from March 1900 onwards, and the
+# title patch assumes four-digit years; anything else takes the slow path.
+MIN_YEAR = 1901
+MAX_YEAR = 9999
+
+_SERIAL_CELL = re.compile(rb'(<c r="A\d+"(?: s="\d+")?><v>)(\d+)(</v>)')
+_CREATED = re.compile(rb'(<dcterms:(?:created|modified) [^>]*>)[^<]*(<)')
+_SHEET = re.compile(rb'<sheet name="([^"]+)" sheetId="\d+" r:id="(rId\d+)"/>')
+_REL = re.compile(rb'<Relationship Id="(rId\d+)" Type="[^"]+/worksheet" Target="([^"]+)"/>')
+
+
+class Skeleton:
+    """The zip parts of one fully generated workbook, by role."""
+
+    def __init__(self, year: int, data: bytes, level: int = 6):
+        self.year = year
+        self.data = data
+        self.level = level
+        with zipfile.ZipFile(BytesIO(data)) as zf:
+            self.parts = [(info.filename, zf.read(info)) for info in zf.infolist()]
+        parts = dict(self.parts)
+
+        targets = dict(_REL.findall(parts['xl/_rels/workbook.xml.rels']))
+        sheets = {
+            name.decode(): 'xl/' + targets[rid].decode()
+            for name, rid in _SHEET.findall(parts['xl/workbook.xml'])
+        }
+        self.month_parts = {sheets[calendar.month_name[m]] for m in range(1, 13)}
+        self.yearly_part = sheets['Yearly Report']
+
+        # Pre-compressed copies of the parts that are the same for every year
+        self.static = {
+            name: RawEntry.compress(name, xml, level)
+            for name, xml in self.parts
+            if not self._needs_patch(name)
+        }
+
+    def _needs_patch(self, name: str) -> bool:
+        return (
+            name in self.month_parts
+            or name == self.yearly_part
+            or name in ('xl/sharedStrings.xml', 'docProps/core.xml')
+        )
+
+
+_skeletons = {}
+_skeletons_lock = threading.Lock()
+
+
+def calendar_shape(year: int) -> tuple:
+    """Years with equal shape share every day name and every month length."""
+    return calendar.isleap(year), date(year, 1, 1).weekday()
+
+
+def _get_skeleton(year: int, goals, profile) -> Skeleton:
+    key = (calendar_shape(year), goals_key(goals), profile.name)
+    skeleton = _skeletons.get(key)
+    if skeleton is None:
+        with _skeletons_lock:
+            skeleton = _skeletons.get(key)
+            if skeleton is None:
+                data = build_workbook_bytes(year, goals, profile=profile.name)
+                skeleton = Skeleton(year, data, profile.level)
+                _skeletons[key] = skeleton
+    return skeleton
+
+
+def _patch_part(skeleton: Skeleton, name: str, xml: bytes, year: int, days: int,
+                reproducible: bool = False) -> bytes:
+    if name in skeleton.month_parts:
+        xml = _SERIAL_CELL.sub(
+            lambda m: m[1] + str(int(m[2]) + days).encode() + m[3], xml
+        )
+    elif name == skeleton.yearly_part:
+        xml = xml.replace(
+            b'<c r="A3"><v>%d</v></c>' % skeleton.year,
+            b'<c r="A3"><v>%d</v></c>' % year,
+        )
+    elif name == 'xl/sharedStrings.xml':
+        xml = re.sub(rb'(?<= )%d(?=[ <])' % skeleton.year, b'%d' % year, xml)
+    elif name == 'docProps/core.xml':
+        created = created_time(reproducible).strftime('%Y-%m-%dT%H:%M:%SZ').encode()
+        xml = _CREATED.sub(lambda m: m[1] + created + m[2], xml)
+    return xml
+
+
+def stream_workbook(year: int, goals=None, phases=None, profile=None,
+                    reproducible=False):
+    """
+    Yields the xlsx file for `year` as a sequence of byte chunks. The result
+    matches build_workbook_bytes(year, goals, profile=profile) part for part,
+    and with `reproducible` byte for byte.
+
+    If `phases` is a dict, the seconds spent getting the skeleton (a full
+    build the first time a calendar shape is seen), patching and zipping
+    are added to it; time spent waiting for the consumer is left out.
+    """
+    profile = get_profile(profile)
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        yield build_workbook_bytes(
+            year, goals, phases=phases, profile=profile.name, reproducible=reproducible
+        )
+        return
+
+    timer = PhaseTimer(phases)
+    skeleton = _get_skeleton(year, goals, profile)
+    timer.mark('skeleton')
+    days = (date(year, 1, 1) - date(skeleton.year, 1, 1)).days
+    archive = ZipStream(skeleton.level)
+    for name, xml in skeleton.parts:
+        raw = skeleton.static.get(name)
+        if raw is None:
+            xml = _patch_part(skeleton, name, xml, year, days, reproducible)
+            timer.mark('patch')
+            # The whole part is at hand, so its sizes go in the local header
+            raw = RawEntry.compress(name, xml, skeleton.level)
+        chunk = archive.add_raw(raw)
+        timer.mark('zip')
+        yield chunk
+        timer.restart()
+    yield archive.finish()
+
+
+def render_workbook(year: int, goals=None, profile=None, reproducible=False) -> bytes:
+    """Like stream_workbook(), but returns the whole file at once."""
+    return b''.join(stream_workbook(year, goals, profile=profile, reproducible=reproducible))
+
+
+def clear_skeletons():
+    with _skeletons_lock:
+        _skeletons.clear()
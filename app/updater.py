@@ -0,0 +1,369 @@
+# app/updater.py
+"""
+In-place updates of a tracker the user already has.
+
+A change set can set new goals and add tasks. Only the zip parts the change
+touches are decompressed and rewritten:
+
+  - the Goals sheet, when goals change;
+  - the month sheets of the added tasks;
+  - the three report sheets, only when a month gained rows, so that their
+    ranges over that month reach the new rows;
+  - xl/workbook.xml, flagged for a full recalculation on open, as the
+    stored formula results no longer hold.
+
+Every other part, the shared strings included, is copied into the new zip
+as its original compressed bytes. New text is written as inline strings,
+so the shared string table never has to be rebuilt.
+
+An added task fills the first row of its day whose Task Description is
+empty. When the day has none, a row is inserted after the day's last row,
+copying its date, day, formula and week cells; the rows below move down,
+and their Week No formulas with them.
+"""
+import calendar
+import datetime
+import re
+import zipfile
+from io import BytesIO
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from pydantic import BaseModel, field_validator
+
+from app.analyzer import TrackerFormatError, sheet_parts, spans_years
+from app.layout import (
+    DEFAULT_GOALS, FIRST_DATA_ROW, GOAL_ROWS, GOALS_SHEET, PLAN, TABLE_SHEET,
+    WEEK_FORMULA, col_letter,
+)
+from app.task_store import TaskFields
+from app.zipstream import RawEntry, ZipStream, iter_raw_entries
+
+_EXCEL_EPOCH = datetime.date(1899, 12, 30).toordinal()
+
+_ROW = re.compile(rb'<row r="(\d+)"([^>]*?)(?:/>|>(.*?)</row>)', re.S)
+_CELL = re.compile(rb'<c r="([A-Z]{1,3})(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_VALUE = re.compile(rb'<v>([^<]*)</v>')
+_TYPE = re.compile(rb' t="[^"]*"')
+_RANGE_ATTR = re.compile(rb'( (?:sqref|ref)=")([^"]+)(")')
+_RANGE = re.compile(rb'(\$?[A-Z]{1,3}\$?)(\d+)(?::(\$?[A-Z]{1,3}\$?)(\d+))?')
+_CALC_PR = re.compile(rb'<calcPr\b([^>]*?)/>')
+_COL = re.compile(rb'<col min="(\d+)" max="(\d+)"[^>]*? style="(\d+)"')
+
+_DATE_COL = col_letter(PLAN.month_cols['date']).encode()
+_DESC_COL = col_letter(PLAN.month_cols['description']).encode()
+_WEEK_COL = col_letter(PLAN.month_cols['week']).encode()
+# (column letter, record field, kind) of the task columns
+_TASK_CELLS = [(col_letter(col).encode(), field, kind) for col, field, kind, _ in PLAN.task_cells]
+# Goals sheet row (1-based) of each goal, the derived daily one included
+_GOAL_CELLS = {key: row for row, (_, key) in enumerate(GOAL_ROWS, start=4)}
+
+# Formula text of the per-row formula columns, written into inserted rows
+_ROW_FORMULAS = {
+    col_letter(col).encode(): escape(formula.lstrip('=')).encode()
+    for col, formula, _ in PLAN.row_formulas
+}
+
+_MONTHS = list(calendar.month_name[1:])
+
+
+class NewTask(TaskFields):
+    date: datetime.date
+    description: str
+
+
+class TrackerChanges(BaseModel):
+    goals: Optional[Dict[str, int]] = None
+    tasks: List[NewTask] = []
+
+    @field_validator('goals')
+    @classmethod
+    def known_goals(cls, goals):
+        unknown = set(goals or ()) - set(DEFAULT_GOALS)
+        if unknown:
+            raise ValueError(f"unknown goals: {', '.join(sorted(unknown))}")
+        return goals
+
+
+def _col_index(letters: bytes) -> int:
+    index = 0
+    for ch in letters:
+        index = index * 26 + ch - 64
+    return index
+
+
+class Shift:
+    """Where rows of one sheet end up after rows are inserted into it."""
+
+    def __init__(self, inserted: dict):
+        # original row (1-based) -> rows inserted right after it
+        self.inserted = inserted
+
+    def row(self, r: int) -> int:
+        return r + sum(n for after, n in self.inserted.items() if after < r)
+
+    def end(self, r: int) -> int:
+        """The new last row of a range that ended at `r`, new rows included."""
+        return self.row(r) + self.inserted.get(r, 0)
+
+    def refs(self, text: bytes) -> bytes:
+        """Moves every cell reference and range in `text`."""
+        def move(m):
+            if m[3] is None:
+                return m[1] + b'%d' % self.row(int(m[2]))
+            return b'%s%d:%s%d' % (
+                m[1], self.row(int(m[2])), m[3], self.end(int(m[4]))
+            )
+        return _RANGE.sub(move, text)
+
+
+def _cells(body: bytes) -> dict:
+    """{column letters: (attributes, inner xml or None)}, in sheet order."""
+    return {m[1]: (m[3], m[4]) for m in _CELL.finditer(body or b'')}
+
+
+def _render_row(r: int, attrs: bytes, cells: dict) -> bytes:
+    out = [b'<row r="%d"%s>' % (r, attrs)]
+    for col in sorted(cells, key=_col_index):
+        cell_attrs, inner = cells[col]
+        if inner is None:
+            out.append(b'<c r="%s%d"%s/>' % (col, r, cell_attrs))
+        else:
+            out.append(b'<c r="%s%d"%s>%s</c>' % (col, r, cell_attrs, inner))
+    out.append(b'</row>')
+    return b''.join(out)
+
+
+def _style(attrs: bytes) -> bytes:
+    """Only the style of a cell's attributes, dropping its value type."""
+    return _TYPE.sub(b'', attrs)
+
+
+def _task_cell(attrs: bytes, kind: str, value):
+    attrs = _style(attrs)
+    if value is None or value == '':
+        return attrs, None
+    if kind == 'number':
+        return attrs, b'<v>%s</v>' % repr(float(value)).encode()
+    text = escape(str(value)).encode('utf-8')
+    space = b' xml:space="preserve"' if text != text.strip() else b''
+    return attrs + b' t="inlineStr"', b'<is><t%s>%s</t></is>' % (space, text)
+
+
+def _column_styles(head: bytes) -> dict:
+    """
+    {column letters: style attribute} of the columns that have a default
+    format, which blank cells left out of the sheet display with.
+    """
+    styles = {}
+    for m in _COL.finditer(head):
+        for col in range(int(m[1]), int(m[2]) + 1):
+            styles[col_letter(col - 1).encode()] = b' s="%s"' % m[3]
+    return styles
+
+
+def _fill(cells: dict, task: dict, styles: dict) -> dict:
+    cells = dict(cells)
+    for col, field, kind in _TASK_CELLS:
+        attrs = cells.get(col, (styles.get(col, b''), None))[0]
+        cells[col] = _task_cell(attrs, kind, task.get(field))
+    return cells
+
+
+def _clone(cells: dict, task: dict, styles: dict) -> dict:
+    """A new row for `task`, with the date, day, formula and week of `cells`."""
+    cells = _fill(cells, task, styles)
+    for col, formula in _ROW_FORMULAS.items():
+        if col in cells:
+            # A shared formula cell cannot be copied; write the formula out
+            attrs, inner = cells[col]
+            cached = _VALUE.search(inner or b'')
+            cells[col] = (attrs, b'<f>%s</f>%s' % (formula, cached[0] if cached else b''))
+    return cells
+
+
+def _moved(cells: dict, r: int) -> dict:
+    """`cells` with its Week No formula, if it has one, reading row `r`."""
+    attrs, inner = cells.get(_WEEK_COL, (b'', None))
+    if not inner or b'<f>' not in inner:
+        # Trackers from before Week No was a formula hold the number
+        return cells
+    formula = WEEK_FORMULA.format(date=f"{_DATE_COL.decode()}{r}")
+    cached = _VALUE.search(inner)
+    cells = dict(cells)
+    cells[_WEEK_COL] = (attrs, b'<f>%s</f>%s' % (
+        escape(formula.lstrip('=')).encode(), cached[0] if cached else b''
+    ))
+    return cells
+
+
+def _has_task(cells: dict) -> bool:
+    inner = cells.get(_DESC_COL, (b'', None))[1]
+    return bool(inner) and inner not in (b'<v></v>', b'<is><t></t></is>')
+
+
+def _serial_date(cells: dict) -> Optional[datetime.date]:
+    inner = cells.get(_DATE_COL, (b'', None))[1]
+    m = _VALUE.search(inner or b'')
+    if m is None:
+        return None
+    try:
+        return datetime.date.fromordinal(_EXCEL_EPOCH + int(float(m[1])))
+    except ValueError:
+        return None
+
+
+def update_month(xml: bytes, tasks: list):
+    """
+    Adds `tasks` (dicts, in date order) to one month sheet's XML. Returns
+    the new XML and a Shift describing any inserted rows.
+    """
+    start = xml.find(b'<sheetData>')
+    end = xml.find(b'</sheetData>')
+    if start < 0 or end < 0:
+        raise TrackerFormatError("month sheet has no rows")
+    rows = [
+        (int(m[1]), m[2], _cells(m[3])) for m in _ROW.finditer(xml, start, end)
+    ]
+    styles = _column_styles(xml[:start])
+
+    by_date = {}
+    for index, (r, _, cells) in enumerate(rows):
+        if r > FIRST_DATA_ROW:
+            day = _serial_date(cells)
+            if day is not None:
+                by_date.setdefault(day, []).append(index)
+
+    extra = {}
+    for task in tasks:
+        indexes = by_date.get(task['date'])
+        if not indexes:
+            raise TrackerFormatError(f"the tracker has no row for {task['date']}")
+        for index in indexes:
+            r, attrs, cells = rows[index]
+            if not _has_task(cells):
+                rows[index] = (r, attrs, _fill(cells, task, styles))
+                break
+        else:
+            extra.setdefault(indexes[-1], []).append(task)
+
+    shift = Shift({rows[index][0]: len(added) for index, added in extra.items()})
+    body = []
+    for index, (r, attrs, cells) in enumerate(rows):
+        new_r = shift.row(r)
+        if new_r != r:
+            cells = _moved(cells, new_r)
+        body.append(_render_row(new_r, attrs, cells))
+        for n, task in enumerate(extra.get(index, ()), start=1):
+            clone = _moved(_clone(cells, task, styles), new_r + n)
+            body.append(_render_row(new_r + n, attrs, clone))
+    body = b''.join(body)
+
+    head, tail = xml[:start], xml[end:]
+    if shift.inserted:
+        # Dimension, merged cells, validations, conditional formats and
+        # shared formula ranges all grow with the inserted rows
+        move = lambda m: m[1] + shift.refs(m[2]) + m[3]
+        head, body, tail = (_RANGE_ATTR.sub(move, part) for part in (head, body, tail))
+    return head + b'<sheetData>' + body + tail, shift
+
+
+def update_goals(xml: bytes, goals: dict) -> bytes:
+    values = dict(goals)
+    if 'weekly' in values:
+        values['daily'] = int(values['weekly'] / 7)
+    for key, value in values.items():
+        ref = b'B%d' % _GOAL_CELLS[key]
+        pattern = re.compile(rb'<c r="%s"([^>]*?)(?:/>|>.*?</c>)' % ref, re.S)
+        cell = lambda m: b'<c r="%s"%s><v>%d</v></c>' % (ref, _style(m[1]), value)
+        xml, found = pattern.subn(cell, xml, count=1)
+        if not found:
+            raise TrackerFormatError(f"Goals sheet has no {key} goal cell")
+    return xml
+
+
+def shift_sheet_refs(xml: bytes, sheet: str, shift: Shift) -> bytes:
+    """Moves the ranges over `sheet` in every formula of another sheet's XML."""
+    name = re.escape(sheet.encode())
+    ref = re.compile(rb"((?:'%s'|%s)!)([$A-Z0-9:]+)" % (name, name))
+
+    def formula(m):
+        return m[1] + ref.sub(lambda r: r[1] + shift.refs(r[2]), m[2]) + m[3]
+
+    return re.sub(rb'(<f[^>]*>)([^<]*)(</f>)', formula, xml)
+
+
+def full_calc_on_load(xml: bytes) -> bytes:
+    """Flags workbook.xml so that Excel recalculates every formula on open."""
+    def flag(m):
+        attrs = re.sub(rb' fullCalcOnLoad="[^"]*"', b'', m[1])
+        return b'<calcPr%s fullCalcOnLoad="1"/>' % attrs
+    xml, found = _CALC_PR.subn(flag, xml, count=1)
+    if found:
+        return xml
+    for anchor in (b'</definedNames>', b'</sheets>'):
+        at = xml.find(anchor)
+        if at >= 0:
+            at += len(anchor)
+            return xml[:at] + b'<calcPr fullCalcOnLoad="1"/>' + xml[at:]
+    raise TrackerFormatError("workbook.xml has no sheet list")
+
+
+def update_tracker(data: bytes, changes: TrackerChanges, level: int = 6) -> bytes:
+    """The tracker in `data` with `changes` applied; see the module docstring."""
+    try:
+        zf = zipfile.ZipFile(BytesIO(data))
+    except zipfile.BadZipFile:
+        raise TrackerFormatError("upload is not an xlsx file")
+    with zf:
+        try:
+            parts = sheet_parts(zf)
+        except KeyError:
+            raise TrackerFormatError("workbook structure not recognised")
+        if spans_years(parts):
+            raise TrackerFormatError("trackers spanning several years cannot be updated in place")
+        if TABLE_SHEET in parts and _MONTHS[0] not in parts:
+            raise TrackerFormatError("trackers in the table layout cannot be updated in place")
+        missing = [name for name in [GOALS_SHEET] + _MONTHS if name not in parts]
+        if missing:
+            raise TrackerFormatError(f"missing sheets: {', '.join(missing)}")
+
+        by_month = {}
+        for task in sorted(changes.tasks, key=lambda t: t.date):
+            record = task.model_dump()
+            by_month.setdefault(_MONTHS[task.date.month - 1], []).append(record)
+
+        rewritten = {}
+        if changes.goals:
+            part = parts[GOALS_SHEET]
+            rewritten[part] = update_goals(zf.read(part), changes.goals)
+
+        shifts = {}
+        for sheet, tasks in by_month.items():
+            xml, shift = update_month(zf.read(parts[sheet]), tasks)
+            rewritten[parts[sheet]] = xml
+            if shift.inserted:
+                shifts[sheet] = shift
+
+        if shifts:
+            months = {parts[name] for name in [GOALS_SHEET] + _MONTHS}
+            for name, part in parts.items():
+                if part in months:
+                    continue
+                xml = rewritten.get(part) or zf.read(part)
+                for sheet, shift in shifts.items():
+                    xml = shift_sheet_refs(xml, sheet, shift)
+                rewritten[part] = xml
+
+        if rewritten:
+            rewritten['xl/workbook.xml'] = full_calc_on_load(zf.read('xl/workbook.xml'))
+
+    archive = ZipStream(level)
+    chunks = []
+    for entry in iter_raw_entries(data):
+        xml = rewritten.get(entry.name)
+        if xml is not None:
+            entry = RawEntry.compress(entry.name, xml, level)
+        chunks.append(archive.add_raw(entry))
+    chunks.append(archive.finish())
+    return b''.join(chunks)
@@ -0,0 +1,145 @@
+# app/workers.py
+import asyncio
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    """Raised when the generation queue is full; carries a Retry-After hint."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"generation queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _collect(fn, *args) -> bytes:
+    return b''.join(fn(*args))
+
+
+def _started(fn, *args):
+    """Runs fn(*args) on a worker and reports when the worker picked it up."""
+    return time.time(), fn(*args)
+
+
+class GenerationPool:
+    """
+    Runs blocking workbook generation off the event loop.
+
+    At most `workers` jobs run at once and at most `queue_depth` more wait
+    for a worker; anything beyond that is rejected immediately with
+    PoolSaturated instead of queueing up latency. Counters are only touched
+    from the event loop thread, so they need no locking.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, kind: str = "thread"):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"unknown pool kind: {kind!r}")
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.kind = kind
+        executor_cls = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+        self.executor = executor_cls(max_workers=workers)
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        # Moving average of job duration, used for Retry-After estimates
+        self.avg_seconds = 0.0
+
+    def retry_after(self) -> int:
+        backlog = self.in_flight / self.workers
+        return max(1, math.ceil(backlog * self.avg_seconds))
+
+    def admit(self):
+        """
+        Reserves a place for one job, or raises PoolSaturated. Every admit()
+        must be followed by exactly one stream() or run(..., admitted=True).
+        """
+        if self.in_flight >= self.workers + self.queue_depth:
+            self.rejected += 1
+            raise PoolSaturated(self.retry_after())
+        self.in_flight += 1
+
+    def _finished(self, started: float):
+        elapsed = time.perf_counter() - started
+        self.avg_seconds = elapsed if not self.completed else (
+            0.8 * self.avg_seconds + 0.2 * elapsed
+        )
+        self.completed += 1
+
+    async def run(self, fn, *args, admitted=False, timings=None):
+        """
+        Runs fn(*args) on the pool. If `timings` is a dict, the time the job
+        waited for a worker is stored in it as 'queue'.
+        """
+        if not admitted:
+            self.admit()
+        started = time.perf_counter()
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            picked_up, result = await loop.run_in_executor(
+                self.executor, _started, fn, *args
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self._finished(started)
+        if timings is not None:
+            timings['queue'] = max(0.0, picked_up - submitted)
+        return result
+
+    async def stream(self, fn, *args, timings=None):
+        """
+        Iterates the generator `fn(*args)` on the pool, yielding its chunks.
+        Call admit() first so a full queue is reported before the response
+        starts. A process pool cannot hand a generator across processes, so
+        there the chunks are joined in the worker and arrive as one.
+        `timings` gets the wait for a worker as 'queue', like in run().
+        """
+        started = time.perf_counter()
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            if self.kind == "process":
+                picked_up, data = await loop.run_in_executor(
+                    self.executor, _started, _collect, fn, *args
+                )
+                if timings is not None:
+                    timings['queue'] = max(0.0, picked_up - submitted)
+                yield data
+            else:
+                chunks = fn(*args)
+                picked_up, chunk = await loop.run_in_executor(
+                    self.executor, _started, next, chunks, None
+                )
+                if timings is not None:
+                    timings['queue'] = max(0.0, picked_up - submitted)
+                while chunk is not None:
+                    yield chunk
+                    chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self._finished(started)
+
+    def stats(self) -> dict:
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'in_flight': self.in_flight,
+            'queued': max(0, self.in_flight - self.workers),
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'avg_seconds': round(self.avg_seconds, 4),
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,162 @@
+# app/zipstream.py
+"""
+Minimal forward-only zip writer.
+
+Entries are emitted as chunks of bytes that can be sent to a client straight
+away: compressed entries use a data descriptor after the data, so nothing
+has to be seeked back and patched, and entries that were compressed earlier
+can be copied in as raw deflate data without recompressing them.
+iter_raw_entries() reads the members of an existing zip in that raw form,
+and normalize_zip() rewrites a whole zip with this module's fixed headers.
+"""
+import struct
+import zipfile
+import zlib
+from io import BytesIO
+
+# Every entry carries Excel's timestamp of 1/1/1980, like XlsxWriter does
+DOS_TIME = 0
+DOS_DATE = (0 << 9) | (1 << 5) | 1
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_MAX_32 = 0xFFFFFFFF
+
+
+class RawEntry:
+    """A pre-compressed entry that can be written into any number of zips."""
+
+    __slots__ = ('name', 'method', 'crc', 'compress_size', 'file_size', 'data')
+
+    def __init__(self, name, method, crc, compress_size, file_size, data):
+        self.name = name
+        self.method = method
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.data = data
+
+    @classmethod
+    def compress(cls, name: str, data: bytes, level: int = 6):
+        if level == 0:
+            return cls(name, ZIP_STORED, zlib.crc32(data), len(data), len(data), data)
+        packed = _deflater(level)
+        packed = packed.compress(data) + packed.flush()
+        return cls(name, ZIP_DEFLATED, zlib.crc32(data), len(packed), len(data), packed)
+
+
+def iter_raw_entries(data: bytes):
+    """
+    Yields a RawEntry per member of the zip in `data`, in archive order,
+    holding its compressed bytes as they are; nothing is decompressed.
+    """
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        infos = zf.infolist()
+    view = memoryview(data)
+    for info in infos:
+        offset = info.header_offset
+        name_len, extra_len = struct.unpack_from('<HH', data, offset + 26)
+        start = offset + 30 + name_len + extra_len
+        yield RawEntry(
+            info.filename, info.compress_type, info.CRC, info.compress_size,
+            info.file_size, bytes(view[start:start + info.compress_size]),
+        )
+
+
+def normalize_zip(data: bytes) -> bytes:
+    """
+    The zip in `data` with every header written the way ZipStream writes
+    it: fixed timestamps, no file modes or host system, no extra fields.
+    Members keep their order and their compressed bytes as they are.
+    """
+    archive = ZipStream()
+    chunks = [archive.add_raw(entry) for entry in iter_raw_entries(data)]
+    chunks.append(archive.finish())
+    return b''.join(chunks)
+
+
+def _deflater(level):
+    return zlib.compressobj(level, zlib.DEFLATED, -15)
+
+
+class ZipStream:
+    """
+    Builds a zip archive as a sequence of byte chunks.
+
+    Each `add_*` call returns or yields the bytes for one entry; `finish()`
+    returns the central directory that has to come last.
+    """
+
+    def __init__(self, level: int = 6):
+        self.level = level
+        self._records = []
+        self._offset = 0
+
+    def _local_header(self, name, flags, method, crc, csize, usize):
+        return struct.pack(
+            '<IHHHHHIIIHH', 0x04034B50, 20, flags, method, DOS_TIME, DOS_DATE,
+            crc, csize, usize, len(name), 0,
+        ) + name
+
+    def _record(self, name, flags, method, crc, csize, usize, size_on_wire):
+        if self._offset > _MAX_32 or csize > _MAX_32 or usize > _MAX_32:
+            raise ValueError('zip64 archives are not supported')
+        self._records.append((name, flags, method, crc, csize, usize, self._offset))
+        self._offset += size_on_wire
+
+    def add_raw(self, entry: RawEntry) -> bytes:
+        """Copies an already compressed entry, sizes known up front."""
+        name = entry.name.encode('utf-8')
+        flags = _FLAG_UTF8 if not name.isascii() else 0
+        header = self._local_header(
+            name, flags, entry.method, entry.crc, entry.compress_size, entry.file_size
+        )
+        self._record(
+            name, flags, entry.method, entry.crc, entry.compress_size,
+            entry.file_size, len(header) + entry.compress_size,
+        )
+        return header + entry.data
+
+    def add(self, name: str, chunks):
+        """Compresses `chunks` on the fly, yielding output as it is produced."""
+        name = name.encode('utf-8')
+        flags = _FLAG_DATA_DESCRIPTOR | (_FLAG_UTF8 if not name.isascii() else 0)
+        method = ZIP_DEFLATED if self.level else ZIP_STORED
+        header = self._local_header(name, flags, method, 0, 0, 0)
+        yield header
+
+        crc = csize = usize = 0
+        packer = _deflater(self.level) if self.level else None
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            usize += len(chunk)
+            if packer is not None:
+                chunk = packer.compress(chunk)
+            if chunk:
+                csize += len(chunk)
+                yield chunk
+        if packer is not None:
+            tail = packer.flush()
+            csize += len(tail)
+            yield tail
+
+        yield struct.pack('<IIII', 0x08074B50, crc, csize, usize)
+        self._record(name, flags, method, crc, csize, usize, len(header) + csize + 16)
+
+    def finish(self) -> bytes:
+        directory = []
+        for name, flags, method, crc, csize, usize, offset in self._records:
+            directory.append(struct.pack(
+                '<IHHHHHHIIIHHHHHII', 0x02014B50, 20, 20, flags, method,
+                DOS_TIME, DOS_DATE, crc, csize, usize, len(name), 0, 0, 0, 0, 0,
+                offset,
+            ) + name)
+        directory = b''.join(directory)
+        end = struct.pack(
+            '<IHHHHIIH', 0x06054B50, 0, 0, len(self._records), len(self._records),
+            len(directory), self._offset, 0,
+        )
+        return directory + end
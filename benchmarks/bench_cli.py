@@ -0,0 +1,60 @@
+"""
+Scaling of the command-line generator with worker processes.
+
+    python benchmarks/bench_cli.py [--years 2000-2099] [--users 2]
+        [--jobs 1,2,4,8]
+
+Generates every year of --years for --users labelled users with
+`python -m app.cli`, once per --jobs value, into a fresh directory each
+time, and prints files per second and the speed-up over one worker. A
+second run at the largest worker count with --skip-unchanged shows the
+cost of a run with nothing to do.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_cli(args, out_dir):
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "app.cli", *args, "--out-dir", out_dir, "--quiet"],
+        cwd=ROOT, check=True,
+    )
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", default="2000-2099")
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--jobs", default=",".join(
+        str(j) for j in (1, 2, 4, 8, 16) if j <= (os.cpu_count() or 1)
+    ))
+    args = parser.parse_args(argv)
+
+    cli_args = [args.years]
+    for n in range(args.users):
+        cli_args += ["--user", f"user{n}"]
+    first, _, last = args.years.partition("-")
+    files = (int(last or first) - int(first) + 1) * max(args.users, 1)
+
+    print(f"{files} files, {os.cpu_count()} CPUs")
+    print(f"{'jobs':>5}{'seconds':>10}{'files/s':>10}{'speed-up':>10}")
+    base = None
+    for jobs in (int(j) for j in args.jobs.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            seconds = run_cli(cli_args + ["--jobs", str(jobs)], tmp)
+            base = base or seconds
+            print(f"{jobs:>5}{seconds:>10.1f}{files / seconds:>10.1f}{base / seconds:>9.2f}x")
+            unchanged = run_cli(cli_args + ["--jobs", str(jobs), "--skip-unchanged"], tmp)
+    print(f"re-run with --skip-unchanged: {unchanged:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
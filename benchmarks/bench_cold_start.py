@@ -0,0 +1,139 @@
+"""
+Cold-start profile of the web app: import time and first landing-page hit.
+
+    python benchmarks/bench_cold_start.py [--runs 15] [--before-rev <git-rev>]
+        [--budget-ms 1500]
+
+Each run starts a fresh interpreter that imports app.main and serves one
+`GET /` through the ASGI interface, the way a serverless cold start does;
+the p50 of those wall times is reported. A `python -X importtime` profile of
+`import app.main` lists the slowest imports.
+
+The script exits non-zero when importing app.main takes longer than
+--budget-ms, or when XlsxWriter or Jinja2 are loaded before the first
+/generate. With --before-rev the same runs are made on that revision,
+exported to a temporary directory, for comparison.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the landing page must not pull in
+FORBIDDEN = ("xlsxwriter", "jinja2")
+
+_FIRST_HIT = r"""
+import asyncio, sys
+from app.main import app
+
+async def get(path):
+    sent = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        sent.append(message)
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "headers": [], "http_version": "1.1",
+        "scheme": "http", "server": ("bench", 80), "client": ("bench", 1),
+        "root_path": "",
+    }
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        pass
+    return sent[0]["status"] if sent else None
+
+status = asyncio.run(get("/"))
+print(status, ",".join(m for m in %r if m in sys.modules))
+""" % (FORBIDDEN,)
+
+
+def first_hit(root, runs):
+    """p50 wall time of a fresh interpreter serving GET /, plus one result."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", _FIRST_HIT], cwd=root,
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        times.append(time.perf_counter() - started)
+    status, loaded = out[0], (out[1].split(",") if len(out) > 1 else [])
+    return statistics.median(times), status, loaded
+
+
+def import_profile(root):
+    """{module: (self us, cumulative us)} from `python -X importtime`."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=root, check=True, capture_output=True, text=True,
+    ).stderr
+    profile = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        profile[name.strip()] = (int(self_us), int(cumulative))
+    return profile
+
+
+def export_rev(rev, dest):
+    archive = subprocess.check_output(["git", "archive", rev], cwd=ROOT)
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(dest)
+
+
+def report(label, root, runs, top):
+    profile = import_profile(root)
+    p50, status, loaded = first_hit(root, runs)
+    total_ms = profile.get("app.main", (0, 0))[1] / 1000
+    print(f"== {label}")
+    print(f"import app.main: {total_ms:.0f} ms; GET / cold start p50: {p50 * 1000:.0f} ms "
+          f"(status {status}); loaded: {', '.join(loaded) or 'none of ' + '/'.join(FORBIDDEN)}")
+    slowest = sorted(profile.items(), key=lambda kv: kv[1][0], reverse=True)[:top]
+    for name, (self_us, cumulative) in slowest:
+        print(f"  {self_us / 1000:8.1f} ms self {cumulative / 1000:8.1f} ms total  {name}")
+    return total_ms, p50, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--before-rev", help="also measure this git revision")
+    parser.add_argument("--budget-ms", type=float, default=1500,
+                        help="largest acceptable import time of app.main")
+    args = parser.parse_args(argv)
+
+    if args.before_rev:
+        with tempfile.TemporaryDirectory() as tmp:
+            export_rev(args.before_rev, tmp)
+            _, before_p50, _ = report(args.before_rev, tmp, args.runs, args.top)
+
+    total_ms, p50, loaded = report("working tree", ROOT, args.runs, args.top)
+    if args.before_rev:
+        print(f"GET / cold start p50: {before_p50 * 1000:.0f} ms -> {p50 * 1000:.0f} ms "
+              f"({p50 / before_p50 - 1:+.0%})")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.0f} ms, budget {args.budget_ms:.0f} ms")
+    if loaded:
+        failures.append(f"landing page loaded {', '.join(loaded)}")
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
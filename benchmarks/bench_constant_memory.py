@@ -0,0 +1,97 @@
+"""
+Measures peak Python memory of pre-filling a tracker from a stream of task
+records, with and without constant_memory.
+
+    python benchmarks/bench_constant_memory.py [--sizes 1000,10000,100000,1000000]
+
+Records come from a generator (or, with --from-file, from a JSONL file read
+by app.task_import), so the input itself never sits in memory. With
+constant_memory the peak should stay flat as the record count grows; the
+default mode is only run up to --max-default records. Exits non-zero if the
+constant_memory peak grows by more than --tolerance between the smallest
+and largest size.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.excel_generator import generate_task_tracker  # noqa: E402
+from app.task_import import iter_task_file  # noqa: E402
+
+YEAR = 2025
+STATUSES = ('Done', 'Pending', 'Skipped')
+
+
+def fake_records(count):
+    """`count` records spread evenly over YEAR, in date order."""
+    days = 365
+    for i in range(count):
+        yield {
+            'date': date(YEAR, 1, 1) + timedelta(days=i * days // count),
+            'description': f"task {i}",
+            'priority': 'Medium',
+            'status': STATUSES[i % 3],
+            'hours': 0.5,
+        }
+
+
+def measure(records, path, constant_memory):
+    tracemalloc.start()
+    started = time.perf_counter()
+    generate_task_tracker(YEAR, path, tasks=records, constant_memory=constant_memory)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--max-default", type=int, default=100000,
+                        help="largest size to also run without constant_memory")
+    parser.add_argument("--from-file", action="store_true",
+                        help="stream the records from a JSONL file")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="allowed peak growth factor in constant_memory")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    peaks = []
+    print(f"{'records':>10}{'mode':>10}{'peak MiB':>10}{'seconds':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "tracker.xlsx")
+        for size in sizes:
+            if args.from_file:
+                source = os.path.join(tmp, "tasks.jsonl")
+                with open(source, "w") as fh:
+                    for record in fake_records(size):
+                        record['date'] = record['date'].isoformat()
+                        fh.write(json.dumps(record) + "\n")
+                make = lambda: iter_task_file(source)  # noqa: E731
+            else:
+                make = lambda: fake_records(size)  # noqa: E731
+
+            modes = [True] + ([False] if size <= args.max_default else [])
+            for constant_memory in modes:
+                peak, elapsed = measure(make(), out, constant_memory)
+                if constant_memory:
+                    peaks.append(peak)
+                label = "constant" if constant_memory else "default"
+                print(f"{size:>10}{label:>10}{peak / 2**20:>10.1f}{elapsed:>10.2f}")
+
+    growth = peaks[-1] / peaks[0]
+    print(f"constant_memory peak growth {sizes[0]} -> {sizes[-1]}: x{growth:.2f}")
+    return 0 if growth <= args.tolerance else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
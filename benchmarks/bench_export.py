@@ -0,0 +1,72 @@
+"""
+Bytes versus milliseconds of the CSV and NDJSON exports against the xlsx build.
+
+    python benchmarks/bench_export.py [--year 2025] [--runs 5] [--tasks 0]
+
+Each format is produced from its generators and joined, the way /generate
+sends it; the xlsx row is a full build with the default profile. With
+--tasks N every format is pre-filled with N synthetic records spread over
+the year. Prints a Markdown table of median times and sizes.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.excel_generator import build_workbook_bytes  # noqa: E402
+from app.export import FORMATS, stream_export  # noqa: E402
+
+
+def synthetic_tasks(year, count):
+    start = date(year, 1, 1)
+    days = (date(year + 1, 1, 1) - start).days
+    for i in range(count):
+        yield {
+            "date": start + timedelta(days=i * days // count),
+            "description": f"Task {i}",
+            "priority": "Medium",
+            "status": ("Done", "Pending", "Skipped")[i % 3],
+            "hours": 1.5,
+        }
+
+
+def median_ms(runs, fn):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        data = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000, len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    def tasks():
+        return synthetic_tasks(args.year, args.tasks) if args.tasks else None
+
+    xlsx_ms, xlsx_bytes = median_ms(
+        args.runs, lambda: build_workbook_bytes(args.year, tasks=tasks())
+    )
+    print("| Format | ms | bytes | vs xlsx time | vs xlsx size |")
+    print("|---|---:|---:|---:|---:|")
+    print(f"| `xlsx` | {xlsx_ms:.1f} | {xlsx_bytes:,} | 1x | 1x |")
+    for fmt in FORMATS:
+        ms, size = median_ms(
+            args.runs, lambda: b"".join(stream_export(fmt, args.year, tasks=tasks()))
+        )
+        print(f"| `{fmt}` | {ms:.1f} | {size:,} | "
+              f"{xlsx_ms / ms:.0f}x faster | {xlsx_bytes / size:.1f}x smaller |")
+
+
+if __name__ == "__main__":
+    main()
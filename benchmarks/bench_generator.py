@@ -0,0 +1,175 @@
+"""
+Latency, memory and size benchmark of the workbook generator.
+
+    python benchmarks/bench_generator.py [--years 2023,2024,2025,2100] [--runs 5]
+        [--json results.json] [--baseline baseline.json] [--tolerance 0.15]
+
+For each year (leap and non-leap) and each output kind (in-memory BytesIO
+and an on-disk path) it records the median wall time of every generator
+phase (formats, goals, months, weekly, monthly, yearly, close), the total,
+the tracemalloc peak of one extra run and the output size. `main.py`, with
+no arguments as the legacy script was run, is timed end to end in a
+subprocess, interpreter start-up included.
+
+With --json the results are written as JSON; keep one as a baseline. With
+--baseline the run is compared against it, and the script exits non-zero
+when a total time or peak grows by more than --tolerance, or an output
+size by more than --size-tolerance (the creation timestamp alone moves it
+by a byte or two).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import xlsxwriter  # noqa: E402
+
+from app.excel_generator import (  # noqa: E402
+    GENERATOR_VERSION, build_workbook_bytes, generate_task_tracker,
+)
+
+LEGACY_SCRIPTS = ("main.py",)
+LEGACY_OUTPUT = "Advanced_Task_Tracker_Updated.xlsx"
+
+
+def run_generator(year, kind, tmp, phases=None):
+    """One generation; returns the output size in bytes."""
+    if kind == "memory":
+        return len(build_workbook_bytes(year, phases=phases))
+    path = os.path.join(tmp, f"bench_{year}.xlsx")
+    generate_task_tracker(year, path, phases=phases)
+    return os.path.getsize(path)
+
+
+def bench_generator(year, kind, runs, tmp):
+    samples = []
+    for _ in range(runs):
+        phases = {}
+        started = time.perf_counter()
+        size = run_generator(year, kind, tmp, phases)
+        phases["total"] = time.perf_counter() - started
+        samples.append(phases)
+
+    tracemalloc.start()
+    run_generator(year, kind, tmp)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "phases_ms": {
+            name: round(statistics.median(s[name] for s in samples) * 1000, 3)
+            for name in samples[0] if name != "total"
+        },
+        "total_ms": round(statistics.median(s["total"] for s in samples) * 1000, 3),
+        "peak_bytes": peak,
+        "size_bytes": size,
+    }
+
+
+def bench_legacy(script, runs, tmp):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, script)],
+            cwd=tmp, check=True, stdout=subprocess.DEVNULL,
+        )
+        times.append(time.perf_counter() - started)
+    return {
+        "total_ms": round(statistics.median(times) * 1000, 3),
+        "size_bytes": os.path.getsize(os.path.join(tmp, LEGACY_OUTPUT)),
+    }
+
+
+def compare(results, baseline, tolerance, size_tolerance):
+    """Prints the change of every shared metric; returns the regressions."""
+    regressions = []
+    print(f"\n{'case':<22}{'metric':<12}{'baseline':>12}{'now':>12}{'change':>9}")
+    for case, now in results["cases"].items():
+        before = baseline.get("cases", {}).get(case)
+        if before is None:
+            continue
+        for metric, limit in (("total_ms", tolerance), ("peak_bytes", tolerance),
+                              ("size_bytes", size_tolerance)):
+            if metric not in now or metric not in before or not before[metric]:
+                continue
+            change = now[metric] / before[metric] - 1
+            flag = ""
+            if change > limit:
+                flag = "  REGRESSION"
+                regressions.append((case, metric, change))
+            print(f"{case:<22}{metric:<12}{before[metric]:>12}{now[metric]:>12}"
+                  f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", default="2023,2024,2025,2100")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--legacy-runs", type=int, default=3)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed relative growth of time and memory")
+    parser.add_argument("--size-tolerance", type=float, default=0.005,
+                        help="allowed relative growth of output size")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "xlsxwriter": xlsxwriter.__version__,
+            "generator_version": GENERATOR_VERSION,
+            "runs": args.runs,
+        },
+        "cases": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        # Warm up imports and caches outside the measured runs
+        run_generator(2025, "memory", tmp)
+
+        print(f"{'case':<22}{'total ms':>10}{'peak MiB':>10}{'bytes':>10}  phases ms")
+        for year in (int(y) for y in args.years.split(",")):
+            for kind in ("memory", "disk"):
+                case = f"{year}/{kind}"
+                result = bench_generator(year, kind, args.runs, tmp)
+                results["cases"][case] = result
+                phases = " ".join(f"{k}={v:.1f}" for k, v in result["phases_ms"].items())
+                print(f"{case:<22}{result['total_ms']:>10.1f}"
+                      f"{result['peak_bytes'] / 2**20:>10.1f}"
+                      f"{result['size_bytes']:>10}  {phases}")
+
+        for script in LEGACY_SCRIPTS:
+            case = f"legacy/{script}"
+            result = bench_legacy(script, args.legacy_runs, tmp)
+            results["cases"][case] = result
+            print(f"{case:<22}{result['total_ms']:>10.1f}{'':>10}{result['size_bytes']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if baseline.get("meta", {}).get("generator_version") != GENERATOR_VERSION:
+            print("note: baseline was recorded with another GENERATOR_VERSION")
+        regressions = compare(results, baseline, args.tolerance, args.size_tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond tolerance")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
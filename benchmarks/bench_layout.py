@@ -0,0 +1,96 @@
+"""
+Month sheets versus the year-wide task table, as the task count grows.
+
+    python benchmarks/bench_layout.py [--year 2025] [--sizes 10000,100000]
+
+For each size it builds a tracker pre-filled with that many synthetic tasks
+in both layout modes and prints a Markdown table of:
+
+  - build time and file size;
+  - the report formulas' total length, which only grows with the digits
+    of the row numbers;
+  - the cells those formulas read on a full recalculation, counting every
+    row of every range or table column they refer to;
+  - the time app.formula_eval takes to compute every report formula, as a
+    stand-in for the spreadsheet's recalculation.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.analyzer import sheet_parts  # noqa: E402
+from app.excel_generator import build_workbook_bytes  # noqa: E402
+from app.layout import LAYOUT_MODES, PLAN  # noqa: E402
+
+STATUSES = ('Done', 'Pending', 'Skipped')
+_FORMULA = re.compile(rb'<f[^>]*>([^<]*)</f>')
+_RANGE = re.compile(rb'\$?[A-Z]{1,3}\$?(\d+):\$?[A-Z]{1,3}\$?(\d+)')
+_COLUMN = re.compile(rb'\w+\[[^\]]+\]')
+_TABLE_REF = re.compile(rb'<table [^>]*?ref="[A-Z]+(\d+):[A-Z]+(\d+)"')
+
+
+def fake_tasks(year, count):
+    start = date(year, 1, 1)
+    days = (date(year + 1, 1, 1) - start).days
+    for i in range(count):
+        yield {
+            'date': start + timedelta(days=i * days // count),
+            'description': f"task {i}",
+            'status': STATUSES[i % 3],
+            'hours': 0.5,
+        }
+
+
+def report_load(data):
+    """(formula bytes, cells read) over the report sheets' formulas."""
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        parts = sheet_parts(zf)
+        table_rows = 0
+        for name in zf.namelist():
+            if name.startswith('xl/tables/'):
+                first, last = _TABLE_REF.search(zf.read(name)).groups()
+                # Data rows, without the header
+                table_rows += int(last) - int(first)
+        text = cells = 0
+        for report in PLAN.reports:
+            for formula in _FORMULA.findall(zf.read(parts[report.sheet])):
+                text += len(formula)
+                cells += sum(int(b) - int(a) + 1 for a, b in _RANGE.findall(formula))
+                cells += table_rows * len(_COLUMN.findall(formula))
+    return text, cells
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--sizes", default="10000,100000")
+    args = parser.parse_args(argv)
+
+    print("| Tasks | Layout | Build s | Bytes | Report formula bytes "
+          "| Cells read per recalc | Report eval s |")
+    print("|---:|---|---:|---:|---:|---:|---:|")
+    for size in (int(s) for s in args.sizes.split(",")):
+        for mode in LAYOUT_MODES:
+            phases = {}
+            started = time.perf_counter()
+            data = build_workbook_bytes(
+                args.year, tasks=fake_tasks(args.year, size), phases=phases,
+                layout_mode=mode,
+            )
+            elapsed = time.perf_counter() - started
+            text, cells = report_load(data)
+            evaluate = sum(phases[p] for p in ('weekly', 'monthly', 'yearly'))
+            print(f"| {size:,} | `{mode}` | {elapsed:.1f} | {len(data):,} "
+                  f"| {text:,} | {cells:,} | {evaluate:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
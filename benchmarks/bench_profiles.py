@@ -0,0 +1,74 @@
+"""
+Bytes versus milliseconds for each output profile.
+
+    python benchmarks/bench_profiles.py [--year 2025] [--runs 5]
+
+For every profile in app.layout.PROFILES it times a full build
+(build_workbook_bytes) and a patched render from a warm skeleton
+(render_workbook), and prints a Markdown table of the median times, the
+output sizes, and the uncompressed worksheet XML and cell records a
+spreadsheet application has to parse on open, ready to paste into the
+README.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import zipfile
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.excel_generator import build_workbook_bytes  # noqa: E402
+from app.layout import PROFILES  # noqa: E402
+from app.template_engine import render_workbook  # noqa: E402
+
+
+def median_ms(runs, fn):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        data = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000, data
+
+
+def sheet_load(data):
+    """Uncompressed bytes and cell records of all worksheets."""
+    xml_bytes = cells = 0
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        for info in zf.infolist():
+            if info.filename.startswith("xl/worksheets/"):
+                xml = zf.read(info)
+                xml_bytes += len(xml)
+                cells += xml.count(b"<c ")
+    return xml_bytes, cells
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print("| Profile | Full build ms | Full build bytes | Patched ms | Patched bytes "
+          "| Sheet XML bytes | Cells |")
+    print("|---|---:|---:|---:|---:|---:|---:|")
+    for name in PROFILES:
+        full_ms, full = median_ms(
+            args.runs, lambda: build_workbook_bytes(args.year, profile=name)
+        )
+        # Warm the skeleton of this calendar shape, then render another year
+        render_workbook(args.year, profile=name)
+        patched_ms, patched = median_ms(
+            args.runs, lambda: render_workbook(args.year + 28, profile=name)
+        )
+        xml_bytes, cells = sheet_load(full)
+        print(f"| `{name}` | {full_ms:.0f} | {len(full):,} | {patched_ms:.1f} "
+              f"| {len(patched):,} | {xml_bytes:,} | {cells:,} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Compares the formula cost of the current workbook with an earlier revision.
+
+    python benchmarks/bench_recalc.py --before-rev <git-rev> [--year 2025]
+
+Always reports the number of formulas and the number of cells their
+criteria ranges scan. When LibreOffice's Python UNO bridge is importable
+(run it with LibreOffice's bundled python, or with `--soffice` pointing at
+the binary and `uno` on the path), it also times a full recalculation
+(`calculateAll()`) of each workbook in headless LibreOffice.
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_RANGE = re.compile(r"\$?([A-Z]+)\$?(\d+):\$?([A-Z]+)\$?(\d+)")
+_FORMULA = re.compile(r"<f>(.*?)</f>", re.S)
+
+
+def load_generator(rev=None):
+    """The generator module, either from the tree or from a git revision."""
+    if rev is None:
+        from app import excel_generator
+        return excel_generator
+    source = subprocess.check_output(
+        ["git", "show", f"{rev}:app/excel_generator.py"], cwd=ROOT
+    )
+    module = types.ModuleType(f"excel_generator_{rev}")
+    exec(compile(source, f"{rev}:app/excel_generator.py", "exec"), module.__dict__)
+    return module
+
+
+def _col(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def formula_cost(path):
+    """(formula count, cells scanned by all ranges) over every worksheet."""
+    formulas = scanned = 0
+    with zipfile.ZipFile(path) as zf:
+        for name in zf.namelist():
+            if not name.startswith("xl/worksheets/"):
+                continue
+            for formula in _FORMULA.findall(zf.read(name).decode("utf-8")):
+                formulas += 1
+                for c1, r1, c2, r2 in _RANGE.findall(formula):
+                    scanned += (_col(c2) - _col(c1) + 1) * (int(r2) - int(r1) + 1)
+    return formulas, scanned
+
+
+def libreoffice_recalc(paths, soffice, runs):
+    """Median seconds of calculateAll() per workbook, or None without UNO."""
+    try:
+        import uno
+    except ImportError:
+        return None
+
+    port = 2002
+    proc = subprocess.Popen([
+        soffice, "--headless", "--invisible", "--norestore",
+        f"--accept=socket,host=localhost,port={port};urp;",
+    ])
+    try:
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local
+        )
+        for _ in range(100):
+            try:
+                ctx = resolver.resolve(
+                    f"uno:socket,host=localhost,port={port};urp;"
+                    "StarOffice.ComponentContext"
+                )
+                break
+            except Exception:
+                time.sleep(0.2)
+        else:
+            raise RuntimeError("could not connect to soffice")
+        desktop = ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", ctx
+        )
+        hidden = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+        hidden.Name, hidden.Value = "Hidden", True
+
+        results = {}
+        for label, path in paths.items():
+            doc = desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(path), "_blank", 0, (hidden,)
+            )
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                doc.calculateAll()
+                timings.append(time.perf_counter() - started)
+            doc.close(True)
+            results[label] = statistics.median(timings)
+        return results
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--before-rev", required=True)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--soffice", default=shutil.which("soffice") or "soffice")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for label, rev in (("before", args.before_rev), ("after", None)):
+            path = os.path.join(tmp, f"{label}.xlsx")
+            load_generator(rev).generate_task_tracker(args.year, path)
+            paths[label] = path
+
+        recalc = libreoffice_recalc(paths, args.soffice, args.runs)
+        print(f"{'':8}{'formulas':>10}{'cells scanned':>16}{'recalc ms':>12}")
+        for label, path in paths.items():
+            formulas, scanned = formula_cost(path)
+            ms = f"{recalc[label] * 1000:.1f}" if recalc else "n/a"
+            print(f"{label:8}{formulas:>10}{scanned:>16}{ms:>12}")
+        if recalc is None:
+            print("(LibreOffice UNO bridge not available; recalc not timed)")
+
+
+if __name__ == "__main__":
+    main()
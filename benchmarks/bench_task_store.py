@@ -0,0 +1,84 @@
+"""
+Times reading one user's year from the task store, and pre-filling a
+tracker from it, as the store grows.
+
+    python benchmarks/bench_task_store.py [--sizes 10000,100000,1000000]
+
+Every user gets the same number of tasks per year, so the per-user work is
+constant and any growth in query time comes from the store size alone.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.excel_generator import generate_task_tracker  # noqa: E402
+from app.task_store import STATUSES, TaskStore  # noqa: E402
+
+YEAR = 2025
+
+
+def fake_tasks(users, per_user, rng):
+    start = date(YEAR - 1, 1, 1)
+    for user in users:
+        for _ in range(per_user):
+            day = start + timedelta(days=rng.randrange(3 * 365))
+            yield (
+                user, day.isoformat(), f"task {rng.randrange(10**6)}",
+                rng.choice(('High', 'Medium', 'Low')), rng.choice(STATUSES),
+                round(rng.uniform(0, 4), 2),
+            )
+
+
+def best_of(runs, fn):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--tasks-per-user", type=int, default=1500,
+                        help="tasks per user over three years")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TaskStore(os.path.join(tmp, "tasks.db"))
+        rows = users = 0
+        print(f"{'rows':>10}{'year tasks':>12}{'query ms':>10}{'fill ms':>10}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            new_users = []
+            while rows < size:
+                new_users.append(f"user{users}")
+                users += 1
+                rows += args.tasks_per_user
+            store.add_many(fake_tasks(new_users, args.tasks_per_user, rng))
+
+            query_s, tasks = best_of(
+                args.runs, lambda: list(store.iter_year("user0", YEAR))
+            )
+            fill_s, _ = best_of(
+                args.runs,
+                lambda: generate_task_tracker(
+                    YEAR, BytesIO(), tasks=store.iter_year("user0", YEAR)
+                ),
+            )
+            print(f"{rows:>10}{len(tasks):>12}{query_s * 1000:>10.2f}{fill_s * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cost of an in-place tracker update against regenerating the workbook.
+
+    python benchmarks/bench_update.py [--year 2025] [--sizes 0,10000,100000]
+        [--changes 1,100] [--runs 5]
+
+For trackers pre-filled with each of --sizes synthetic tasks, it times
+app.updater.update_tracker adding each of --changes tasks to one month
+(and, separately, a goals-only change), and a full pre-filled build of the
+same workbook for comparison. Prints a Markdown table of median times.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.excel_generator import build_workbook_bytes  # noqa: E402
+from app.updater import TrackerChanges, update_tracker  # noqa: E402
+
+
+def synthetic_tasks(year, count):
+    start = date(year, 1, 1)
+    days = (date(year + 1, 1, 1) - start).days
+    for i in range(count):
+        yield {
+            "date": start + timedelta(days=i * days // count),
+            "description": f"Task {i}",
+            "status": ("Done", "Pending", "Skipped")[i % 3],
+            "hours": 1.5,
+        }
+
+
+def median_ms(runs, fn):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--sizes", default="0,10000,100000")
+    parser.add_argument("--changes", default="1,100")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    changes = [int(n) for n in args.changes.split(",")]
+
+    columns = ["goals only"] + [f"+{n} tasks" for n in changes] + ["full build"]
+    print("| Tasks in tracker | bytes | " + " | ".join(f"{c} ms" for c in columns) + " |")
+    print("|---:|---:|" + "---:|" * len(columns))
+    for size in (int(s) for s in args.sizes.split(",")):
+        build = lambda: build_workbook_bytes(
+            args.year, tasks=synthetic_tasks(args.year, size), constant_memory=size > 0
+        )
+        data = build()
+        timings = [median_ms(args.runs, lambda: update_tracker(
+            data, TrackerChanges(goals={"weekly": 30})
+        ))]
+        for n in changes:
+            added = TrackerChanges(tasks=[
+                {"date": date(args.year, 6, 1 + i % 30), "description": f"New {i}"}
+                for i in range(n)
+            ])
+            timings.append(median_ms(args.runs, lambda: update_tracker(data, added)))
+        timings.append(median_ms(max(1, args.runs // 2), build))
+        print(f"| {size:,} | {len(data):,} | " + " | ".join(f"{t:.1f}" for t in timings) + " |")
+
+
+if __name__ == "__main__":
+    main()
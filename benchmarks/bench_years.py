@@ -0,0 +1,95 @@
+"""
+Cost of a multi-year tracker as the number of years grows.
+
+    python benchmarks/bench_years.py [--year 2025] [--spans 1,2,4,8]
+        [--tasks-per-day 2]
+
+For each span it builds one tracker covering that many years, pre-filled
+with synthetic tasks, in both layout modes, and prints a Markdown table of
+the build time, the file size and the cells the report formulas read on a
+full recalculation (every row of every range or table column they refer
+to), each also divided by the number of years. Linear growth shows as flat
+per-year columns.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.analyzer import sheet_parts  # noqa: E402
+from app.excel_generator import build_workbook_bytes  # noqa: E402
+from app.layout import LAYOUT_MODES  # noqa: E402
+
+STATUSES = ('Done', 'Pending', 'Skipped')
+_FORMULA = re.compile(rb'<f[^>]*>([^<]*)</f>')
+_RANGE = re.compile(rb'\$?[A-Z]{1,3}\$?(\d+):\$?[A-Z]{1,3}\$?(\d+)')
+_COLUMN = re.compile(rb'(\w+)\[[^\]]+\]')
+_TABLE = re.compile(rb'<table [^>]*?name="(\w+)"[^>]*?ref="[A-Z]+(\d+):[A-Z]+(\d+)"')
+
+
+def fake_tasks(first, last, per_day):
+    day, end = date(first, 1, 1), date(last, 12, 31)
+    i = 0
+    while day <= end:
+        for _ in range(per_day):
+            yield {
+                'date': day, 'description': f"task {i}",
+                'status': STATUSES[i % 3], 'hours': 0.5,
+            }
+            i += 1
+        day += timedelta(days=1)
+
+
+def recalc_cells(data):
+    """Cells read by every report formula, on a full recalculation."""
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        parts = sheet_parts(zf)
+        table_rows = {}
+        for name in zf.namelist():
+            if name.startswith('xl/tables/'):
+                table, first, last = _TABLE.search(zf.read(name)).groups()
+                # Data rows, without the header
+                table_rows[table] = int(last) - int(first)
+        cells = 0
+        for sheet, part in parts.items():
+            if 'Report' not in sheet:
+                continue
+            for formula in _FORMULA.findall(zf.read(part)):
+                cells += sum(int(b) - int(a) + 1 for a, b in _RANGE.findall(formula))
+                cells += sum(table_rows[t] for t in _COLUMN.findall(formula))
+    return cells
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--spans", default="1,2,4,8")
+    parser.add_argument("--tasks-per-day", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    print("| Years | Layout | Build s | s / year | Bytes | Cells read per recalc "
+          "| Cells / year |")
+    print("|---:|---|---:|---:|---:|---:|---:|")
+    for span in (int(s) for s in args.spans.split(",")):
+        last = args.year + span - 1
+        for mode in LAYOUT_MODES:
+            started = time.perf_counter()
+            data = build_workbook_bytes(
+                args.year, tasks=fake_tasks(args.year, last, args.tasks_per_day),
+                layout_mode=mode, end_year=last,
+            )
+            elapsed = time.perf_counter() - started
+            cells = recalc_cells(data)
+            print(f"| {span} | `{mode}` | {elapsed:.2f} | {elapsed / span:.2f} "
+                  f"| {len(data):,} | {cells:,} | {cells // span:,} |")
+
+
+if __name__ == "__main__":
+    main()
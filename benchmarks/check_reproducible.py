@@ -0,0 +1,97 @@
+"""
+Checks that reproducible builds are byte-identical from run to run.
+
+    python benchmarks/check_reproducible.py [--year 2025] [--tasks 2000]
+
+Generates the same set of workbooks in two fresh interpreters, started a
+couple of seconds apart with different hash seeds and time zones, and
+compares the sha256 of every file: full builds in memory, to a file and in
+constant_memory mode, template-engine renders, pre-filled trackers and the
+table layout, for every profile. Within each run, a render must also be the
+same file as the full build of that year. Prints one line per workbook and
+exits non-zero on any mismatch.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_DIGESTS = """
+import hashlib, json, os, sys, tempfile
+from datetime import date, timedelta
+from app.excel_generator import build_workbook_bytes, generate_task_tracker
+from app.layout import PROFILES
+from app.template_engine import render_workbook
+
+year, count = int(sys.argv[1]), int(sys.argv[2])
+
+def tasks():
+    for i in range(count):
+        yield {'date': date(year, 1, 1) + timedelta(days=i * 365 // count),
+               'description': f'task {i}', 'status': 'Done', 'hours': 1.5}
+
+def from_file(**kwargs):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tracker.xlsx')
+        generate_task_tracker(year, path, reproducible=True, **kwargs)
+        with open(path, 'rb') as fh:
+            return fh.read()
+
+cases = {}
+for profile in PROFILES:
+    cases[f'{profile} build'] = build_workbook_bytes(year, profile=profile, reproducible=True)
+    cases[f'{profile} render'] = render_workbook(year, profile=profile, reproducible=True)
+    # A later year of the same calendar shape, patched from the skeleton
+    cases[f'{profile} render +28'] = render_workbook(year + 28, profile=profile, reproducible=True)
+    cases[f'{profile} file'] = from_file(profile=profile)
+    cases[f'{profile} prefilled'] = build_workbook_bytes(
+        year, tasks=tasks(), profile=profile, reproducible=True)
+    cases[f'{profile} constant_memory'] = from_file(
+        tasks=tasks(), constant_memory=True, profile=profile)
+    cases[f'{profile} table'] = build_workbook_bytes(
+        year, tasks=tasks(), profile=profile, layout_mode='table', reproducible=True)
+print(json.dumps({name: hashlib.sha256(data).hexdigest() for name, data in cases.items()}))
+"""
+
+
+def digests(year, tasks, seed, tz):
+    env = dict(os.environ, PYTHONHASHSEED=str(seed), TZ=tz, PYTHONPATH=ROOT)
+    out = subprocess.run(
+        [sys.executable, "-c", _DIGESTS, str(year), str(tasks)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--pause", type=float, default=2.0,
+                        help="seconds between the two runs")
+    args = parser.parse_args(argv)
+
+    first = digests(args.year, args.tasks, 1, "UTC")
+    time.sleep(args.pause)
+    second = digests(args.year, args.tasks, 2, "America/New_York")
+
+    failures = []
+    for name, digest in first.items():
+        same = second.get(name) == digest
+        print(f"{'ok  ' if same else 'FAIL'} {digest[:16]} {name}")
+        if not same:
+            failures.append(f"{name} differs between runs")
+        profile, _, kind = name.partition(" ")
+        if kind in ("render", "file") and digest != first[f"{profile} build"]:
+            failures.append(f"{name} is not the same file as {profile} build")
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+import asyncio
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from app.batch import BatchRequest, archive_names, stream_batch
+from app.cache import WorkbookCache
+
+
+def run_batch(items):
+    async def collect():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return b''.join([
+                chunk async for chunk in stream_batch(items, executor, WorkbookCache(0))
+            ])
+    return zipfile.ZipFile(BytesIO(asyncio.run(collect())))
+
+
+def test_items_sharing_a_filename_are_all_written():
+    items = BatchRequest(items=[
+        {'year': 2025},
+        {'year': 2025, 'goals': {'weekly': 30}},
+        {'year': 2025, 'profile': 'fast'},
+        {'year': 2025, 'profile': 'fast'},
+    ]).items
+    with run_batch(items) as zf:
+        manifest = json.loads(zf.read('manifest.json'))
+        workbooks = [name for name in zf.namelist() if name.endswith('.xlsx')]
+
+    files = [item['file'] for item in manifest['items']]
+    assert len(set(workbooks)) == len(workbooks) == 3
+    assert set(files) == set(workbooks)
+    # The two identical items share one workbook
+    assert files[2] == files[3]
+    assert manifest['generated'] == 3
+
+
+def test_names_are_unchanged_without_collisions():
+    items = BatchRequest(items=[{'year': 2025}, {'year': 2025, 'label': 'bob'}]).items
+    assert archive_names(items) == ['task_tracker_2025.xlsx', 'task_tracker_2025_bob.xlsx']
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.cache import ArtifactStore, WorkbookCache
+from app.layout import DEFAULT_PROFILE, GENERATOR_VERSION, goals_key
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'artifact_store', ArtifactStore(str(tmp_path)))
+    monkeypatch.setattr(main, 'workbook_cache', WorkbookCache(1 << 26))
+    return TestClient(main.app)
+
+
+def test_first_response_has_etag(client):
+    first = client.post('/generate', data={'year': 2031})
+    assert first.status_code == 200
+    assert 'miss' in first.headers['server-timing']
+    etag = first.headers['etag']
+
+    # The streamed file went to the store as it was sent
+    stored = main.artifact_store.get(
+        (2031, goals_key(), DEFAULT_PROFILE, GENERATOR_VERSION)
+    )
+    with open(stored.path, 'rb') as fh:
+        assert fh.read() == first.content
+
+    again = client.post('/generate', data={'year': 2031}, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['etag'] == etag
+    hit = client.post('/generate', data={'year': 2031})
+    assert hit.headers['etag'] == etag
+    assert hit.content == first.content
+
+
+def test_streams_into_memory_cache_without_store(client, monkeypatch):
+    monkeypatch.setattr(main, 'artifact_store', None)
+    first = client.post('/generate', data={'year': 2032})
+    hit = client.post('/generate', data={'year': 2032})
+    assert 'hit' in hit.headers['server-timing']
+    assert hit.headers['etag'] == first.headers['etag']
+    assert hit.content == first.content
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=250)
+    for key in ('a', 'b'):
+        store.put(key, key.encode() * 100)
+    # Make 'a' the older file, then use it so that 'b' goes first
+    os.utime(store.path('a'), ns=(0, 0))
+    assert store.get('a') is not None
+    store.put('c', b'c' * 100)
+    assert [store.contains(key) for key in 'abc'] == [True, False, True]
+    # A file over the whole budget is not kept
+    store.put('d', b'd' * 300)
+    assert not store.contains('d')
+    stats = store.stats()
+    assert (stats['bytes'], stats['max_bytes'], stats['evictions']) == (200, 250, 1)
+
+
+def test_goals_field_sets_the_goals(client):
+    blank = client.post('/generate', data={'year': 2033})
+    custom = client.post('/generate', data={'year': 2033, 'goals': '{"weekly": 35}'})
+    assert custom.status_code == 200
+    assert custom.headers['etag'] != blank.headers['etag']
+    stored = main.artifact_store.get(
+        (2033, goals_key({'weekly': 35}), DEFAULT_PROFILE, GENERATOR_VERSION)
+    )
+    assert stored is not None
+    for goals in ('{"hourly": 3}', '{"weekly": "many"}', 'not json'):
+        assert client.post('/generate', data={'year': 2033, 'goals': goals}).status_code == 422
+
+
+@pytest.mark.parametrize('field', [
+    {'profile': 'fast'}, {'layout': 'table'}, {'rows_per_day': 2},
+])
+def test_exports_reject_workbook_options(client, field):
+    response = client.post('/generate', data=dict(year=2033, format='csv', **field))
+    assert response.status_code == 422
+    assert client.post('/generate', data={'year': 2033, 'format': 'csv'}).status_code == 200
@@ -0,0 +1,161 @@
+import html
+import io
+import re
+import tracemalloc
+import zipfile
+from datetime import date, timedelta
+
+from app.analyzer import analyze_workbook, sheet_parts
+from app.excel_generator import build_workbook_bytes, generate_task_tracker
+from app.formula_eval import FormulaGrid, cell_index
+from app.layout import PLAN
+
+YEAR = 2025
+
+
+def fake_tasks(count):
+    for i in range(count):
+        yield {
+            'date': date(YEAR, 1, 1) + timedelta(days=i * 365 // count),
+            'description': f"task {i}", 'status': 'Done', 'hours': 0.5,
+        }
+
+
+def test_constant_memory_rewinds_buffer():
+    buffer = io.BytesIO()
+    generate_task_tracker(YEAR, buffer, tasks=fake_tasks(100), constant_memory=True)
+    assert buffer.tell() == 0
+    assert zipfile.ZipFile(buffer).testzip() is None
+
+
+def peak_memory(count, path):
+    tracemalloc.start()
+    try:
+        generate_task_tracker(YEAR, path, tasks=fake_tasks(count), constant_memory=True)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_constant_memory_peak_stays_flat(tmp_path):
+    path = str(tmp_path / 'tracker.xlsx')
+    small = peak_memory(500, path)
+    large = peak_memory(5000, path)
+    # Ten times the rows, within the benchmark's default tolerance
+    assert large <= small * 1.5, (small, large)
+
+
+_RESULT = re.compile(rb'<c r="([A-Z]+\d+)"[^>]*><f>([^<]*)</f><v>([^<]*)</v>')
+
+
+def report_results(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {
+            sheet: {cell: (formula, value) for cell, formula, value
+                    in _RESULT.findall(zf.read(part))}
+            for sheet, part in sheet_parts(zf).items() if 'Report' in sheet
+        }
+
+
+def test_table_reports_match_month_layout():
+    # At most one task a day, so every day has exactly two rows
+    tasks = list(fake_tasks(300))
+    months = report_results(build_workbook_bytes(YEAR, tasks=tasks, rows_per_day=2))
+    table = report_results(build_workbook_bytes(
+        YEAR, tasks=tasks, rows_per_day=2, layout_mode='table'))
+    assert table.keys() == months.keys()
+    for sheet, cells in table.items():
+        assert {c: v for c, (_, v) in cells.items()} == \
+            {c: v for c, (_, v) in months[sheet].items()}, sheet
+    # Reports read whole table columns, never a fixed block of rows
+    formula = table['Weekly Report'][b'B4'][0].decode()
+    assert 'Tasks[Week No]' in formula and 'Tasks[Task Description]' in formula
+    assert "'Tasks'!" not in formula and 'Tasks!' not in formula
+
+
+_VALUE = re.compile(rb'<c r="([A-Z]+\d+)"([^>]*)>(?:<f>[^<]*</f>)?<v>([^<]*)</v>')
+
+
+def task_rows(data):
+    """The Tasks sheet's table rows as lists of cell values."""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        strings = re.findall(rb'<t[^>]*>([^<]*)</t>', zf.read('xl/sharedStrings.xml'))
+        last = int(re.search(rb'ref="A2:K(\d+)"', zf.read('xl/tables/table1.xml'))[1])
+        rows = [[None] * len(PLAN.month_headers) for _ in range(2, last)]
+        for ref, attrs, value in _VALUE.findall(zf.read(sheet_parts(zf)['Tasks'])):
+            row, col = cell_index(ref.decode())
+            if 2 <= row < last:
+                if b't="s"' in attrs:
+                    value = strings[int(value)].decode()
+                elif b't="str"' not in attrs:
+                    value = float(value)
+                rows[row - 2][col] = value
+    return rows
+
+
+def evaluate(rows, formula, sheet):
+    grid = FormulaGrid()
+    for r, values in enumerate(rows, 2):
+        for col, value in enumerate(values):
+            grid.set('Tasks', r, col, value)
+    grid.add_table('Tasks', 'Tasks', 2, len(rows) + 1, PLAN.month_headers)
+    # The key of the report row evaluated, week 2
+    grid.set('Weekly Report', 3, 0, 2)
+    return grid.evaluate(formula, sheet)
+
+
+def task_row(day, week):
+    row = dict.fromkeys(PLAN.month_headers)
+    row.update({'Date': (day - date(1899, 12, 30)).days, 'Task Description': 'added',
+                'Status': 'Done', 'Week No': week})
+    return list(row.values())
+
+
+def test_table_reports_count_inserted_rows():
+    data = build_workbook_bytes(YEAR, tasks=list(fake_tasks(300)), rows_per_day=2,
+                                layout_mode='table')
+    results = report_results(data)
+    cells = {'Weekly Report': b'B4', 'Monthly Report': b'B14'}
+    formulas = {sheet: html.unescape(results[sheet][cell][0].decode())
+                for sheet, cell in cells.items()}
+    rows = task_rows(data)
+    count = {sheet: evaluate(rows, formula, sheet) for sheet, formula in formulas.items()}
+    # Week 2 and December
+    assert count == {sheet: float(results[sheet][cell][1]) for sheet, cell in cells.items()}
+
+    # A row inserted where week 2 starts, and one added below the last day
+    week_col = PLAN.month_headers.index('Week No')
+    at = next(i for i, row in enumerate(rows) if row[week_col] == 2)
+    rows.insert(at, task_row(date(YEAR, 1, 8), 2))
+    rows.append(task_row(date(YEAR, 12, 31), 53))
+    for sheet, formula in formulas.items():
+        assert evaluate(rows, formula, sheet) == count[sheet] + 1, sheet
+
+
+def test_analyzer_reports_undated_table_rows():
+    data = build_workbook_bytes(YEAR, tasks=list(fake_tasks(300)), rows_per_day=2,
+                                layout_mode='table')
+    before = analyze_workbook(data)
+    assert before['undated']['total'] == 0
+    # Clear the date of the first task's row
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as zf, zipfile.ZipFile(out, 'w') as dest:
+        part = sheet_parts(zf)['Tasks']
+        for info in zf.infolist():
+            body = zf.read(info)
+            if info.filename == part:
+                body = re.sub(rb'(<c r="A3"[^>]*)><v>[^<]*</v></c>', rb'\1/>', body)
+            dest.writestr(info, body)
+    after = analyze_workbook(out.getvalue())
+    assert after['undated'] == {'total': 1, 'done': 1, 'pending': 0, 'skipped': 0,
+                                'hours': 0.5, 'goal': 0, 'complete': 0}
+    assert after['yearly']['total'] == before['yearly']['total'] - 1
+
+
+def test_compact_rules_apply_to_their_own_column():
+    with zipfile.ZipFile(io.BytesIO(build_workbook_bytes(YEAR, profile='compact'))) as zf:
+        january = zf.read(sheet_parts(zf)['January']).decode()
+    ranges = re.findall(r'<conditionalFormatting sqref="([^"]+)">(.*?)</conditionalFormatting>',
+                        january)
+    assert [(sqref, body.count('<cfRule')) for sqref, body in ranges] == \
+        [('E3:E33', 3), ('F3:F33', 3)]
@@ -0,0 +1,24 @@
+import os
+import zipfile
+
+from app.jobs import JobRequest, JobRunner, JobStore
+
+
+def test_multi_item_job_writes_every_distinct_workbook(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    runner = JobRunner(store, str(tmp_path / 'artifacts'), str(tmp_path / 'tasks.db'))
+    os.makedirs(runner.artifact_dir)
+    request = JobRequest(items=[
+        {'year': 2025},
+        {'year': 2025, 'goals': {'monthly': 50}},
+        {'year': 2025, 'profile': 'fast'},
+    ])
+    store.create(request.model_dump(), 1, 60)
+    job = store.claim()
+    runner._run(job)
+
+    job = store.get(job['id'])
+    assert job['status'] == 'done'
+    with zipfile.ZipFile(job['artifact']) as zf:
+        names = zf.namelist()
+    assert len(names) == len(set(names)) == 3
@@ -0,0 +1,61 @@
+import io
+import os
+import subprocess
+import sys
+import time
+import zipfile
+
+from app.excel_generator import build_workbook_bytes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_DIGESTS = """
+import hashlib, io, os, sys, tempfile
+from app.excel_generator import build_workbook_bytes, generate_task_tracker
+from app.template_engine import render_workbook
+
+def from_file(**kwargs):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tracker.xlsx')
+        generate_task_tracker(2025, path, reproducible=True, **kwargs)
+        with open(path, 'rb') as fh:
+            return fh.read()
+
+for data in (
+    build_workbook_bytes(2025, reproducible=True),
+    render_workbook(2025, reproducible=True),
+    from_file(),
+    from_file(constant_memory=True),
+    build_workbook_bytes(2025, profile='compact', reproducible=True),
+):
+    print(hashlib.sha256(data).hexdigest())
+"""
+
+
+def digests(seed, tz):
+    env = dict(os.environ, PYTHONHASHSEED=str(seed), TZ=tz, PYTHONPATH=ROOT)
+    env.pop('SOURCE_DATE_EPOCH', None)
+    return subprocess.run(
+        [sys.executable, '-c', _DIGESTS], cwd=ROOT, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+
+
+def test_builds_are_byte_identical_across_runs():
+    first = digests(1, 'UTC')
+    # Entry times in the zip have a two-second resolution
+    time.sleep(2)
+    second = digests(2, 'America/New_York')
+    assert first == second
+    # A render and a file build are the same workbook as a build in memory
+    assert len(set(first[:3])) == 1
+
+
+def test_source_date_epoch_sets_created_time(monkeypatch):
+    monkeypatch.delenv('SOURCE_DATE_EPOCH', raising=False)
+    data = build_workbook_bytes(2025, reproducible=True)
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    stamped = build_workbook_bytes(2025, reproducible=True)
+    assert stamped != data
+    with zipfile.ZipFile(io.BytesIO(stamped)) as zf:
+        assert b'2023-11-14T22:13:20Z' in zf.read('docProps/core.xml')
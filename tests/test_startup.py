@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_app(code, cwd, **env):
+    env = dict(os.environ, PYTHONPATH=ROOT, **env)
+    return subprocess.run(
+        [sys.executable, '-c', code], cwd=cwd, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+
+
+def test_startup_writes_nothing(tmp_path):
+    # Serverless deployments have a read-only working directory
+    store = tmp_path / 'store'
+    cwd = tmp_path / 'cwd'
+    cwd.mkdir()
+    out = run_app(
+        'from fastapi.testclient import TestClient\n'
+        'from app.main import app\n'
+        'with TestClient(app) as client:\n'
+        '    print(client.get("/cache").json()["artifacts"]["entries"])\n',
+        cwd, ARTIFACT_DIR=str(store),
+    )
+    assert out.strip() == '0'
+    assert list(cwd.iterdir()) == []
+    assert not store.exists()
+
+
+def test_data_paths_resolve_under_data_dir(tmp_path):
+    data = tmp_path / 'data'
+    out = run_app(
+        'from app import main\n'
+        'print(main.TASK_DB_PATH, main.JOB_DB_PATH, main.JOB_DIR)\n',
+        tmp_path, DATA_DIR=str(data), JOB_DB_PATH='queue/jobs.db',
+        JOB_DIR=str(tmp_path / 'files'),
+    )
+    assert out.split() == [str(data / 'tasks.db'), str(data / 'queue' / 'jobs.db'),
+                           str(tmp_path / 'files')]
+
+
+def test_cold_start_skips_generator_imports(tmp_path):
+    out = run_app(
+        'import sys\n'
+        'from fastapi.testclient import TestClient\n'
+        'from app.main import app\n'
+        'assert TestClient(app).get("/").status_code == 200\n'
+        'print(sorted(m for m in ("xlsxwriter", "jinja2") if m in sys.modules))\n',
+        tmp_path,
+    )
+    assert out.strip() == '[]'
+
+
+def import_times(module):
+    """{module: cumulative us} from `python -X importtime -c 'import module'`."""
+    err = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stderr
+    times = {}
+    for line in err.splitlines():
+        fields = line[len('import time:'):].split('|')
+        if line.startswith('import time:') and fields[0].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+def test_import_stays_within_budget():
+    import_times('app.main')  # compile the bytecode first
+    times = min((import_times('app.main') for _ in range(3)), key=lambda t: t['app.main'])
+    # The app's own imports may cost as much again as FastAPI's, which
+    # they cannot avoid: about 1.4x today. Relative, so that slow machines
+    # do not fail it.
+    assert times['app.main'] <= 2 * times['fastapi'], times['app.main']
+
+
+def test_export_skips_xlsxwriter(tmp_path):
+    out = run_app(
+        'import sys\n'
+        'from app.export import stream_export\n'
+        'print("xlsxwriter" in sys.modules)\n',
+        tmp_path,
+    )
+    assert out.strip() == 'False'
@@ -0,0 +1,25 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'TASK_DB_PATH', str(tmp_path / 'tasks.db'))
+    return TestClient(main.app)
+
+
+def test_patch_cannot_clear_required_fields(client):
+    task = client.post('/tasks', json={
+        'user': 'alice', 'date': '2025-03-01', 'description': 'Write report',
+    }).json()
+    for field in ('date', 'description', 'status'):
+        response = client.patch(f"/tasks/{task['id']}", json={field: None})
+        assert response.status_code == 422, field
+
+    # Optional fields can still be cleared
+    response = client.patch(f"/tasks/{task['id']}", json={'notes': None, 'status': 'Done'})
+    assert response.status_code == 200
+    assert response.json()['status'] == 'Done'
+    assert response.json()['description'] == 'Write report'
@@ -0,0 +1,24 @@
+import datetime
+import io
+import re
+import zipfile
+
+from app.analyzer import sheet_parts
+from app.excel_generator import build_workbook_bytes
+from app.updater import TrackerChanges, update_tracker
+
+_WEEK = re.compile(rb'<c r="K(\d+)"[^>]*><f>([^<]*)</f>')
+
+
+def test_inserted_rows_keep_week_formulas_on_their_row():
+    tasks = [
+        {'date': datetime.date(2025, 3, 4), 'description': f"task {i}"} for i in range(3)
+    ]
+    data = update_tracker(build_workbook_bytes(2025), TrackerChanges(tasks=tasks))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        march = zf.read(sheet_parts(zf)['March'])
+    formulas = _WEEK.findall(march)
+    # 31 days and two inserted rows
+    assert len(formulas) == 33
+    for row, formula in formulas:
+        assert formula == b'IF(A%s="", "", INT((A%s-DATE(YEAR(A%s),1,1))/7)+1)' % ((row,) * 3)